@@ -1,4 +1,6 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from . import busqueda, edicion_masiva, recalculo
+from .listados_admin import FiltroAutocompletar, ListadoGrandeMixin
 from .models import Vendedor, ReglaComision, Venta, ComisionCalculada
 
 
@@ -10,6 +12,10 @@ class VendedorAdmin(admin.ModelAdmin):
     search_fields = ['nombre', 'apellido', 'email']
     list_editable = ['activo']
     ordering = ['apellido', 'nombre']
+    
+    def delete_queryset(self, request, queryset):
+        """Elimina los vendedores seleccionados con sus ventas en bloque"""
+        edicion_masiva.eliminar_vendedores(queryset)
 
 
 @admin.register(ReglaComision)
@@ -24,17 +30,21 @@ class ReglaComisionAdmin(admin.ModelAdmin):
 
 
 @admin.register(Venta)
-class VentaAdmin(admin.ModelAdmin):
+class VentaAdmin(ListadoGrandeMixin, admin.ModelAdmin):
     """Configuración del admin para Venta"""
     list_display = [
         'id', 'vendedor', 'fecha', 'monto',
         'comision_calculada', 'porcentaje_aplicado', 'fecha_registro'
     ]
-    list_filter = ['fecha', 'vendedor', 'fecha_registro']
+    list_select_related = ['vendedor']
+    # Solo filtros sobre columnas indexadas: fecha_registro no tiene índice propio
+    list_filter = ['fecha', ('vendedor', FiltroAutocompletar)]
     search_fields = ['vendedor__nombre', 'vendedor__apellido', 'descripcion']
+    autocomplete_fields = ['vendedor']
     readonly_fields = ['comision_calculada', 'porcentaje_aplicado', 'fecha_registro']
     ordering = ['-fecha', '-fecha_registro']
     date_hierarchy = 'fecha'
+    actions = ['recalcular_comisiones', 'simular_recalculo']
     
     fieldsets = (
         ('Información de la Venta', {
@@ -49,17 +59,47 @@ class VentaAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def get_search_results(self, request, queryset, search_term):
+        """Busca en el índice de texto de ventas en lugar de LIKE sobre cada campo"""
+        return busqueda.filtrar(queryset, search_term), False
+    
+    @admin.action(description='Recalcular comisiones con las reglas activas')
+    def recalcular_comisiones(self, request, queryset):
+        """Recalcula en SQL, por lotes, las comisiones de las ventas seleccionadas"""
+        actualizadas = recalculo.recalcular(queryset)
+        self.message_user(
+            request,
+            f'{actualizadas} ventas recalculadas',
+            messages.SUCCESS
+        )
+    
+    @admin.action(description='Simular recálculo de comisiones (no guarda)')
+    def simular_recalculo(self, request, queryset):
+        """Muestra la diferencia de comisiones por vendedor sin escribir nada"""
+        reporte = recalculo.simular(queryset)
+        if not reporte:
+            self.message_user(request, 'No hay ventas seleccionadas', messages.WARNING)
+        for fila in reporte:
+            self.message_user(
+                request,
+                f"{fila['vendedor_nombre']} {fila['vendedor_apellido']}: "
+                f"{fila['total_actual']} -> {fila['total_nuevo']} ({fila['diferencia']:+})",
+                messages.INFO
+            )
 
 
 @admin.register(ComisionCalculada)
-class ComisionCalculadaAdmin(admin.ModelAdmin):
+class ComisionCalculadaAdmin(ListadoGrandeMixin, admin.ModelAdmin):
     """Configuración del admin para ComisionCalculada"""
     list_display = [
         'id', 'vendedor', 'fecha_inicio', 'fecha_fin',
         'total_ventas', 'total_comision', 'numero_ventas', 'fecha_calculo'
     ]
-    list_filter = ['fecha_inicio', 'fecha_fin', 'fecha_calculo', 'vendedor']
+    list_select_related = ['vendedor']
+    list_filter = ['fecha_inicio', 'fecha_fin', 'fecha_calculo', ('vendedor', FiltroAutocompletar)]
     search_fields = ['vendedor__nombre', 'vendedor__apellido']
+    autocomplete_fields = ['vendedor']
     readonly_fields = ['fecha_calculo']
     ordering = ['-fecha_calculo']
     date_hierarchy = 'fecha_inicio'
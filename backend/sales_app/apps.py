@@ -5,3 +5,6 @@ class SalesAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sales_app'
     verbose_name = 'Gestión de Ventas'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
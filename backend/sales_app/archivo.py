@@ -0,0 +1,252 @@
+"""
+Archivo de ventas de periodos cerrados
+Las ventas de meses cerrados se mueven de la tabla caliente `ventas` a
+`ventas_archivadas`, manteniendo sus índices pequeños. El resumen diario y
+las comisiones calculadas de esos meses se conservan tal cual, por lo que
+estadísticas, series y comisiones no cambian. Las lecturas de ventas cuyo
+rango empieza en lo archivado usan la vista `ventas_historico` (UNION ALL de
+ambas tablas); las que empiezan después siguen leyendo solo la tabla
+caliente, y las que no tienen fecha de inicio leen primero la tabla caliente
+y pasan a la vista solo cuando se agota (ver VentasEscalonadas)
+"""
+
+from datetime import date
+from itertools import chain
+
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .cache_respuestas import invalidar_al_confirmar
+from .models import Venta, VentaArchivada, VentaHistorica
+
+def limite():
+    """
+    Última fecha con ventas archivadas (None si el archivo está vacío)
+    Se lee en cada uso, con una búsqueda en el índice de fecha, para que
+    todos los procesos vean el archivo en cuanto archivar_mes confirma
+    """
+    return VentaArchivada.objects.aggregate(hasta=Max('fecha'))['hasta']
+
+
+async def alimite():
+    """Versión asíncrona de limite()"""
+    return (await VentaArchivada.objects.aaggregate(hasta=Max('fecha')))['hasta']
+
+
+def _modelo(fecha_inicio, hasta):
+    """Tabla caliente si el rango empieza después de lo archivado"""
+    if hasta is None:
+        return Venta
+    if isinstance(fecha_inicio, str):
+        try:
+            fecha_inicio = date.fromisoformat(fecha_inicio)
+        except ValueError:
+            # El filtro rechazará la fecha igual que antes
+            return Venta
+    if fecha_inicio <= hasta:
+        return VentaHistorica
+    return Venta
+
+
+class VentasEscalonadas:
+    """
+    Ventas sin fecha de inicio cuando hay archivo, en el orden por defecto
+    En ese orden (-fecha, -fecha_registro) todas las ventas posteriores a lo
+    archivado van antes que las demás, así que se leen primero de la tabla
+    caliente y solo cuando se agota se sigue por la vista `ventas_historico`
+    desde la fecha límite. Admite lo que usan listados, paginadores y
+    exportación: filter, values, order_by, cortes, count e iteración, también
+    asíncronos. Un orden que no empiece por -fecha, o cualquier otra
+    operación, se resuelve sobre la vista completa
+    """
+
+    def __init__(self, recientes, anteriores, completo, corte=(0, None)):
+        self.recientes = recientes
+        self.anteriores = anteriores
+        self.completo = completo
+        self.corte = corte
+        self._filas = None
+
+    @classmethod
+    def desde_limite(cls, hasta):
+        return cls(
+            Venta.objects.filter(fecha__gt=hasta),
+            VentaHistorica.objects.filter(fecha__lte=hasta),
+            VentaHistorica.objects.all()
+        )
+
+    def _encadenar(self, metodo, *args, **kwargs):
+        if self.corte != (0, None):
+            raise TypeError('No se puede modificar la consulta después de cortarla')
+        return VentasEscalonadas(*(
+            getattr(queryset, metodo)(*args, **kwargs)
+            for queryset in (self.recientes, self.anteriores, self.completo)
+        ))
+
+    def all(self):
+        return self._encadenar('all')
+
+    def filter(self, *args, **kwargs):
+        return self._encadenar('filter', *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._encadenar('exclude', *args, **kwargs)
+
+    def select_related(self, *campos):
+        return self._encadenar('select_related', *campos)
+
+    def values(self, *campos, **expresiones):
+        return self._encadenar('values', *campos, **expresiones)
+
+    def values_list(self, *campos, **kwargs):
+        return self._encadenar('values_list', *campos, **kwargs)
+
+    def order_by(self, *campos):
+        if not campos or campos[0] != '-fecha':
+            return self.completo.order_by(*campos)
+        return self._encadenar('order_by', *campos)
+
+    def __getattr__(self, nombre):
+        if nombre in ('recientes', 'anteriores', 'completo', 'corte') or nombre.startswith('_'):
+            raise AttributeError(nombre)
+        return getattr(self.completo, nombre)
+
+    def __getitem__(self, indice):
+        if not isinstance(indice, slice):
+            filas = list(self[indice:indice + 1])
+            if not filas:
+                raise IndexError(indice)
+            return filas[0]
+        if indice.step is not None:
+            raise TypeError('No se admiten cortes con paso')
+
+        inicio, fin = self.corte
+        nuevo_inicio = inicio + (indice.start or 0)
+        nuevo_fin = fin
+        if indice.stop is not None:
+            nuevo_fin = inicio + indice.stop if fin is None else min(fin, inicio + indice.stop)
+        return VentasEscalonadas(
+            self.recientes, self.anteriores, self.completo,
+            corte=(nuevo_inicio, max(nuevo_inicio, nuevo_fin) if nuevo_fin is not None else None)
+        )
+
+    def _resto(self, leidas):
+        """Corte de la vista con las filas que faltan tras `leidas` recientes"""
+        inicio, fin = self.corte
+        return self.anteriores[max(0, inicio - leidas):None if fin is None else fin - max(inicio, leidas)]
+
+    def _evaluar(self):
+        if self._filas is None:
+            inicio, fin = self.corte
+            filas = list(self.recientes[inicio:fin])
+            if fin is None or len(filas) < fin - inicio:
+                # Tabla caliente agotada: el resto sale del archivo
+                if filas or not inicio:
+                    leidas = inicio + len(filas)
+                else:
+                    leidas = self.recientes.count()
+                filas += list(self._resto(leidas))
+            self._filas = filas
+        return self._filas
+
+    async def _aevaluar(self):
+        if self._filas is None:
+            inicio, fin = self.corte
+            filas = [fila async for fila in self.recientes[inicio:fin]]
+            if fin is None or len(filas) < fin - inicio:
+                if filas or not inicio:
+                    leidas = inicio + len(filas)
+                else:
+                    leidas = await self.recientes.acount()
+                filas += [fila async for fila in self._resto(leidas)]
+            self._filas = filas
+        return self._filas
+
+    def __iter__(self):
+        return iter(self._evaluar())
+
+    async def __aiter__(self):
+        for fila in await self._aevaluar():
+            yield fila
+
+    def __len__(self):
+        return len(self._evaluar())
+
+    def __bool__(self):
+        return bool(self._evaluar())
+
+    def iterator(self, chunk_size=None):
+        if self.corte != (0, None):
+            return iter(self._evaluar())
+        return chain(
+            self.recientes.iterator(chunk_size=chunk_size),
+            self.anteriores.iterator(chunk_size=chunk_size)
+        )
+
+    def count(self):
+        if self.corte != (0, None):
+            return len(self._evaluar())
+        return self.recientes.count() + self.anteriores.count()
+
+    async def acount(self):
+        if self.corte != (0, None):
+            return len(await self._aevaluar())
+        return await self.recientes.acount() + await self.anteriores.acount()
+
+
+def _ventas(fecha_inicio, hasta):
+    if hasta is not None and not fecha_inicio:
+        return VentasEscalonadas.desde_limite(hasta)
+    return _modelo(fecha_inicio, hasta).objects.all()
+
+
+def ventas(fecha_inicio=None):
+    """
+    Queryset de ventas de solo lectura para un rango que empieza en
+    fecha_inicio (fecha o texto YYYY-MM-DD; None si no tiene inicio)
+    """
+    return _ventas(fecha_inicio, limite())
+
+
+async def aventas(fecha_inicio=None):
+    """Versión asíncrona de ventas()"""
+    return _ventas(fecha_inicio, await alimite())
+
+
+def meses_archivables(antes_de):
+    """Meses con ventas en la tabla caliente anteriores a la fecha indicada"""
+    return list(Venta.objects.filter(fecha__lt=antes_de).dates('fecha', 'month'))
+
+
+def archivar_mes(mes):
+    """
+    Mueve al archivo las ventas del mes en una sola transacción
+    Se hace con INSERT ... SELECT y DELETE en SQL: sin cargar ventas en
+    memoria y sin las señales de borrado, ya que el resumen diario y las
+    comisiones calculadas del mes deben conservarse. Devuelve cuántas
+    ventas se movieron
+    """
+    siguiente = date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+    columnas = ', '.join(
+        connection.ops.quote_name(campo.column) for campo in Venta._meta.concrete_fields
+    )
+    tabla_ventas = connection.ops.quote_name(Venta._meta.db_table)
+    tabla_archivo = connection.ops.quote_name(VentaArchivada._meta.db_table)
+    fecha = connection.ops.quote_name('fecha')
+    condicion = f'{fecha} >= %s AND {fecha} < %s'
+    parametros = [
+        connection.ops.adapt_datefield_value(mes),
+        connection.ops.adapt_datefield_value(siguiente),
+    ]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {tabla_archivo} ({columnas}) '
+            f'SELECT {columnas} FROM {tabla_ventas} WHERE {condicion}',
+            parametros
+        )
+        cursor.execute(f'DELETE FROM {tabla_ventas} WHERE {condicion}', parametros)
+        movidas = cursor.rowcount
+
+        invalidar_al_confirmar()
+    return movidas
@@ -0,0 +1,133 @@
+"""
+Búsqueda de texto en las ventas
+Usa la tabla ventas_busqueda (FTS5 en SQLite, tsvector con índice GIN en
+PostgreSQL) que la migración 0009 crea y mantiene con triggers, por lo que
+siempre refleja la descripción y el nombre del vendedor de cada venta. Cada
+palabra buscada se trata como prefijo y deben aparecer todas; los
+resultados se ordenan por relevancia (bm25 / ts_rank). Solo cubre la tabla
+de ventas en curso, no el archivo. En otros motores se recurre a icontains
+"""
+
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Venta
+
+MAXIMO_TERMINOS = 10
+
+_PALABRA = re.compile(r'[^\W_]+')
+
+# Por motor: (expresión de búsqueda a partir de los términos, FROM + WHERE, orden)
+MOTORES = {
+    'sqlite': (
+        lambda terminos: ' '.join(f'"{termino}"*' for termino in terminos),
+        'FROM ventas_busqueda b JOIN ventas v ON v.id = b.rowid WHERE ventas_busqueda MATCH %s',
+        'b.rank, v.id DESC',
+    ),
+    'postgresql': (
+        lambda terminos: ' & '.join(f'{termino}:*' for termino in terminos),
+        "FROM ventas_busqueda b JOIN ventas v ON v.id = b.venta_id, "
+        "to_tsquery('simple', %s) q WHERE b.documento @@ q",
+        'ts_rank(b.documento, q) DESC, v.id DESC',
+    ),
+}
+
+
+def terminos(texto):
+    """Palabras del texto buscado, en minúsculas"""
+    return _PALABRA.findall(texto.lower())[:MAXIMO_TERMINOS]
+
+
+def _motor(alias):
+    return MOTORES.get(connections[alias].vendor)
+
+
+def _filtro_sin_indice(palabras):
+    """Equivalente con icontains para motores sin índice de texto"""
+    filtro = Q()
+    for palabra in palabras:
+        filtro &= (
+            Q(descripcion__icontains=palabra)
+            | Q(vendedor__nombre__icontains=palabra)
+            | Q(vendedor__apellido__icontains=palabra)
+        )
+    return filtro
+
+
+def filtrar(queryset, texto):
+    """
+    Restringe un queryset de ventas a las que coinciden con el texto, sin
+    ordenar por relevancia (para el admin y filtros combinables)
+    """
+    palabras = terminos(texto)
+    if not palabras:
+        return queryset
+    motor = _motor(queryset.db)
+    if motor is None:
+        return queryset.filter(_filtro_sin_indice(palabras))
+    expresion, origen, _ = motor
+    return queryset.filter(id__in=RawSQL(f'SELECT v.id {origen}', [expresion(palabras)]))
+
+
+class ResultadosBusqueda:
+    """
+    Ids de las ventas que coinciden, ordenados por relevancia
+    Tiene count() y admite cortes, así que sirve directamente a los
+    paginadores de Django y DRF: cada página es un LIMIT/OFFSET sobre el índice
+    """
+
+    def __init__(self, texto):
+        self.palabras = terminos(texto)
+        self.alias = router.db_for_read(Venta)
+        self._total = None
+
+    def count(self):
+        if self._total is None:
+            self._total = self._contar()
+        return self._total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, corte):
+        if not isinstance(corte, slice):
+            return self[corte:corte + 1][0]
+        inicio = corte.start or 0
+        fin = self.count() if corte.stop is None else corte.stop
+        return self._ids(inicio, max(fin - inicio, 0))
+
+    def _contar(self):
+        if not self.palabras:
+            return 0
+        motor = _motor(self.alias)
+        if motor is None:
+            return Venta.objects.using(self.alias).filter(_filtro_sin_indice(self.palabras)).count()
+        expresion, origen, _ = motor
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) {origen}', [expresion(self.palabras)])
+            return cursor.fetchone()[0]
+
+    def _ids(self, inicio, limite):
+        if not self.palabras or limite == 0:
+            return []
+        motor = _motor(self.alias)
+        if motor is None:
+            ids = (
+                Venta.objects.using(self.alias).filter(_filtro_sin_indice(self.palabras))
+                .order_by('-fecha', '-fecha_registro', '-id').values_list('id', flat=True)
+            )
+            return list(ids[inicio:inicio + limite])
+        expresion, origen, orden = motor
+        sql = f'SELECT v.id {origen} ORDER BY {orden} LIMIT %s OFFSET %s'
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(sql, [expresion(self.palabras), limite, inicio])
+            return [fila[0] for fila in cursor.fetchall()]
+
+
+def ordenar(filas, ids):
+    """Ordena las filas (dicts con 'id') según la lista de ids"""
+    posicion = {venta_id: indice for indice, venta_id in enumerate(ids)}
+    return sorted(filas, key=lambda fila: posicion[fila['id']])
@@ -0,0 +1,160 @@
+"""
+Caché versionada de respuestas de lectura
+Las respuestas se guardan en la caché de Django con una clave formada por la
+ruta, los parámetros y la versión de los datos. Cualquier escritura sobre
+ventas, vendedores, reglas o comisiones publica una nueva versión, por lo que
+las entradas anteriores dejan de usarse sin tener que borrarlas. La versión
+la ven todos los procesos (ver versiones.py).
+También emite ETag/Last-Modified: un sondeo sin cambios recibe 304 sin
+ejecutar la vista (sin caché compartida, con solo leer la versión).
+La versión se lee antes de ejecutar la vista. En una petición enviada a la
+réplica, la vista se ejecuta en ella solo si la réplica ya tiene esa versión
+en la tabla marcas_version, y con ella las escrituras que la publicaron; si
+va por detrás se ejecuta en la principal. Así lo que se guarda bajo una
+versión, y el ETag que la fija, nunca es anterior a ella
+"""
+
+import hashlib
+from contextlib import nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, urlencode
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import versiones
+from .replica import alias_lectura, lecturas_en_principal
+
+CLAVE_VERSION = 'ventaspro:datos:version'
+PREFIJO = 'ventaspro:respuesta'
+
+
+def version_datos():
+    """Versión vigente de los datos (nanosegundos de la última escritura)"""
+    return versiones.leer(CLAVE_VERSION)
+
+
+async def aversion_datos():
+    """Igual que version_datos, con las API asíncronas"""
+    return await versiones.aleer(CLAVE_VERSION)
+
+
+def invalidar_datos():
+    """Publica una nueva versión de los datos, visible para todos los procesos"""
+    versiones.publicar(CLAVE_VERSION)
+
+
+def invalidar_al_confirmar():
+    """Publica una nueva versión cuando la transacción actual se confirme"""
+    transaction.on_commit(invalidar_datos)
+
+
+def _lecturas_para(version):
+    """Contexto en el que calcular una respuesta que se guardará bajo la versión"""
+    alias = alias_lectura()
+    if alias not in (None, DEFAULT_DB_ALIAS) and not versiones.al_dia(alias, CLAVE_VERSION, version):
+        return lecturas_en_principal()
+    return nullcontext()
+
+
+async def _alecturas_para(version):
+    """Igual que _lecturas_para, con las API asíncronas del ORM"""
+    alias = alias_lectura()
+    if alias not in (None, DEFAULT_DB_ALIAS) and not await versiones.aal_dia(alias, CLAVE_VERSION, version):
+        return lecturas_en_principal()
+    return nullcontext()
+
+
+def _firma(request, version):
+    parametros = urlencode(sorted(request.GET.lists()), doseq=True)
+    texto = f'{request.path}?{parametros}#{version}'
+    return hashlib.md5(texto.encode('utf-8')).hexdigest()
+
+
+def _condiciones(request, version):
+    """Devuelve (firma, etag, última modificación) para una versión de los datos"""
+    firma = _firma(request, version)
+    return firma, f'"{firma}"', version // 1_000_000_000
+
+
+def _marcar(response, etag, ultima_modificacion):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(ultima_modificacion)
+    patch_cache_control(response, no_cache=True)
+
+
+def respuesta_cacheada(vista):
+    """
+    Decorador para acciones GET de un ViewSet
+    Responde 304 si el cliente ya tiene la versión vigente, o devuelve los
+    datos guardados en caché si otro cliente ya los pidió
+    """
+    @wraps(vista)
+    def envoltura(self, request, *args, **kwargs):
+        version = version_datos()
+        firma, etag, ultima_modificacion = _condiciones(request, version)
+
+        no_modificada = get_conditional_response(
+            request, etag=etag, last_modified=ultima_modificacion
+        )
+        if no_modificada is not None:
+            return no_modificada
+
+        clave = f'{PREFIJO}:{firma}'
+        datos = cache.get(clave)
+        if datos is None:
+            with _lecturas_para(version):
+                response = vista(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            cache.set(clave, response.data, settings.RESPUESTAS_CACHE_TIMEOUT)
+        else:
+            response = Response(datos)
+
+        _marcar(response, etag, ultima_modificacion)
+        return response
+
+    return envoltura
+
+
+def respuesta_cacheada_async(vista):
+    """
+    Equivalente de respuesta_cacheada para vistas `async def` de Django
+    Guarda el cuerpo ya renderizado de la respuesta
+    """
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        version = await aversion_datos()
+        firma, etag, ultima_modificacion = _condiciones(request, version)
+
+        no_modificada = get_conditional_response(
+            request, etag=etag, last_modified=ultima_modificacion
+        )
+        if no_modificada is not None:
+            return no_modificada
+
+        clave = f'{PREFIJO}:{firma}'
+        guardada = await cache.aget(clave)
+        if guardada is None:
+            with await _alecturas_para(version):
+                response = await vista(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            await cache.aset(
+                clave,
+                (response['Content-Type'], response.content),
+                settings.RESPUESTAS_CACHE_TIMEOUT
+            )
+        else:
+            tipo, contenido = guardada
+            response = HttpResponse(contenido, content_type=tipo)
+
+        _marcar(response, etag, ultima_modificacion)
+        return response
+
+    return envoltura
@@ -0,0 +1,67 @@
+"""
+Carga masiva de ventas
+Valida las filas en memoria, calcula la comisión con la tabla de reglas
+del motor de comisiones y escribe por lotes con bulk_create
+"""
+
+from django.db import transaction
+from rest_framework import serializers
+
+from . import comisiones
+from .cache_respuestas import invalidar_al_confirmar
+from .resumen_diario import Deltas
+from .models import Vendedor, Venta
+from .serializers import VentaCargaSerializer
+
+TAMANO_LOTE = 1000
+
+
+def validar_filas(filas):
+    """
+    Valida cada fila de la carga
+    Devuelve (datos_validos, errores) donde errores es una lista de
+    {'fila': indice, 'errores': {...}}
+    """
+    vendedores_ids = set(Vendedor.objects.values_list('id', flat=True))
+    serializer = VentaCargaSerializer(context={'vendedores_ids': vendedores_ids})
+
+    datos_validos = []
+    errores = []
+    for indice, fila in enumerate(filas):
+        try:
+            datos_validos.append(serializer.run_validation(fila))
+        except serializers.ValidationError as exc:
+            errores.append({'fila': indice, 'errores': exc.detail})
+
+    return datos_validos, errores
+
+
+def insertar_ventas(datos_validos, tamano_lote=TAMANO_LOTE):
+    """
+    Crea las ventas con la comisión calculada en memoria
+    Todas las escrituras, incluido el resumen diario, ocurren en una sola
+    transacción
+    """
+    tabla = comisiones.obtener_tabla()
+    deltas = Deltas()
+
+    creadas = 0
+    with transaction.atomic():
+        for inicio in range(0, len(datos_validos), tamano_lote):
+            lote = []
+            for datos in datos_validos[inicio:inicio + tamano_lote]:
+                venta = Venta(
+                    vendedor_id=datos['vendedor'],
+                    fecha=datos['fecha'],
+                    monto=datos['monto'],
+                    descripcion=datos.get('descripcion')
+                )
+                venta.calcular_comision(tabla)
+                deltas.sumar(venta.vendedor_id, venta.fecha, venta.monto, venta.comision_calculada)
+                lote.append(venta)
+            Venta.objects.bulk_create(lote)
+            creadas += len(lote)
+        deltas.aplicar()
+        invalidar_al_confirmar()
+
+    return creadas
@@ -0,0 +1,290 @@
+"""
+Motor de reglas de comisión
+Mantiene en memoria del proceso las reglas activas ordenadas por
+monto_minimo y resuelve el tramo de cada venta con búsqueda binaria.
+Una marca de versión compartida por todos los procesos (ver versiones.py)
+invalida la tabla en todos los workers cuando cambia alguna regla.
+También agrupa el cálculo de comisiones por período
+"""
+
+import threading
+from bisect import bisect_right
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Sum
+from django.utils import timezone
+
+from . import versiones
+from .cache_respuestas import invalidar_al_confirmar
+
+CLAVE_VERSION = 'ventaspro:reglas_comision:version'
+CENTAVOS = Decimal('0.01')
+CERO = Decimal('0.00')
+
+_lock = threading.Lock()
+_tabla = None
+
+
+class TablaReglas:
+    """Tabla compacta de reglas activas ordenada por monto mínimo"""
+    __slots__ = ('version', 'minimos', 'porcentajes')
+
+    def __init__(self, reglas, version=None):
+        reglas = sorted(reglas)
+        self.version = version
+        self.minimos = tuple(minimo for minimo, _ in reglas)
+        self.porcentajes = tuple(porcentaje for _, porcentaje in reglas)
+
+    def __len__(self):
+        return len(self.minimos)
+
+    def porcentaje_para(self, monto):
+        """Devuelve el porcentaje del tramo que corresponde al monto o None"""
+        indice = bisect_right(self.minimos, monto) - 1
+        if indice < 0:
+            return None
+        return self.porcentajes[indice]
+
+    def calcular(self, monto):
+        """Devuelve (porcentaje_aplicado, comision_calculada) para un monto"""
+        porcentaje = self.porcentaje_para(monto)
+        if porcentaje is None:
+            return CERO, CERO
+        comision = (monto * porcentaje / 100).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+        return porcentaje, comision
+
+
+def version_actual():
+    """Obtiene la versión vigente de las reglas, compartida por todos los procesos"""
+    return versiones.leer(CLAVE_VERSION)
+
+
+def cargar_tabla(version=None):
+    """Lee las reglas activas de la base de datos y construye la tabla"""
+    from .models import ReglaComision
+
+    reglas = ReglaComision.objects.filter(activa=True).values_list(
+        'monto_minimo', 'porcentaje'
+    )
+    return TablaReglas(reglas, version=version)
+
+
+def obtener_tabla():
+    """
+    Devuelve la tabla de reglas del proceso
+    Solo consulta la base de datos si la versión cambió desde la última carga
+    """
+    global _tabla
+
+    version = version_actual()
+    tabla = _tabla
+    if tabla is not None and tabla.version == version:
+        return tabla
+
+    with _lock:
+        if _tabla is None or _tabla.version != version:
+            _tabla = cargar_tabla(version)
+        return _tabla
+
+
+def invalidar():
+    """Publica una nueva versión para que todos los workers recarguen las reglas"""
+    global _tabla
+
+    versiones.publicar(CLAVE_VERSION)
+    with _lock:
+        _tabla = None
+
+
+def _sin_progreso(porcentaje):
+    pass
+
+
+def _vendedores_pendientes(guardadas, ventas, resumenes, eliminadas):
+    """
+    Vendedores cuya comisión del período hay que (re)calcular: los que tienen
+    ventas y ningún cálculo guardado, y aquellos con ventas modificadas o
+    eliminadas después de su fecha_calculo
+    """
+    con_ventas = set(resumenes.values_list('vendedor', flat=True).distinct().order_by())
+    pendientes = con_ventas - guardadas.keys()
+    if not guardadas:
+        return pendientes
+
+    desde = min(comision.fecha_calculo for comision in guardadas.values())
+    cambios = [
+        (fila['vendedor'], fila['ultimo'])
+        for fila in ventas.filter(fecha_modificacion__gt=desde)
+        .values('vendedor').annotate(ultimo=Max('fecha_modificacion')).order_by()
+    ]
+    cambios += [
+        (fila['vendedor_id'], fila['ultimo'])
+        for fila in eliminadas.filter(fecha_eliminacion__gt=desde)
+        .values('vendedor_id').annotate(ultimo=Max('fecha_eliminacion')).order_by()
+    ]
+    for vendedor_id, ultimo in cambios:
+        comision = guardadas.get(vendedor_id)
+        if comision is None or ultimo > comision.fecha_calculo:
+            pendientes.add(vendedor_id)
+    return pendientes
+
+
+def calcular_periodo(fecha_inicio, fecha_fin, progreso=None, detalle=True):
+    """
+    Calcula y guarda las comisiones de cada vendedor en un período
+    El cálculo se guarda una sola vez por (vendedor, fecha_inicio, fecha_fin)
+    y solo se rehace para los vendedores con cambios desde su fecha_calculo;
+    los demás se toman de lo ya guardado. Usa un número constante de
+    consultas sin importar cuántos vendedores haya.
+    Con detalle=False no se leen las ventas ni se incluye ventas_detalle
+    (solo totales). `progreso` es una función opcional que recibe el
+    porcentaje de avance
+    """
+    if progreso is None:
+        progreso = _sin_progreso
+
+    from . import archivo, listados
+    from .models import ComisionCalculada, ResumenDiarioVenta, VentaEliminada
+
+    # Marca de agua tomada antes de leer y con margen: fecha_modificacion se
+    # fija al guardar, no al confirmar, así que una transacción abierta ahora
+    # puede confirmar después con una fecha anterior. Con el margen esa venta
+    # sigue siendo posterior a fecha_calculo y se recalculará la próxima vez
+    marca = timezone.now() - timedelta(seconds=settings.COMISIONES_MARGEN_MARCA)
+
+    rango = {'fecha__gte': fecha_inicio, 'fecha__lte': fecha_fin}
+    # Incluye las archivadas: un recálculo también puede modificarlas
+    ventas = archivo.ventas(fecha_inicio).filter(**rango)
+    resumenes = ResumenDiarioVenta.objects.filter(**rango)
+    periodo = ComisionCalculada.objects.filter(fecha_inicio=fecha_inicio, fecha_fin=fecha_fin)
+
+    guardadas = {
+        comision.vendedor_id: comision
+        for comision in periodo.select_related('vendedor')
+    }
+    pendientes = _vendedores_pendientes(
+        guardadas, ventas, resumenes, VentaEliminada.objects.filter(**rango)
+    )
+
+    # Los totales de los vendedores pendientes salen del resumen diario
+    totales = {}
+    if pendientes:
+        totales = {
+            fila['vendedor']: fila
+            for fila in resumenes.values('vendedor', 'vendedor__nombre', 'vendedor__apellido')
+            .annotate(
+                total_ventas=Sum('total_ventas'),
+                total_comision=Sum('total_comision'),
+                numero_ventas=Sum('numero_ventas')
+            )
+            .order_by()
+            if fila['vendedor'] in pendientes
+        }
+
+    filas = [
+        {
+            'vendedor': comision.vendedor_id,
+            'vendedor__nombre': comision.vendedor.nombre,
+            'vendedor__apellido': comision.vendedor.apellido,
+            'total_ventas': comision.total_ventas,
+            'total_comision': comision.total_comision,
+            'numero_ventas': comision.numero_ventas,
+        }
+        for vendedor_id, comision in guardadas.items()
+        if vendedor_id not in pendientes
+    ] + list(totales.values())
+    filas.sort(key=lambda fila: (fila['vendedor__apellido'], fila['vendedor__nombre'], fila['vendedor']))
+    progreso(10)
+
+    # Detalle de ventas agrupado por vendedor, en el orden por defecto
+    # (incluye las archivadas si el período las alcanza)
+    ventas_por_vendedor = {}
+    if detalle:
+        filas_ventas = listados.valores_ventas(archivo.ventas(fecha_inicio).filter(**rango))
+        for venta in listados.formatear_ventas(filas_ventas):
+            ventas_por_vendedor.setdefault(venta['vendedor'], []).append(venta)
+    progreso(60)
+
+    vendedores_data = []
+    for indice, fila in enumerate(filas, start=1):
+        total_ventas = fila['total_ventas'] or CERO
+        total_comision = fila['total_comision'] or CERO
+        numero_ventas = fila['numero_ventas']
+
+        promedio_venta = total_ventas / numero_ventas if numero_ventas > 0 else CERO
+        promedio_comision = total_comision / numero_ventas if numero_ventas > 0 else CERO
+
+        datos = {
+            'vendedor_id': fila['vendedor'],
+            'vendedor_nombre': fila['vendedor__nombre'],
+            'vendedor_apellido': fila['vendedor__apellido'],
+            'total_ventas': total_ventas,
+            'total_comision': total_comision,
+            'numero_ventas': numero_ventas,
+            'promedio_venta': promedio_venta,
+            'promedio_comision': promedio_comision,
+        }
+        if detalle:
+            datos['ventas_detalle'] = ventas_por_vendedor.get(fila['vendedor'], [])
+        vendedores_data.append(datos)
+        progreso(60 + 35 * indice // len(filas))
+
+    if pendientes:
+        _guardar(periodo, fecha_inicio, fecha_fin, pendientes, totales, marca)
+    _podar_eliminadas(marca)
+    progreso(100)
+
+    return vendedores_data
+
+
+def _guardar(periodo, fecha_inicio, fecha_fin, pendientes, totales, marca):
+    """
+    Inserta o actualiza (upsert) el cálculo de los vendedores pendientes y
+    elimina el de los que se quedaron sin ventas en el período
+    """
+    from .models import ComisionCalculada
+
+    sin_ventas = [vendedor_id for vendedor_id in pendientes if vendedor_id not in totales]
+    with transaction.atomic():
+        if sin_ventas:
+            periodo.filter(vendedor_id__in=sin_ventas).delete()
+        ComisionCalculada.objects.bulk_create(
+            [
+                ComisionCalculada(
+                    vendedor_id=vendedor_id,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin,
+                    total_ventas=fila['total_ventas'] or CERO,
+                    total_comision=fila['total_comision'] or CERO,
+                    numero_ventas=fila['numero_ventas'],
+                    fecha_calculo=marca
+                )
+                for vendedor_id, fila in totales.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['vendedor', 'fecha_inicio', 'fecha_fin'],
+            update_fields=['total_ventas', 'total_comision', 'numero_ventas', 'fecha_calculo']
+        )
+        invalidar_al_confirmar()
+
+
+def _podar_eliminadas(marca):
+    """
+    Borra los registros de ventas eliminadas que ya ningún cálculo necesita:
+    los anteriores a la marca menos un margen más (por si otro cálculo
+    empezó poco antes que este) y sin ningún cálculo guardado de su
+    vendedor y fecha con fecha_calculo anterior a la baja
+    """
+    from .models import ComisionCalculada, VentaEliminada
+
+    corte = marca - timedelta(seconds=settings.COMISIONES_MARGEN_MARCA)
+    desactualizados = ComisionCalculada.objects.filter(
+        vendedor_id=OuterRef('vendedor_id'),
+        fecha_inicio__lte=OuterRef('fecha'),
+        fecha_fin__gte=OuterRef('fecha'),
+        fecha_calculo__lt=OuterRef('fecha_eliminacion')
+    )
+    VentaEliminada.objects.filter(fecha_eliminacion__lt=corte).exclude(Exists(desactualizados)).delete()
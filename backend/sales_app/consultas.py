@@ -0,0 +1,72 @@
+"""
+Filtros y agregados de lectura compartidos por las vistas síncronas
+(views.py) y asíncronas (views_async.py)
+"""
+
+from decimal import Decimal
+
+from django.db.models import Sum
+
+
+def filtrar_ventas(queryset, parametros):
+    """
+    Aplica los filtros vendedor, fecha_inicio y fecha_fin a un queryset con
+    campos vendedor y fecha (ventas o resumen diario)
+    """
+    # Filtro por vendedor
+    vendedor_id = parametros.get('vendedor')
+    if vendedor_id:
+        queryset = queryset.filter(vendedor_id=vendedor_id)
+
+    # Filtro por rango de fechas
+    fecha_inicio = parametros.get('fecha_inicio')
+    fecha_fin = parametros.get('fecha_fin')
+
+    if fecha_inicio:
+        queryset = queryset.filter(fecha__gte=fecha_inicio)
+    if fecha_fin:
+        queryset = queryset.filter(fecha__lte=fecha_fin)
+
+    return queryset
+
+
+def filtrar_comisiones(queryset, parametros):
+    """Aplica los filtros fecha_inicio y fecha_fin a comisiones calculadas"""
+    fecha_inicio = parametros.get('fecha_inicio')
+    fecha_fin = parametros.get('fecha_fin')
+
+    if fecha_inicio:
+        queryset = queryset.filter(fecha_inicio__gte=fecha_inicio)
+    if fecha_fin:
+        queryset = queryset.filter(fecha_fin__lte=fecha_fin)
+
+    return queryset
+
+
+def agregados_estadisticas():
+    """Agregados de estadísticas sobre el resumen diario"""
+    return {
+        'total_ventas': Sum('total_ventas'),
+        'total_comisiones': Sum('total_comision'),
+        'numero_ventas': Sum('numero_ventas'),
+    }
+
+
+def formatear_estadisticas(stats):
+    """Añade los promedios y convierte los valores para JSON"""
+    numero_ventas = stats['numero_ventas'] or 0
+    stats['promedio_venta'] = (
+        stats['total_ventas'] / numero_ventas if numero_ventas else None
+    )
+    stats['promedio_comision'] = (
+        stats['total_comisiones'] / numero_ventas if numero_ventas else None
+    )
+
+    # Convertir Decimal a float para JSON
+    for key, value in stats.items():
+        if value is not None:
+            stats[key] = float(value) if isinstance(value, Decimal) else value
+        else:
+            stats[key] = 0
+
+    return stats
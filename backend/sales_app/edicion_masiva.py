@@ -0,0 +1,175 @@
+"""
+Modificación y eliminación masiva de ventas y vendedores
+Cada operación resuelve y bloquea primero los ids de la selección y luego
+aplica un UPDATE o DELETE por lote de ids, en una sola transacción, sin pasar
+por Venta.save() ni por las señales fila a fila. Lo que esas señales
+mantienen (resumen diario, registro de ventas eliminadas, invalidación de
+caché) se calcula sobre esos mismos ids y se actualiza aquí en bloque
+"""
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from . import comisiones
+from .cache_respuestas import invalidar_al_confirmar
+from .models import Venta, VentaEliminada
+from .resumen_diario import Deltas
+
+TAMANO_LOTE = 1000
+
+
+def _ids_bloqueados(ventas):
+    """
+    Ids de la selección, bloqueados hasta el final de la transacción
+    Lo que se descuenta del resumen diario y lo que se modifica o borra son
+    así las mismas filas, aunque otra transacción inserte o cambie ventas
+    que cumplan el filtro
+    """
+    return list(ventas.select_for_update().order_by().values_list('id', flat=True))
+
+
+def _lotes(ids):
+    """Querysets de ventas por lotes de TAMANO_LOTE ids"""
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        lote = ids[inicio:inicio + TAMANO_LOTE]
+        yield lote, Venta.objects.filter(pk__in=lote)
+
+
+def _borrar(ids):
+    """DELETE directo por id, sin cargar las ventas ni enviar post_delete por cada una"""
+    tabla = connection.ops.quote_name(Venta._meta.db_table)
+    columna = connection.ops.quote_name(Venta._meta.pk.column)
+    marcadores = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {tabla} WHERE {columna} IN ({marcadores})', ids)
+        return cursor.rowcount
+
+
+def _grupos(ventas):
+    """Totales de la selección por (vendedor, fecha)"""
+    return ventas.order_by().values('vendedor_id', 'fecha').annotate(
+        suma_monto=Sum('monto'),
+        suma_comision=Sum('comision_calculada'),
+        cantidad=Count('id')
+    )
+
+
+def _registrar_bajas(ventas):
+    """Registra que las ventas dejan su (vendedor, fecha) actual"""
+    ahora = timezone.now()
+    VentaEliminada.objects.bulk_create(
+        (
+            VentaEliminada(venta_id=venta_id, vendedor_id=vendedor_id, fecha=fecha, fecha_eliminacion=ahora)
+            for venta_id, vendedor_id, fecha in ventas.values_list('id', 'vendedor_id', 'fecha')
+            .order_by().iterator(chunk_size=TAMANO_LOTE)
+        ),
+        batch_size=TAMANO_LOTE
+    )
+
+
+def actualizar_ventas(ventas, cambios):
+    """
+    Aplica los mismos cambios (vendedor, fecha, monto, descripcion) a todas
+    las ventas del queryset. Si cambia el monto, la comisión se calcula una
+    vez con la tabla de reglas y se asigna a todas. El resumen diario se
+    ajusta a partir de los totales por (vendedor, fecha) de la selección.
+    Devuelve el número de ventas actualizadas
+    """
+    cambios = dict(cambios)
+    if 'vendedor' in cambios:
+        cambios['vendedor_id'] = cambios.pop('vendedor').pk
+    if 'monto' in cambios:
+        cambios['porcentaje_aplicado'], cambios['comision_calculada'] = (
+            comisiones.obtener_tabla().calcular(cambios['monto'])
+        )
+
+    with transaction.atomic():
+        deltas = Deltas()
+        actualizadas = 0
+        ahora = timezone.now()
+        for _, lote in _lotes(_ids_bloqueados(ventas)):
+            for grupo in _grupos(lote):
+                cantidad = grupo['cantidad']
+                deltas.restar(
+                    grupo['vendedor_id'], grupo['fecha'],
+                    grupo['suma_monto'], grupo['suma_comision'], cantidad
+                )
+                if 'monto' in cambios:
+                    suma_monto = cambios['monto'] * cantidad
+                    suma_comision = cambios['comision_calculada'] * cantidad
+                else:
+                    suma_monto, suma_comision = grupo['suma_monto'], grupo['suma_comision']
+                deltas.sumar(
+                    cambios.get('vendedor_id', grupo['vendedor_id']),
+                    cambios.get('fecha', grupo['fecha']),
+                    suma_monto, suma_comision, cantidad
+                )
+
+            # Las comisiones calculadas del (vendedor, fecha) de origen quedan desactualizadas
+            if 'vendedor_id' in cambios or 'fecha' in cambios:
+                _registrar_bajas(lote)
+
+            actualizadas += lote.update(**cambios, fecha_modificacion=ahora)
+        deltas.aplicar()
+        invalidar_al_confirmar()
+
+    return actualizadas
+
+
+def eliminar_ventas(ventas):
+    """
+    Elimina las ventas del queryset con un DELETE por lote de ids
+    Devuelve el número de ventas eliminadas
+    """
+    with transaction.atomic():
+        deltas = Deltas()
+        eliminadas = 0
+        for ids, lote in _lotes(_ids_bloqueados(ventas)):
+            for grupo in _grupos(lote):
+                deltas.restar(
+                    grupo['vendedor_id'], grupo['fecha'],
+                    grupo['suma_monto'], grupo['suma_comision'], grupo['cantidad']
+                )
+            _registrar_bajas(lote)
+            eliminadas += _borrar(ids)
+        deltas.aplicar()
+        invalidar_al_confirmar()
+
+    return eliminadas
+
+
+def actualizar_vendedores(vendedores, cambios):
+    """Aplica los mismos cambios a todos los vendedores del queryset"""
+    with transaction.atomic():
+        actualizados = vendedores.update(**cambios)
+        invalidar_al_confirmar()
+    return actualizados
+
+
+def borrar_ventas_de(vendedores):
+    """
+    Borra las ventas de los vendedores con un DELETE directo por lote de ids,
+    antes de eliminarlos: en cascada el ORM cargaría cada venta y enviaría
+    sus señales. No hace falta ajustar el resumen diario ni registrar las
+    bajas, que se van con el vendedor junto con sus comisiones calculadas.
+    Devuelve el número de ventas borradas
+    """
+    with transaction.atomic():
+        ventas = Venta.objects.filter(vendedor__in=vendedores.order_by().values('id'))
+        return sum(_borrar(ids) for ids, _ in _lotes(_ids_bloqueados(ventas)))
+
+
+def eliminar_vendedores(vendedores):
+    """
+    Elimina los vendedores del queryset junto con sus ventas (ver
+    borrar_ventas_de); el resumen diario y las comisiones calculadas de esos
+    vendedores se eliminan en cascada. Devuelve (vendedores eliminados,
+    ventas eliminadas)
+    """
+    with transaction.atomic():
+        ventas_eliminadas = borrar_ventas_de(vendedores)
+        _, por_modelo = vendedores.delete()
+        invalidar_al_confirmar()
+
+    return por_modelo.get(vendedores.model._meta.label, 0), ventas_eliminadas
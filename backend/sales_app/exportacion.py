@@ -0,0 +1,71 @@
+"""
+Exportación de ventas en streaming (CSV o NDJSON)
+Las filas se leen con QuerySet.iterator() por bloques, por lo que la memoria
+se mantiene constante sin importar el tamaño del rango exportado
+"""
+
+import csv
+import json
+
+from django.utils import timezone
+
+TAMANO_BLOQUE = 2000
+
+COLUMNAS = [
+    ('id', 'id'),
+    ('vendedor', 'vendedor_id'),
+    ('vendedor_nombre', 'vendedor__nombre'),
+    ('vendedor_apellido', 'vendedor__apellido'),
+    ('fecha', 'fecha'),
+    ('monto', 'monto'),
+    ('descripcion', 'descripcion'),
+    ('comision_calculada', 'comision_calculada'),
+    ('porcentaje_aplicado', 'porcentaje_aplicado'),
+    ('fecha_registro', 'fecha_registro'),
+]
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class _Eco:
+    """Buffer que devuelve lo escrito, para usar csv.writer en streaming"""
+
+    def write(self, valor):
+        return valor
+
+
+def _filas(queryset):
+    """Itera las ventas como tuplas de valores listos para exportar"""
+    campos = [campo for _, campo in COLUMNAS]
+    for fila in queryset.values_list(*campos).iterator(chunk_size=TAMANO_BLOQUE):
+        fila = list(fila)
+        fila[4] = fila[4].isoformat()
+        fila[5] = str(fila[5])
+        fila[7] = str(fila[7])
+        fila[8] = str(fila[8])
+        fila[9] = timezone.localtime(fila[9]).isoformat()
+        yield fila
+
+
+def exportar_csv(queryset):
+    """Genera el CSV línea por línea, empezando por la cabecera"""
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow([nombre for nombre, _ in COLUMNAS])
+    for fila in _filas(queryset):
+        yield escritor.writerow(fila)
+
+
+def exportar_ndjson(queryset):
+    """Genera un objeto JSON por línea"""
+    nombres = [nombre for nombre, _ in COLUMNAS]
+    for fila in _filas(queryset):
+        yield json.dumps(dict(zip(nombres, fila)), ensure_ascii=False) + '\n'
+
+
+GENERADORES = {
+    'csv': exportar_csv,
+    'ndjson': exportar_ndjson,
+}
@@ -0,0 +1,91 @@
+"""
+Ruta rápida para listar ventas
+Las filas se leen con values(), con el nombre completo del vendedor
+concatenado en SQL, y se formatean con los mismos campos de VentaSerializer
+sin instanciar modelos ni recorrer relaciones por fila. El resultado es
+idéntico a VentaSerializer(ventas, many=True).data
+"""
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .serializers import VentaSerializer
+
+CAMPOS = VentaSerializer.Meta.fields
+
+# Campos cuyo valor de base de datos necesita la conversión del serializer
+CONVERTIDOS = ('fecha', 'monto', 'comision_calculada', 'porcentaje_aplicado', 'fecha_registro')
+
+
+def valores_ventas(queryset):
+    """Queryset de dicts con las columnas de VentaSerializer"""
+    return queryset.values(
+        'id', 'vendedor', 'fecha', 'monto', 'descripcion',
+        'comision_calculada', 'porcentaje_aplicado', 'fecha_registro',
+        vendedor_nombre=F('vendedor__nombre'),
+        vendedor_apellido=F('vendedor__apellido'),
+        vendedor_completo=Concat(
+            'vendedor__nombre', Value(' '), 'vendedor__apellido',
+            output_field=CharField()
+        )
+    )
+
+
+def _convertidor(campo):
+    """
+    Función equivalente a campo.to_representation para los casos habituales
+    (ISO 8601, decimales como texto) sin su coste por fila; en cualquier
+    otra configuración usa el propio campo
+    """
+    if isinstance(campo, serializers.DateTimeField):
+        formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+        if formato is None or formato.lower() != ISO_8601 or hasattr(campo, 'timezone'):
+            return campo.to_representation
+        zona = timezone.get_current_timezone() if settings.USE_TZ else None
+
+        def fecha_hora(valor):
+            if zona is not None and timezone.is_aware(valor):
+                valor = valor.astimezone(zona)
+            texto = valor.isoformat()
+            if texto.endswith('+00:00'):
+                texto = texto[:-6] + 'Z'
+            return texto
+        return fecha_hora
+
+    if isinstance(campo, serializers.DateField):
+        formato = getattr(campo, 'format', api_settings.DATE_FORMAT)
+        if formato is None or formato.lower() != ISO_8601:
+            return campo.to_representation
+        return lambda valor: valor.isoformat()
+
+    if isinstance(campo, serializers.DecimalField):
+        coerce_to_string = getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if not coerce_to_string or campo.localize or campo.decimal_places is None:
+            return campo.to_representation
+        exponente = Decimal(1).scaleb(-campo.decimal_places)
+        return lambda valor: '{:f}'.format(valor.quantize(exponente))
+
+    return campo.to_representation
+
+
+def formatear_ventas(filas):
+    """Convierte filas de valores_ventas al formato de VentaSerializer"""
+    campos = VentaSerializer().fields
+    convertir = {nombre: _convertidor(campos[nombre]) for nombre in CONVERTIDOS}
+
+    resultado = []
+    for fila in filas:
+        datos = {}
+        for nombre in CAMPOS:
+            valor = fila[nombre]
+            if valor is not None and nombre in convertir:
+                valor = convertir[nombre](valor)
+            datos[nombre] = valor
+        resultado.append(datos)
+    return resultado
@@ -0,0 +1,123 @@
+"""
+Piezas del admin para listados de tablas grandes (ventas, comisiones)
+- PaginadorEstimado: sin filtros toma el número de filas de las
+  estadísticas del motor en lugar de un COUNT(*) sobre toda la tabla
+- FiltroAutocompletar: filtro por una relación con el buscador del admin
+  en lugar de una lista con todas las opciones
+- ListadoGrandeMixin: reúne lo anterior y desactiva las facetas y el
+  segundo conteo sin filtros
+La jerarquía de fechas indexada está en templatetags/fechas_admin.py
+"""
+
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import OperationalError, connections
+from django.utils.functional import cached_property
+
+# Por debajo de este número de filas estimadas se cuenta de forma exacta
+UMBRAL_ESTIMACION = 100000
+
+
+def estimar_filas(modelo, alias):
+    """
+    Número aproximado de filas de la tabla del modelo según las estadísticas
+    del motor (pg_class en PostgreSQL, sqlite_stat1 tras ANALYZE en SQLite).
+    Devuelve None si no hay estadísticas
+    """
+    conexion = connections[alias]
+    tabla = modelo._meta.db_table
+    with conexion.cursor() as cursor:
+        if conexion.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [tabla])
+            fila = cursor.fetchone()
+            return fila[0] if fila and fila[0] >= 0 else None
+        if conexion.vendor == 'sqlite':
+            try:
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [tabla])
+            except OperationalError:
+                # La tabla sqlite_stat1 no existe hasta el primer ANALYZE
+                return None
+            fila = cursor.fetchone()
+            return int(fila[0].split()[0]) if fila else None
+    return None
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador del admin que, cuando el listado no tiene filtros, usa el
+    número de filas estimado si supera UMBRAL_ESTIMACION. Con filtros (que
+    usan índices) cuenta de forma exacta
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimado = estimar_filas(queryset.model, queryset.db)
+            if estimado is not None and estimado > UMBRAL_ESTIMACION:
+                return estimado
+        return super().count
+
+
+class FiltroAutocompletar(admin.FieldListFilter):
+    """
+    Filtro por una clave foránea con el autocompletar del admin: solo se
+    consulta la opción elegida y el resto se busca a medida que se escribe.
+    El admin del modelo relacionado debe tener search_fields
+    """
+    template = 'admin/sales_app/filtro_autocompletar.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        # Al borrar la selección el formulario envía el parámetro vacío
+        if params.get(self.lookup_kwarg) in ([''], ''):
+            params.pop(self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+
+        valor = self.used_parameters.get(self.lookup_kwarg)
+        campo = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(
+                field, model_admin.admin_site, attrs={'onchange': 'this.form.submit()'}
+            )
+        )
+        formulario = forms.Form(initial={self.lookup_kwarg: valor[-1] if valor else None})
+        formulario.fields[self.lookup_kwarg] = campo
+        self.campo = formulario[self.lookup_kwarg]
+        self.parametros_ocultos = [
+            (nombre, valor)
+            for nombre, valores in request.GET.lists()
+            if nombre not in (self.lookup_kwarg, 'p')
+            for valor in valores
+        ]
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def get_facet_counts(self, pk_attname, filtered_qs):
+        return {}
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.lookup_kwarg not in self.used_parameters,
+            'query_string': changelist.get_query_string(remove=[self.lookup_kwarg]),
+            'display': 'Todos',
+        }
+
+
+class ListadoGrandeMixin:
+    """
+    Configuración común de los admin de tablas grandes: conteo estimado,
+    sin el segundo COUNT(*) del total ni facetas, y los archivos del
+    autocompletar para FiltroAutocompletar
+    """
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    @property
+    def media(self):
+        return super().media + AutocompleteSelect(None, self.admin_site).media
@@ -0,0 +1,67 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales_app import archivo
+from sales_app.management.utils import fecha_argumento
+
+MESES_CALIENTES = 24
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve las ventas de meses cerrados a la tabla de archivo, un mes por '
+        'transacción. El resumen diario y las comisiones calculadas se conservan'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses',
+            type=int,
+            default=MESES_CALIENTES,
+            help=f'Meses recientes que se mantienen en la tabla de ventas, '
+                 f'incluido el actual (por defecto {MESES_CALIENTES})'
+        )
+        parser.add_argument(
+            '--antes-de',
+            type=fecha_argumento,
+            help='Archiva los meses anteriores al de esta fecha (YYYY-MM-DD); ignora --meses'
+        )
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='No mueve nada; muestra los meses que se archivarían'
+        )
+
+    def handle(self, *args, **options):
+        if options['antes_de']:
+            corte = options['antes_de'].replace(day=1)
+        else:
+            if options['meses'] < 1:
+                raise CommandError('Se debe mantener al menos el mes actual')
+            hoy = date.today()
+            meses = hoy.year * 12 + hoy.month - options['meses']
+            corte = date(meses // 12, meses % 12 + 1, 1)
+
+        meses = archivo.meses_archivables(corte)
+        if not meses:
+            self.stdout.write(f'No hay ventas anteriores a {corte} por archivar')
+            return
+
+        if options['simular']:
+            for mes in meses:
+                self.stdout.write(f'Se archivaría {mes:%Y-%m}')
+            return
+
+        inicio = time.monotonic()
+        total = 0
+        for mes in meses:
+            movidas = archivo.archivar_mes(mes)
+            total += movidas
+            self.stdout.write(f'{mes:%Y-%m}: {movidas} ventas archivadas')
+
+        segundos = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} ventas anteriores a {corte} archivadas en {segundos:.1f} s'
+        ))
@@ -0,0 +1,345 @@
+import asyncio
+import json
+import platform
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+
+import django
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import AsyncClient, Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment,
+    teardown_test_environment
+)
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from sales_app import comisiones, listados, resumen_diario
+from sales_app.models import Vendedor, ReglaComision, Venta
+from sales_app.renderers import JSONRapidoRenderer
+from sales_app.serializers import VentaSerializer
+
+# Escalera de reglas típica
+REGLAS = [
+    ('Comisión Básica', Decimal('0.00'), Decimal('3.00')),
+    ('Comisión Intermedia', Decimal('500.00'), Decimal('5.00')),
+    ('Comisión Premium', Decimal('1000.00'), Decimal('7.50')),
+    ('Comisión VIP', Decimal('2000.00'), Decimal('10.00')),
+]
+
+TAMANO_LOTE = 2000
+
+# Endpoints de lectura con versión asíncrona en /api/async/
+LECTURAS = [
+    ('ventas-list', 'ventas/'),
+    ('ventas-estadisticas', 'ventas/estadisticas/'),
+    ('vendedores-activos', 'vendedores/activos/'),
+    ('comisiones-resumen', 'comisiones/resumen/'),
+]
+
+# Las escrituras y los resultados se miden sin la caché de respuestas
+SIN_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra un conjunto de datos sintético en una base de datos '
+        'desechable y mide tiempo y número de consultas de los endpoints '
+        'principales'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendedores', type=int, default=50)
+        parser.add_argument('--ventas', type=int, default=20000)
+        parser.add_argument('--anios', type=int, default=2)
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument(
+            '--concurrencia',
+            type=int,
+            default=20,
+            help='Peticiones simultáneas al comparar las vistas síncronas y '
+                 'asíncronas (0 para omitir la comparación)'
+        )
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument(
+            '--comparar',
+            help='JSON de una ejecución anterior; falla si algún endpoint empeora'
+        )
+        parser.add_argument(
+            '--tolerancia',
+            type=float,
+            default=0.25,
+            help='Aumento relativo de la mediana permitido al comparar (por defecto 0.25)'
+        )
+
+    def handle(self, *args, **options):
+        base = None
+        if options['comparar']:
+            with open(options['comparar'], encoding='utf-8') as archivo:
+                base = json.load(archivo)
+
+        setup_test_environment()
+        nombre_original = connection.creation.create_test_db(verbosity=0)
+        try:
+            with override_settings(CACHES=SIN_CACHE):
+                comisiones.invalidar()
+                inicio = time.monotonic()
+                ultimo_dia = self.sembrar(options)
+                self.stdout.write(
+                    f"Datos generados en {time.monotonic() - inicio:.1f} s: "
+                    f"{options['vendedores']} vendedores, {options['ventas']} ventas"
+                )
+                self.verificar_listado_rapido()
+                resultados = self.medir(ultimo_dia, options['repeticiones'])
+                concurrencia = {}
+                if options['concurrencia'] > 0:
+                    concurrencia = self.medir_concurrencia(
+                        options['repeticiones'], options['concurrencia']
+                    )
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        informe = {
+            'metadatos': {
+                'fecha': timezone.now().isoformat(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'base_de_datos': connection.vendor,
+                'vendedores': options['vendedores'],
+                'ventas': options['ventas'],
+                'anios': options['anios'],
+                'repeticiones': options['repeticiones'],
+                'semilla': options['semilla'],
+                'concurrencia': options['concurrencia'],
+            },
+            'resultados': resultados,
+            'concurrencia': concurrencia,
+        }
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(informe, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultados guardados en {options['salida']}")
+
+        if base is not None:
+            self.comparar(base, resultados, options['tolerancia'])
+
+    def sembrar(self, options):
+        """Genera vendedores, reglas y ventas; devuelve el último día con ventas"""
+        aleatorio = random.Random(options['semilla'])
+
+        for nombre, monto_minimo, porcentaje in REGLAS:
+            ReglaComision.objects.create(nombre=nombre, monto_minimo=monto_minimo, porcentaje=porcentaje)
+
+        Vendedor.objects.bulk_create([
+            Vendedor(nombre=f'Vendedor{i}', apellido=f'Apellido{i}', email=f'vendedor{i}@ventaspro.com')
+            for i in range(options['vendedores'])
+        ])
+        vendedores_ids = list(Vendedor.objects.values_list('id', flat=True))
+
+        ultimo_dia = date.today()
+        dias = 365 * options['anios']
+        tabla = comisiones.cargar_tabla()
+
+        lote = []
+        for _ in range(options['ventas']):
+            # Montos con cola larga: la mayoría pequeños, algunos grandes
+            monto = Decimal(min(aleatorio.lognormvariate(6, 1), 99999)).quantize(comisiones.CENTAVOS)
+            venta = Venta(
+                vendedor_id=aleatorio.choice(vendedores_ids),
+                fecha=ultimo_dia - timedelta(days=aleatorio.randrange(dias)),
+                monto=max(monto, comisiones.CENTAVOS),
+                descripcion='Venta sintética'
+            )
+            venta.calcular_comision(tabla)
+            lote.append(venta)
+            if len(lote) >= TAMANO_LOTE:
+                Venta.objects.bulk_create(lote)
+                lote = []
+        Venta.objects.bulk_create(lote)
+
+        resumen_diario.reconstruir()
+        return ultimo_dia
+
+    def verificar_listado_rapido(self):
+        """
+        Comprueba que el listado rápido (values() + JSONRapidoRenderer) produce
+        los mismos bytes que VentaSerializer + JSONRenderer, incluidas filas con
+        textos especiales que se crean y se descartan en una transacción
+        """
+        with transaction.atomic():
+            vendedor = Vendedor.objects.first()
+            especiales = []
+            descripciones = (None, '', 'ñandú "entre comillas" \\ barra', 'separador\u2028de línea 😀')
+            for descripcion in descripciones:
+                venta = Venta(
+                    vendedor=vendedor,
+                    fecha=date.today(),
+                    monto=Decimal('1234.50'),
+                    descripcion=descripcion
+                )
+                venta.calcular_comision()
+                especiales.append(venta)
+            Venta.objects.bulk_create(especiales)
+
+            esperado = JSONRenderer().render(
+                VentaSerializer(Venta.objects.select_related('vendedor'), many=True).data
+            )
+            obtenido = JSONRapidoRenderer().render(
+                listados.formatear_ventas(listados.valores_ventas(Venta.objects.all()))
+            )
+            transaction.set_rollback(True)
+
+        if esperado != obtenido:
+            posicion = next(
+                (i for i, (a, b) in enumerate(zip(esperado, obtenido)) if a != b),
+                min(len(esperado), len(obtenido))
+            )
+            desde = max(posicion - 40, 0)
+            raise CommandError(
+                'El listado rápido difiere de VentaSerializer en el byte '
+                f'{posicion}: {esperado[desde:posicion + 40]!r} != '
+                f'{obtenido[desde:posicion + 40]!r}'
+            )
+        self.stdout.write(f'Listado rápido idéntico a VentaSerializer ({len(esperado)} bytes)')
+
+    def endpoints(self, ultimo_dia):
+        """(nombre, método, url, datos) de los endpoints medidos"""
+        mes = {
+            'fecha_inicio': (ultimo_dia - timedelta(days=30)).isoformat(),
+            'fecha_fin': ultimo_dia.isoformat(),
+        }
+        vendedor_id = Vendedor.objects.values_list('id', flat=True).first()
+        return [
+            ('ventas-list', 'get', '/api/ventas/', mes),
+            ('ventas-estadisticas', 'get', '/api/ventas/estadisticas/', {}),
+            ('comisiones-calcular', 'post', '/api/comisiones/calcular/', mes),
+            ('comisiones-resumen', 'get', '/api/comisiones/resumen/', {}),
+            ('vendedor-detail', 'get', f'/api/vendedores/{vendedor_id}/', {}),
+        ]
+
+    def medir(self, ultimo_dia, repeticiones):
+        client = Client()
+        resultados = {}
+
+        for nombre, metodo, url, datos in self.endpoints(ultimo_dia):
+            tiempos = []
+            for _ in range(repeticiones):
+                with CaptureQueriesContext(connection) as consultas:
+                    inicio = time.perf_counter()
+                    if metodo == 'post':
+                        response = client.post(url, json.dumps(datos), content_type='application/json')
+                    else:
+                        response = client.get(url, datos)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+
+                if response.status_code >= 400:
+                    raise CommandError(f'{nombre} respondió {response.status_code}')
+
+            resultados[nombre] = {
+                'mediana_ms': round(statistics.median(tiempos), 2),
+                'min_ms': round(min(tiempos), 2),
+                'max_ms': round(max(tiempos), 2),
+                'consultas': len(consultas),
+                'bytes': len(response.content),
+            }
+            self.stdout.write(
+                f"{nombre:<24} {resultados[nombre]['mediana_ms']:>10.2f} ms "
+                f"{resultados[nombre]['consultas']:>5} consultas"
+            )
+
+        return resultados
+
+    def medir_concurrencia(self, repeticiones, concurrencia):
+        """
+        Compara las vistas de lectura síncronas (un hilo por petición en
+        curso, como un worker con hilos) con sus versiones asíncronas (todas
+        las peticiones en el mismo bucle de eventos)
+        """
+        self.stdout.write(f'Lecturas con {concurrencia} peticiones simultáneas:')
+        resultados = {}
+        for nombre, ruta in LECTURAS:
+            total = repeticiones * concurrencia
+            resultados[nombre] = {
+                'sincrono': self.medir_sincrono(f'/api/{ruta}', total, concurrencia),
+                'asincrono': async_to_sync(self.medir_asincrono)(f'/api/async/{ruta}', total, concurrencia),
+            }
+            self.stdout.write(
+                f"{nombre:<24} sync {resultados[nombre]['sincrono']['peticiones_s']:>8.1f} pet/s "
+                f"p95 {resultados[nombre]['sincrono']['p95_ms']:>8.2f} ms | "
+                f"async {resultados[nombre]['asincrono']['peticiones_s']:>8.1f} pet/s "
+                f"p95 {resultados[nombre]['asincrono']['p95_ms']:>8.2f} ms"
+            )
+        return resultados
+
+    def medir_sincrono(self, url, total, concurrencia):
+        def peticion(_):
+            inicio = time.perf_counter()
+            try:
+                response = Client().get(url)
+            finally:
+                # Cada hilo usa su propia conexión, como con CONN_MAX_AGE = 0
+                connection.close()
+            return response.status_code, (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+            respuestas = list(executor.map(peticion, range(total)))
+        return self.resumir(url, respuestas, time.perf_counter() - inicio)
+
+    async def medir_asincrono(self, url, total, concurrencia):
+        client = AsyncClient()
+        limite = asyncio.Semaphore(concurrencia)
+
+        async def peticion():
+            async with limite:
+                inicio = time.perf_counter()
+                response = await client.get(url)
+                return response.status_code, (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        respuestas = await asyncio.gather(*(peticion() for _ in range(total)))
+        return self.resumir(url, respuestas, time.perf_counter() - inicio)
+
+    def resumir(self, url, respuestas, segundos):
+        for codigo, _ in respuestas:
+            if codigo >= 400:
+                raise CommandError(f'{url} respondió {codigo}')
+        tiempos = sorted(tiempo for _, tiempo in respuestas)
+        return {
+            'peticiones_s': round(len(tiempos) / segundos, 1),
+            'mediana_ms': round(statistics.median(tiempos), 2),
+            'p95_ms': round(tiempos[int(0.95 * (len(tiempos) - 1))], 2),
+        }
+
+    def comparar(self, base, resultados, tolerancia):
+        """Falla si la mediana o el número de consultas empeoran respecto a la base"""
+        regresiones = []
+        for nombre, actual in resultados.items():
+            anterior = base.get('resultados', {}).get(nombre)
+            if anterior is None:
+                continue
+            limite = anterior['mediana_ms'] * (1 + tolerancia)
+            if actual['mediana_ms'] > limite:
+                regresiones.append(
+                    f"{nombre}: {actual['mediana_ms']} ms > {anterior['mediana_ms']} ms (+{tolerancia:.0%})"
+                )
+            if actual['consultas'] > anterior['consultas']:
+                regresiones.append(
+                    f"{nombre}: {actual['consultas']} consultas > {anterior['consultas']}"
+                )
+
+        if regresiones:
+            for regresion in regresiones:
+                self.stderr.write(regresion)
+            raise CommandError(f'{len(regresiones)} regresión(es) respecto a {base["metadatos"]["fecha"]}')
+
+        self.stdout.write(self.style.SUCCESS('Sin regresiones respecto a la ejecución base'))
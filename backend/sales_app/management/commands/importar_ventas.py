@@ -0,0 +1,252 @@
+import csv
+import hashlib
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework import serializers
+
+from sales_app import comisiones
+from sales_app.cache_respuestas import invalidar_al_confirmar
+from sales_app.models import ImportacionVentas, Vendedor, Venta
+from sales_app.resumen_diario import Deltas
+from sales_app.serializers import VentaCargaSerializer
+
+COLUMNAS = ('vendedor_email', 'fecha', 'monto')
+TAMANO_LOTE = 5000
+BYTES_FIRMA = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa ventas históricas desde un CSV con columnas vendedor_email, '
+        'fecha, monto y descripcion (opcional). Lee el archivo en streaming, '
+        'escribe por lotes y guarda la posición alcanzada para poder reanudar'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV (UTF-8)')
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=TAMANO_LOTE,
+            help=f'Filas por transacción (por defecto {TAMANO_LOTE})'
+        )
+        parser.add_argument('--delimitador', default=',', help='Separador de campos (por defecto ,)')
+        parser.add_argument(
+            '--rechazadas',
+            help='CSV donde añadir las filas rechazadas junto con el motivo'
+        )
+        parser.add_argument(
+            '--reiniciar',
+            action='store_true',
+            help='Ignora el progreso guardado y empieza desde el principio '
+                 '(las ventas ya importadas se volverían a crear)'
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('El tamaño de lote debe ser mayor que cero')
+
+        ruta = os.path.abspath(options['archivo'])
+        if not os.path.isfile(ruta):
+            raise CommandError(f'No existe el archivo {ruta}')
+
+        importacion = self.obtener_importacion(ruta, options['reiniciar'])
+        if importacion.completada:
+            self.stdout.write(
+                f'{ruta} ya se importó ({importacion.creadas} ventas); use --reiniciar para repetirla'
+            )
+            return
+        if importacion.posicion:
+            self.stdout.write(
+                f'Reanudando en el byte {importacion.posicion} '
+                f'({importacion.filas} filas ya procesadas)'
+            )
+
+        # Mapa email -> id precargado: ninguna consulta por fila
+        self.vendedores = {
+            email.lower(): vendedor_id
+            for email, vendedor_id in Vendedor.objects.values_list('email', 'id')
+        }
+        self.serializer = VentaCargaSerializer(
+            context={'vendedores_ids': set(self.vendedores.values())}
+        )
+        self.tabla = comisiones.obtener_tabla()
+        self.tamano = os.path.getsize(ruta)
+        self.inicio = time.monotonic()
+        self.filas_sesion = 0
+
+        with open(ruta, 'rb') as archivo:
+            cabecera, fin_cabecera = self.leer_cabecera(archivo, options['delimitador'])
+            self.posicion = importacion.posicion or fin_cabecera
+            archivo.seek(self.posicion)
+
+            lector = csv.DictReader(
+                self.lineas(archivo),
+                fieldnames=cabecera,
+                delimiter=options['delimitador']
+            )
+            self.importar(importacion, lector, options['lote'], options['rechazadas'])
+
+        segundos = time.monotonic() - self.inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'Importación completada en {segundos:.1f} s: {importacion.creadas} ventas creadas, '
+            f'{importacion.rechazadas} filas rechazadas'
+        ))
+
+    def obtener_importacion(self, ruta, reiniciar):
+        firma = self.firma(ruta)
+        importacion, creada = ImportacionVentas.objects.get_or_create(
+            archivo=ruta,
+            defaults={'firma': firma}
+        )
+        if creada:
+            return importacion
+
+        if reiniciar:
+            importacion.firma = firma
+            importacion.posicion = importacion.filas = 0
+            importacion.creadas = importacion.rechazadas = 0
+            importacion.completada = False
+            importacion.save()
+        elif importacion.firma != firma:
+            raise CommandError(
+                'El archivo cambió desde la importación anterior; '
+                'use --reiniciar para empezar de cero'
+            )
+        return importacion
+
+    def firma(self, ruta):
+        """Huella del primer mega del archivo"""
+        with open(ruta, 'rb') as archivo:
+            return hashlib.sha256(archivo.read(BYTES_FIRMA)).hexdigest()
+
+    def leer_cabecera(self, archivo, delimitador):
+        """Devuelve (columnas, byte donde empiezan los datos)"""
+        linea = archivo.readline()
+        columnas = next(csv.reader([linea.decode('utf-8-sig')], delimiter=delimitador), [])
+        columnas = [columna.strip().lower() for columna in columnas]
+
+        faltantes = [columna for columna in COLUMNAS if columna not in columnas]
+        if faltantes:
+            raise CommandError(f'Faltan columnas en la cabecera: {", ".join(faltantes)}')
+        return columnas, len(linea)
+
+    def lineas(self, archivo):
+        """
+        Líneas decodificadas del archivo, llevando la cuenta del byte leído
+        El lector CSV no lee por adelantado, así que tras cada fila
+        self.posicion apunta justo al final de esa fila
+        """
+        for linea in archivo:
+            self.posicion += len(linea)
+            yield linea.decode('utf-8')
+
+    def validar(self, fila):
+        """Devuelve (venta, None) o (None, errores)"""
+        email = (fila.get('vendedor_email') or '').strip().lower()
+        vendedor_id = self.vendedores.get(email)
+        if vendedor_id is None:
+            return None, f'vendedor_email: no existe un vendedor con email {email!r}'
+
+        try:
+            datos = self.serializer.run_validation({
+                'vendedor': vendedor_id,
+                'fecha': (fila.get('fecha') or '').strip(),
+                'monto': (fila.get('monto') or '').strip(),
+                'descripcion': fila.get('descripcion') or None,
+            })
+        except serializers.ValidationError as exc:
+            return None, '; '.join(
+                f'{campo}: {" ".join(str(mensaje) for mensaje in mensajes)}'
+                for campo, mensajes in exc.detail.items()
+            )
+
+        venta = Venta(
+            vendedor_id=datos['vendedor'],
+            fecha=datos['fecha'],
+            monto=datos['monto'],
+            descripcion=datos.get('descripcion')
+        )
+        venta.calcular_comision(self.tabla)
+        return venta, None
+
+    def importar(self, importacion, lector, tamano_lote, ruta_rechazadas):
+        lote = []
+        rechazos = []
+        procesadas = 0
+        deltas = Deltas()
+
+        for fila in lector:
+            procesadas += 1
+            venta, errores = self.validar(fila)
+            if venta is None:
+                rechazos.append((importacion.filas + procesadas, fila, errores))
+            else:
+                lote.append(venta)
+                deltas.sumar(venta.vendedor_id, venta.fecha, venta.monto, venta.comision_calculada)
+
+            if procesadas >= tamano_lote:
+                self.escribir(importacion, lote, deltas, procesadas, rechazos, ruta_rechazadas)
+                lote = []
+                rechazos = []
+                procesadas = 0
+
+        self.escribir(
+            importacion, lote, deltas, procesadas, rechazos, ruta_rechazadas, completada=True
+        )
+
+    def escribir(self, importacion, lote, deltas, procesadas, rechazos, ruta_rechazadas,
+                 completada=False):
+        """
+        Escribe un lote en su propia transacción junto con el resumen diario y
+        la posición alcanzada: si el proceso se interrumpe, la reanudación
+        empieza justo después del último lote confirmado
+        """
+        with transaction.atomic():
+            Venta.objects.bulk_create(lote)
+            deltas.aplicar()
+
+            importacion.posicion = self.posicion
+            importacion.filas += procesadas
+            importacion.creadas += len(lote)
+            importacion.rechazadas += len(rechazos)
+            importacion.completada = completada
+            importacion.save()
+            if lote:
+                invalidar_al_confirmar()
+
+        if rechazos:
+            self.registrar_rechazos(rechazos, ruta_rechazadas)
+
+        self.filas_sesion += procesadas
+        segundos = time.monotonic() - self.inicio
+        velocidad = self.filas_sesion / segundos if segundos else 0
+        porcentaje = 100 * self.posicion / self.tamano if self.tamano else 100
+        self.stdout.write(
+            f'{porcentaje:5.1f} % | {importacion.filas} filas | {importacion.creadas} creadas | '
+            f'{importacion.rechazadas} rechazadas | {velocidad:,.0f} filas/s'
+        )
+
+    def registrar_rechazos(self, rechazos, ruta_rechazadas):
+        if not ruta_rechazadas:
+            for numero, _, errores in rechazos[:5]:
+                self.stderr.write(f'Fila {numero} rechazada: {errores}')
+            if len(rechazos) > 5:
+                self.stderr.write(f'... y {len(rechazos) - 5} filas rechazadas más en este lote')
+            return
+
+        nuevo = not os.path.exists(ruta_rechazadas)
+        with open(ruta_rechazadas, 'a', newline='', encoding='utf-8') as archivo:
+            escritor = csv.writer(archivo)
+            if nuevo:
+                escritor.writerow(['fila', *COLUMNAS, 'descripcion', 'errores'])
+            for numero, fila, errores in rechazos:
+                escritor.writerow([
+                    numero,
+                    *(fila.get(columna) for columna in COLUMNAS),
+                    fila.get('descripcion'),
+                    errores,
+                ])
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sales_app import tareas
+
+
+class Command(BaseCommand):
+    help = 'Procesa las tareas de cálculo de comisiones pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa las tareas pendientes y termina'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2.0,
+            help='Segundos de espera cuando no hay tareas (por defecto 2)'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            reclamada = tareas.siguiente_pendiente()
+            if reclamada is None:
+                if options['una_vez']:
+                    return
+                time.sleep(options['intervalo'])
+                continue
+
+            tarea_id, intento = reclamada
+            self.stdout.write(f'Procesando tarea #{tarea_id} (intento {intento})')
+            tareas.ejecutar(tarea_id, intento)
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales_app import archivo, recalculo
+from sales_app.management.utils import fecha_argumento
+from sales_app.models import Venta, VentaArchivada
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula las comisiones de las ventas de un rango de fechas con las '
+        'reglas activas, mediante UPDATE por lotes en SQL. Incluye las ventas '
+        'archivadas del rango'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=fecha_argumento, required=True, help='Fecha inicial (YYYY-MM-DD)')
+        parser.add_argument('--hasta', type=fecha_argumento, required=True, help='Fecha final (YYYY-MM-DD)')
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='No escribe nada; muestra la diferencia de totales por vendedor'
+        )
+        parser.add_argument(
+            '--dias-por-lote',
+            type=int,
+            default=recalculo.DIAS_POR_LOTE,
+            help=f'Días de ventas por cada UPDATE (por defecto {recalculo.DIAS_POR_LOTE})'
+        )
+
+    def handle(self, *args, **options):
+        if options['desde'] > options['hasta']:
+            raise CommandError('La fecha de inicio debe ser anterior a la fecha fin')
+
+        rango = {'fecha__gte': options['desde'], 'fecha__lte': options['hasta']}
+        ventas = Venta.objects.filter(**rango)
+
+        # Si el rango alcanza el archivo, las ventas archivadas también se recalculan
+        hasta_archivo = archivo.limite()
+        archivadas = None
+        if hasta_archivo is not None and options['desde'] <= hasta_archivo:
+            archivadas = VentaArchivada.objects.filter(**rango)
+
+        if options['simular']:
+            self.mostrar_reporte(recalculo.simular(archivo.ventas(options['desde']).filter(**rango)))
+            return
+
+        inicio = time.monotonic()
+        actualizadas = recalculo.recalcular(ventas, dias_por_lote=options['dias_por_lote'])
+        mensaje = f'{actualizadas} ventas recalculadas'
+        if archivadas is not None:
+            archivadas_actualizadas = recalculo.recalcular(
+                archivadas, dias_por_lote=options['dias_por_lote']
+            )
+            mensaje += f' y {archivadas_actualizadas} archivadas (hasta {hasta_archivo})'
+        segundos = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(f'{mensaje} en {segundos:.1f} s'))
+
+    def mostrar_reporte(self, reporte):
+        total_actual = total_nuevo = 0
+        for fila in reporte:
+            total_actual += fila['total_actual']
+            total_nuevo += fila['total_nuevo']
+            self.stdout.write(
+                f"{fila['vendedor_nombre']} {fila['vendedor_apellido']} (#{fila['vendedor_id']}): "
+                f"{fila['total_actual']} -> {fila['total_nuevo']} ({fila['diferencia']:+})"
+            )
+        self.stdout.write(f'Total: {total_actual} -> {total_nuevo} ({total_nuevo - total_actual:+})')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from sales_app import resumen_diario
+from sales_app.management.utils import fecha_argumento
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero el resumen diario de ventas por vendedor'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=fecha_argumento, help='Fecha inicial (YYYY-MM-DD)')
+        parser.add_argument('--hasta', type=fecha_argumento, help='Fecha final (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        generadas = resumen_diario.reconstruir(
+            fecha_inicio=options['desde'],
+            fecha_fin=options['hasta']
+        )
+        self.stdout.write(self.style.SUCCESS(f'{generadas} filas de resumen generadas'))
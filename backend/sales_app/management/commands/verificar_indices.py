@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import get_runner
+
+PRUEBAS = 'sales_app.tests.PlanesConsultaTests'
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta EXPLAIN QUERY PLAN (SQLite) sobre el SQL de los endpoints '
+        'principales y falla si alguno recorre una tabla completa. '
+        f'Equivale a `manage.py test {PRUEBAS}`'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Este comando requiere SQLite')
+
+        runner = get_runner(settings)(verbosity=options['verbosity'])
+        if runner.run_tests([PRUEBAS]):
+            raise CommandError('Hay consultas que recorren una tabla completa')
+
+        self.stdout.write(self.style.SUCCESS('Todas las consultas usan índices'))
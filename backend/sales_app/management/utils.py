@@ -0,0 +1,11 @@
+from datetime import datetime
+
+from django.core.management.base import CommandError
+
+
+def fecha_argumento(valor):
+    """Tipo de argumento para fechas YYYY-MM-DD en los comandos"""
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'Fecha inválida: {valor}. Use YYYY-MM-DD')
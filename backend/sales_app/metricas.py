@@ -0,0 +1,370 @@
+"""
+Métricas de latencia y consultas SQL por endpoint
+El middleware acumula en memoria, por ruta y método, un histograma de
+latencia, el número de consultas y el tiempo en SQL. Cada proceso vuelca
+sus contadores a un archivo propio en METRICAS_DIR desde un hilo cada
+INTERVALO_VOLCADO segundos y al terminar, y el endpoint /api/metrics/ suma
+los archivos de todos los workers y los expone en formato de texto de
+Prometheus. El archivo lleva el pid y un id de arranque; los de workers ya
+terminados se suman, bajo un bloqueo del directorio, a metricas-acumulado.json
+y se borran, así que los totales nunca retroceden y el directorio no crece
+con cada reinicio. METRICAS_DIR debe ser local a cada servidor (los pid se
+comprueban en esta máquina)
+"""
+
+import atexit
+import json
+import os
+from contextlib import contextmanager
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from uuid import uuid4
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+# Límites superiores de los buckets del histograma, en segundos
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INTERVALO_VOLCADO = 5.0
+ACUMULADO = 'metricas-acumulado.json'
+
+_lock = threading.Lock()
+# Serializa los volcados para que el archivo acabe con la última instantánea
+_lock_volcado = threading.Lock()
+_contadores = {}
+_pendiente = False
+_hilo = None
+# (pid, nombre del archivo) del proceso actual
+_proceso = None
+
+
+def _nuevo_contador():
+    return {
+        'buckets': [0] * (len(BUCKETS) + 1),
+        'suma': 0.0,
+        'total': 0,
+        'consultas': 0,
+        'sql_segundos': 0.0,
+    }
+
+
+def registrar(ruta, metodo, segundos, consultas, sql_segundos):
+    """Suma una petición a los contadores del proceso"""
+    global _pendiente
+
+    clave = f'{ruta}|{metodo}'
+    with _lock:
+        contador = _contadores.get(clave)
+        if contador is None:
+            contador = _contadores[clave] = _nuevo_contador()
+        contador['buckets'][bisect_left(BUCKETS, segundos)] += 1
+        contador['suma'] += segundos
+        contador['total'] += 1
+        contador['consultas'] += consultas
+        contador['sql_segundos'] += sql_segundos
+        _pendiente = True
+        _iniciar_hilo()
+
+
+def _iniciar_hilo():
+    """Arranca, una vez por proceso, el hilo de volcado periódico"""
+    global _hilo
+    if _hilo is None:
+        _hilo = threading.Thread(target=_volcado_periodico, name='volcado-metricas', daemon=True)
+        _hilo.start()
+
+
+def _volcado_periodico():
+    while True:
+        time.sleep(INTERVALO_VOLCADO)
+        volcar_pendiente()
+
+
+def _reiniciar_en_hijo():
+    """Tras un fork el proceso hijo empieza sin contadores, hilo ni archivo propios"""
+    global _lock, _lock_volcado, _contadores, _pendiente, _hilo, _proceso
+    _lock = threading.Lock()
+    _lock_volcado = threading.Lock()
+    _contadores = {}
+    _pendiente = False
+    _hilo = None
+    _proceso = None
+
+
+def _directorio():
+    directorio = settings.METRICAS_DIR
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _archivo_proceso():
+    """Nombre del archivo del proceso; el id evita pisar el de un pid reutilizado"""
+    global _proceso
+    pid = os.getpid()
+    if _proceso is None or _proceso[0] != pid:
+        _proceso = (pid, f'metricas-{pid}-{uuid4().hex[:12]}.json')
+    return _proceso[1]
+
+
+def _volcar(instantanea):
+    """Escribe los contadores del proceso de forma atómica"""
+    directorio = _directorio()
+    destino = os.path.join(directorio, _archivo_proceso())
+    temporal = f'{destino}.{threading.get_ident()}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        archivo.write(instantanea)
+    os.replace(temporal, destino)
+
+
+def volcar():
+    """Fuerza el volcado de los contadores del proceso actual"""
+    global _pendiente
+    with _lock_volcado:
+        with _lock:
+            if not _contadores:
+                return
+            instantanea = json.dumps(_contadores)
+            _pendiente = False
+        _volcar(instantanea)
+
+
+def volcar_pendiente():
+    """Vuelca los contadores si cambiaron desde el último volcado"""
+    if _pendiente:
+        volcar()
+
+
+os.register_at_fork(after_in_child=_reiniciar_en_hijo)
+atexit.register(volcar_pendiente)
+
+
+def _sumar(total, contadores):
+    for clave, contador in contadores.items():
+        acumulado = total.setdefault(clave, _nuevo_contador())
+        for indice, valor in enumerate(contador['buckets']):
+            acumulado['buckets'][indice] += valor
+        for campo in ('suma', 'total', 'consultas', 'sql_segundos'):
+            acumulado[campo] += contador[campo]
+
+
+def _leer(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _pid_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Existe, aunque sea de otro usuario
+        return True
+    return True
+
+
+def _pid_de(nombre):
+    """Pid del nombre metricas-{pid}-{id}.json, o None si no es de un proceso"""
+    pid = nombre[len('metricas-'):].split('-', 1)[0]
+    return int(pid) if pid.isdigit() else None
+
+
+@contextmanager
+def _bloqueo(directorio):
+    """Bloqueo exclusivo del directorio entre procesos"""
+    with open(os.path.join(directorio, '.bloqueo'), 'a') as archivo:
+        if fcntl is not None:
+            fcntl.flock(archivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+def _fusionar_terminados(directorio, nombres):
+    """
+    Suma al acumulado los archivos de procesos que ya no existen y los borra
+    El acumulado guarda los nombres de la última fusión: si el proceso se
+    interrumpe antes de borrarlos, la siguiente fusión no los vuelve a sumar
+    """
+    ruta = os.path.join(directorio, ACUMULADO)
+    datos = _leer(ruta) or {'contadores': {}, 'fusionados': []}
+    ya_sumados = set(datos['fusionados'])
+    propio = _archivo_proceso()
+
+    terminados = [
+        nombre for nombre in nombres
+        if nombre != propio and _pid_de(nombre) is not None and not _pid_vivo(_pid_de(nombre))
+    ]
+    nuevos = [nombre for nombre in terminados if nombre not in ya_sumados]
+    if nuevos:
+        for nombre in nuevos:
+            contadores = _leer(os.path.join(directorio, nombre))
+            if contadores:
+                _sumar(datos['contadores'], contadores)
+        datos['fusionados'] = nuevos
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo)
+        os.replace(temporal, ruta)
+
+    for nombre in terminados:
+        try:
+            os.remove(os.path.join(directorio, nombre))
+        except FileNotFoundError:
+            pass
+    return datos['contadores']
+
+
+def combinar():
+    """Suma los contadores de todos los procesos, vivos y terminados"""
+    volcar()
+
+    directorio = _directorio()
+    with _bloqueo(directorio):
+        nombres = [
+            nombre for nombre in os.listdir(directorio)
+            if nombre.startswith('metricas-') and nombre.endswith('.json') and nombre != ACUMULADO
+        ]
+        total = {}
+        _sumar(total, _fusionar_terminados(directorio, nombres))
+        for nombre in nombres:
+            contadores = _leer(os.path.join(directorio, nombre))
+            if contadores:
+                _sumar(total, contadores)
+    return total
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _etiquetas(clave, extra=''):
+    ruta, metodo = clave.split('|', 1)
+    return f'route="{_escapar(ruta)}",method="{_escapar(metodo)}"{extra}'
+
+
+def exportar():
+    """Genera el texto en formato de exposición de Prometheus"""
+    contadores = combinar()
+    claves = sorted(contadores)
+    lineas = [
+        '# HELP ventaspro_http_request_duration_seconds Latencia de las peticiones por ruta',
+        '# TYPE ventaspro_http_request_duration_seconds histogram',
+    ]
+    for clave in claves:
+        contador = contadores[clave]
+        acumulado = 0
+        for limite, valor in zip(BUCKETS + ('+Inf',), contador['buckets']):
+            acumulado += valor
+            etiquetas = _etiquetas(clave, f',le="{limite}"')
+            lineas.append(f'ventaspro_http_request_duration_seconds_bucket{{{etiquetas}}} {acumulado}')
+        lineas.append(f'ventaspro_http_request_duration_seconds_sum{{{_etiquetas(clave)}}} {contador["suma"]}')
+        lineas.append(f'ventaspro_http_request_duration_seconds_count{{{_etiquetas(clave)}}} {contador["total"]}')
+
+    lineas += [
+        '# HELP ventaspro_db_queries_total Consultas SQL ejecutadas por ruta',
+        '# TYPE ventaspro_db_queries_total counter',
+    ]
+    for clave in claves:
+        lineas.append(f'ventaspro_db_queries_total{{{_etiquetas(clave)}}} {contadores[clave]["consultas"]}')
+
+    lineas += [
+        '# HELP ventaspro_db_query_duration_seconds_total Tiempo total en SQL por ruta',
+        '# TYPE ventaspro_db_query_duration_seconds_total counter',
+    ]
+    for clave in claves:
+        lineas.append(
+            f'ventaspro_db_query_duration_seconds_total{{{_etiquetas(clave)}}} {contadores[clave]["sql_segundos"]}'
+        )
+
+    return '\n'.join(lineas) + '\n'
+
+
+class _ContadorSQL:
+    """execute_wrapper que cuenta consultas y mide su duración"""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+def nombre_ruta(request):
+    """Nombre de la ruta resuelta, p. ej. 'venta-estadisticas'"""
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return 'no_encontrada'
+    if coincidencia.url_name is None:
+        return coincidencia.route or 'sin_nombre'
+    if coincidencia.namespace:
+        return f'{coincidencia.namespace}:{coincidencia.url_name}'
+    return coincidencia.url_name
+
+
+class MetricasMiddleware:
+    """
+    Registra latencia, consultas y tiempo SQL de cada petición
+    Funciona tanto bajo WSGI como bajo ASGI sin forzar un cambio de modo
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+
+        contador = _ContadorSQL()
+        inicio = time.perf_counter()
+        with self.medir_sql(contador):
+            response = self.get_response(request)
+        self.registrar(request, inicio, contador)
+        return response
+
+    async def __acall__(self, request):
+        contador = _ContadorSQL()
+        inicio = time.perf_counter()
+        with self.medir_sql(contador):
+            response = await self.get_response(request)
+        self.registrar(request, inicio, contador)
+        return response
+
+    def medir_sql(self, contador):
+        pila = ExitStack()
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(contador))
+        return pila
+
+    def registrar(self, request, inicio, contador):
+        registrar(
+            nombre_ruta(request),
+            request.method,
+            time.perf_counter() - inicio,
+            contador.consultas,
+            contador.segundos
+        )
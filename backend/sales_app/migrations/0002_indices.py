@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comisioncalculada',
+            index=models.Index(fields=['fecha_inicio', 'fecha_fin'], name='comisiones_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comisioncalculada',
+            index=models.Index(fields=['-fecha_calculo'], name='comisiones_fecha_calculo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reglacomision',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['monto_minimo'], name='reglas_activas_monto_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['-fecha', '-fecha_registro'], name='ventas_fecha_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['vendedor', 'fecha'], name='ventas_vendedor_fecha_idx'),
+        ),
+    ]
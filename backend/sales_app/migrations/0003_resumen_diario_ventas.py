@@ -0,0 +1,64 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:53
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def poblar_resumen(apps, schema_editor):
+    """Genera el resumen diario a partir de las ventas existentes"""
+    Venta = apps.get_model('sales_app', 'Venta')
+    ResumenDiarioVenta = apps.get_model('sales_app', 'ResumenDiarioVenta')
+
+    totales = (
+        Venta.objects.values('vendedor_id', 'fecha')
+        .annotate(suma_ventas=Sum('monto'), suma_comision=Sum('comision_calculada'), cantidad=Count('id'))
+        .order_by()
+    )
+    ResumenDiarioVenta.objects.bulk_create(
+        [
+            ResumenDiarioVenta(
+                vendedor_id=fila['vendedor_id'],
+                fecha=fila['fecha'],
+                total_ventas=fila['suma_ventas'] or Decimal('0.00'),
+                total_comision=fila['suma_comision'] or Decimal('0.00'),
+                numero_ventas=fila['cantidad'],
+            )
+            for fila in totales.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0002_indices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiarioVenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('total_ventas', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_comision', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('numero_ventas', models.IntegerField(default=0)),
+                ('vendedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='sales_app.vendedor')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Ventas',
+                'verbose_name_plural': 'Resúmenes Diarios de Ventas',
+                'db_table': 'resumen_diario_ventas',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='resumen_diario_fecha_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumendiarioventa',
+            constraint=models.UniqueConstraint(fields=('vendedor', 'fecha'), name='resumen_diario_vendedor_fecha_uniq'),
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-17 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0003_resumen_diario_ventas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaComision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_inicio', models.DateField()),
+                ('fecha_fin', models.DateField()),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('completada', 'Completada'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('progreso', models.PositiveSmallIntegerField(default=0, help_text='Porcentaje de avance (0 a 100)')),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio_ejecucion', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin_ejecucion', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tarea de Comisión',
+                'verbose_name_plural': 'Tareas de Comisión',
+                'db_table': 'tareas_comision',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='tareas_estado_idx')],
+            },
+        ),
+    ]
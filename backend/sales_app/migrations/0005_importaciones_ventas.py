@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0004_tareas_comision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionVentas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('archivo', models.CharField(max_length=500, unique=True)),
+                ('firma', models.CharField(help_text='Huella del archivo para detectar si cambió entre ejecuciones', max_length=64)),
+                ('posicion', models.BigIntegerField(default=0, help_text='Byte del archivo hasta el que se ha importado')),
+                ('filas', models.PositiveIntegerField(default=0)),
+                ('creadas', models.PositiveIntegerField(default=0)),
+                ('rechazadas', models.PositiveIntegerField(default=0)),
+                ('completada', models.BooleanField(default=False)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Importación de Ventas',
+                'verbose_name_plural': 'Importaciones de Ventas',
+                'db_table': 'importaciones_ventas',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
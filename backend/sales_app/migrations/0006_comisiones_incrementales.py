@@ -0,0 +1,66 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:11
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def eliminar_duplicados(apps, schema_editor):
+    """Conserva solo el cálculo más reciente de cada (vendedor, período)"""
+    ComisionCalculada = apps.get_model('sales_app', 'ComisionCalculada')
+
+    vigentes = (
+        ComisionCalculada.objects.values('vendedor_id', 'fecha_inicio', 'fecha_fin')
+        .annotate(ultimo=Max('id'))
+        .values('ultimo')
+    )
+    ComisionCalculada.objects.exclude(id__in=vigentes).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0005_importaciones_ventas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaEliminada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('venta_id', models.BigIntegerField()),
+                ('vendedor_id', models.BigIntegerField()),
+                ('fecha', models.DateField()),
+                ('fecha_eliminacion', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Venta Eliminada',
+                'verbose_name_plural': 'Ventas Eliminadas',
+                'db_table': 'ventas_eliminadas',
+                'ordering': ['-fecha_eliminacion'],
+            },
+        ),
+        migrations.AddField(
+            model_name='venta',
+            name='fecha_modificacion',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='comisioncalculada',
+            name='fecha_calculo',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['fecha_modificacion'], name='ventas_fecha_modificacion_idx'),
+        ),
+        migrations.RunPython(eliminar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='comisioncalculada',
+            constraint=models.UniqueConstraint(fields=('vendedor', 'fecha_inicio', 'fecha_fin'), name='comision_vendedor_periodo_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='ventaeliminada',
+            index=models.Index(fields=['fecha_eliminacion'], name='ventas_elim_fecha_elim_idx'),
+        ),
+    ]
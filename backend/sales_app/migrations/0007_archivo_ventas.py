@@ -0,0 +1,70 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+COLUMNAS = (
+    'id, vendedor_id, fecha, monto, descripcion, comision_calculada, '
+    'porcentaje_aplicado, fecha_registro, fecha_modificacion'
+)
+
+CREAR_VISTA = f"""
+CREATE VIEW ventas_historico AS
+SELECT {COLUMNAS} FROM ventas
+UNION ALL
+SELECT {COLUMNAS} FROM ventas_archivadas
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0006_comisiones_incrementales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaHistorica',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('comision_calculada', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('porcentaje_aplicado', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('fecha_registro', models.DateTimeField()),
+                ('fecha_modificacion', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Venta Histórica',
+                'verbose_name_plural': 'Ventas Históricas',
+                'db_table': 'ventas_historico',
+                'ordering': ['-fecha', '-fecha_registro'],
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fecha', models.DateField()),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('comision_calculada', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('porcentaje_aplicado', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('fecha_registro', models.DateTimeField()),
+                ('fecha_modificacion', models.DateTimeField()),
+                ('vendedor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_archivadas', to='sales_app.vendedor')),
+            ],
+            options={
+                'verbose_name': 'Venta Archivada',
+                'verbose_name_plural': 'Ventas Archivadas',
+                'db_table': 'ventas_archivadas',
+                'ordering': ['-fecha', '-fecha_registro'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['-fecha', '-fecha_registro'], name='ventas_arch_fecha_idx'), models.Index(fields=['vendedor', 'fecha'], name='ventas_arch_vendedor_fecha_idx')],
+            },
+        ),
+        migrations.RunSQL(CREAR_VISTA, 'DROP VIEW ventas_historico'),
+    ]
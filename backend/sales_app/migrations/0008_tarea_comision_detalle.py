@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0007_archivo_ventas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tareacomision',
+            name='detalle',
+            field=models.BooleanField(default=True, help_text='Si el resultado incluye el detalle de ventas de cada vendedor'),
+        ),
+    ]
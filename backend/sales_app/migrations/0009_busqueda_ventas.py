@@ -0,0 +1,163 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:52
+
+from django.db import migrations
+
+# Índice de texto de las ventas: descripción y nombre del vendedor. Lo
+# mantienen triggers de la base de datos, así que se actualiza con cualquier
+# escritura (save, bulk_create, update y DELETE masivos, archivado)
+SQLITE = [
+    """
+    CREATE VIRTUAL TABLE ventas_busqueda USING fts5(
+        descripcion, vendedor, tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO ventas_busqueda (rowid, descripcion, vendedor)
+    SELECT v.id, COALESCE(v.descripcion, ''), d.nombre || ' ' || d.apellido
+    FROM ventas v JOIN vendedores d ON d.id = v.vendedor_id
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_insertar AFTER INSERT ON ventas BEGIN
+        INSERT INTO ventas_busqueda (rowid, descripcion, vendedor)
+        SELECT new.id, COALESCE(new.descripcion, ''), nombre || ' ' || apellido
+        FROM vendedores WHERE id = new.vendedor_id;
+    END
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_actualizar AFTER UPDATE OF descripcion, vendedor_id ON ventas BEGIN
+        UPDATE ventas_busqueda SET
+            descripcion = COALESCE(new.descripcion, ''),
+            vendedor = (SELECT nombre || ' ' || apellido FROM vendedores WHERE id = new.vendedor_id)
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_eliminar AFTER DELETE ON ventas BEGIN
+        DELETE FROM ventas_busqueda WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_vendedor AFTER UPDATE OF nombre, apellido ON vendedores BEGIN
+        UPDATE ventas_busqueda SET vendedor = new.nombre || ' ' || new.apellido
+        WHERE rowid IN (SELECT id FROM ventas WHERE vendedor_id = new.id);
+    END
+    """,
+]
+
+SQLITE_REVERTIR = [
+    'DROP TRIGGER ventas_busqueda_vendedor',
+    'DROP TRIGGER ventas_busqueda_eliminar',
+    'DROP TRIGGER ventas_busqueda_actualizar',
+    'DROP TRIGGER ventas_busqueda_insertar',
+    'DROP TABLE ventas_busqueda',
+]
+
+# En PostgreSQL el nombre del vendedor pesa más (A) que la descripción (B)
+POSTGRESQL = [
+    """
+    CREATE TABLE ventas_busqueda (
+        venta_id bigint PRIMARY KEY,
+        documento tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX ventas_busqueda_documento_idx ON ventas_busqueda USING GIN (documento)',
+    """
+    CREATE FUNCTION ventas_busqueda_documento(descripcion text, vendedor bigint) RETURNS tsvector AS $$
+        SELECT setweight(to_tsvector('simple', d.nombre || ' ' || d.apellido), 'A')
+            || setweight(to_tsvector('simple', COALESCE(descripcion, '')), 'B')
+        FROM vendedores d WHERE d.id = vendedor
+    $$ LANGUAGE sql STABLE
+    """,
+    """
+    INSERT INTO ventas_busqueda (venta_id, documento)
+    SELECT id, ventas_busqueda_documento(descripcion, vendedor_id) FROM ventas
+    """,
+    """
+    CREATE FUNCTION ventas_busqueda_guardar() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO ventas_busqueda (venta_id, documento)
+        VALUES (NEW.id, ventas_busqueda_documento(NEW.descripcion, NEW.vendedor_id))
+        ON CONFLICT (venta_id) DO UPDATE SET documento = EXCLUDED.documento;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_guardar
+    AFTER INSERT OR UPDATE OF descripcion, vendedor_id ON ventas
+    FOR EACH ROW EXECUTE FUNCTION ventas_busqueda_guardar()
+    """,
+    """
+    CREATE FUNCTION ventas_busqueda_eliminar() RETURNS trigger AS $$
+    BEGIN
+        DELETE FROM ventas_busqueda WHERE venta_id = OLD.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_eliminar
+    AFTER DELETE ON ventas
+    FOR EACH ROW EXECUTE FUNCTION ventas_busqueda_eliminar()
+    """,
+    """
+    CREATE FUNCTION ventas_busqueda_vendedor() RETURNS trigger AS $$
+    BEGIN
+        UPDATE ventas_busqueda b
+        SET documento = ventas_busqueda_documento(v.descripcion, v.vendedor_id)
+        FROM ventas v
+        WHERE v.vendedor_id = NEW.id AND b.venta_id = v.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER ventas_busqueda_vendedor
+    AFTER UPDATE OF nombre, apellido ON vendedores
+    FOR EACH ROW EXECUTE FUNCTION ventas_busqueda_vendedor()
+    """,
+]
+
+POSTGRESQL_REVERTIR = [
+    'DROP TRIGGER ventas_busqueda_vendedor ON vendedores',
+    'DROP TRIGGER ventas_busqueda_eliminar ON ventas',
+    'DROP TRIGGER ventas_busqueda_guardar ON ventas',
+    'DROP FUNCTION ventas_busqueda_vendedor()',
+    'DROP FUNCTION ventas_busqueda_eliminar()',
+    'DROP FUNCTION ventas_busqueda_guardar()',
+    'DROP TABLE ventas_busqueda',
+    'DROP FUNCTION ventas_busqueda_documento(text, bigint)',
+]
+
+SENTENCIAS = {
+    'sqlite': (SQLITE, SQLITE_REVERTIR),
+    'postgresql': (POSTGRESQL, POSTGRESQL_REVERTIR),
+}
+
+
+def _ejecutar(schema_editor, indice):
+    """Ejecuta las sentencias del motor; en otros motores no hay índice"""
+    sentencias = SENTENCIAS.get(schema_editor.connection.vendor)
+    if sentencias is None:
+        return
+    for sentencia in sentencias[indice]:
+        schema_editor.execute(sentencia)
+
+
+def crear_indice(apps, schema_editor):
+    _ejecutar(schema_editor, 0)
+
+
+def eliminar_indice(apps, schema_editor):
+    _ejecutar(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0008_tarea_comision_detalle'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0009_busqueda_ventas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tareacomision',
+            name='fecha_latido',
+            field=models.DateTimeField(blank=True, help_text='Última señal de vida de la ejecución en curso', null=True),
+        ),
+        migrations.AddField(
+            model_name='tareacomision',
+            name='intentos',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Veces que se reclamó la tarea para ejecutarla'),
+        ),
+    ]
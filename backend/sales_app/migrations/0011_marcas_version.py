@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-17 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales_app', '0010_tarea_comision_latido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaVersion',
+            fields=[
+                ('clave', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('valor', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Marca de Versión',
+                'verbose_name_plural': 'Marcas de Versión',
+                'db_table': 'marcas_version',
+            },
+        ),
+    ]
@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from decimal import Decimal
 
+from . import comisiones
+
 
 class Vendedor(models.Model):
     """Modelo para representar a los vendedores"""
@@ -20,6 +23,14 @@ class Vendedor(models.Model):
     
     def __str__(self):
         return f"{self.nombre} {self.apellido}"
+    
+    def delete(self, *args, **kwargs):
+        """Borra antes sus ventas en bloque (ver edicion_masiva.borrar_ventas_de)"""
+        from . import edicion_masiva
+        
+        with transaction.atomic():
+            edicion_masiva.borrar_ventas_de(Vendedor.objects.filter(pk=self.pk))
+            return super().delete(*args, **kwargs)
 
 
 class ReglaComision(models.Model):
@@ -46,6 +57,13 @@ class ReglaComision(models.Model):
         verbose_name = 'Regla de Comisión'
         verbose_name_plural = 'Reglas de Comisión'
         ordering = ['monto_minimo']
+        indexes = [
+            models.Index(
+                fields=['monto_minimo'],
+                condition=models.Q(activa=True),
+                name='reglas_activas_monto_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.nombre} - {self.porcentaje}% (Min: ${self.monto_minimo})"
@@ -78,35 +96,63 @@ class Venta(models.Model):
         editable=False
     )
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'ventas'
         verbose_name = 'Venta'
         verbose_name_plural = 'Ventas'
         ordering = ['-fecha', '-fecha_registro']
+        indexes = [
+            models.Index(
+                fields=['-fecha', '-fecha_registro'],
+                name='ventas_fecha_registro_idx'
+            ),
+            models.Index(
+                fields=['vendedor', 'fecha'],
+                name='ventas_vendedor_fecha_idx'
+            ),
+            models.Index(
+                fields=['fecha_modificacion'],
+                name='ventas_fecha_modificacion_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Venta #{self.id} - {self.vendedor} - ${self.monto}"
     
-    def calcular_comision(self):
-        """Calcula la comisión basada en las reglas activas"""
-        reglas = ReglaComision.objects.filter(
-            activa=True,
-            monto_minimo__lte=self.monto
-        ).order_by('-monto_minimo')
-        
-        if reglas.exists():
-            regla = reglas.first()
-            self.porcentaje_aplicado = regla.porcentaje
-            self.comision_calculada = (self.monto * regla.porcentaje) / 100
-        else:
-            self.porcentaje_aplicado = Decimal('0.00')
-            self.comision_calculada = Decimal('0.00')
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Guarda los valores leídos para poder ajustar el resumen diario al modificar"""
+        instance = super().from_db(db, field_names, values)
+        instance._guardar_originales()
+        return instance
+    
+    def _guardar_originales(self):
+        self._originales = {
+            campo: self.__dict__.get(campo)
+            for campo in ('vendedor_id', 'fecha', 'monto', 'comision_calculada')
+        }
+    
+    def calcular_comision(self, tabla=None):
+        """
+        Calcula la comisión basada en las reglas activas
+        Usa la tabla de reglas en memoria del proceso, por lo que no
+        consulta la base de datos salvo que las reglas hayan cambiado
+        """
+        if tabla is None:
+            tabla = comisiones.obtener_tabla()
+        self.porcentaje_aplicado, self.comision_calculada = tabla.calcular(self.monto)
     
     def save(self, *args, **kwargs):
-        """Sobrescribe el método save para calcular la comisión automáticamente"""
+        """
+        Sobrescribe el método save para calcular la comisión automáticamente
+        El resumen diario se actualiza en la misma transacción (ver signals.py)
+        """
         self.calcular_comision()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._guardar_originales()
 
 
 class ComisionCalculada(models.Model):
@@ -129,13 +175,263 @@ class ComisionCalculada(models.Model):
         default=Decimal('0.00')
     )
     numero_ventas = models.IntegerField(default=0)
-    fecha_calculo = models.DateTimeField(auto_now_add=True)
+    # Marca de agua: las ventas modificadas después requieren recalcular
+    fecha_calculo = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         db_table = 'comisiones_calculadas'
         verbose_name = 'Comisión Calculada'
         verbose_name_plural = 'Comisiones Calculadas'
         ordering = ['-fecha_calculo']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['vendedor', 'fecha_inicio', 'fecha_fin'],
+                name='comision_vendedor_periodo_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['fecha_inicio', 'fecha_fin'],
+                name='comisiones_periodo_idx'
+            ),
+            models.Index(
+                fields=['-fecha_calculo'],
+                name='comisiones_fecha_calculo_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Comisión {self.vendedor} - ${self.total_comision}"
+
+
+class VentaEliminada(models.Model):
+    """
+    Registro de ventas que dejaron un (vendedor, fecha): eliminadas, o
+    modificadas hacia otro vendedor o fecha. Permite saber qué comisiones
+    calculadas quedaron desactualizadas sin conservar la venta
+    """
+    venta_id = models.BigIntegerField()
+    vendedor_id = models.BigIntegerField()
+    fecha = models.DateField()
+    fecha_eliminacion = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'ventas_eliminadas'
+        verbose_name = 'Venta Eliminada'
+        verbose_name_plural = 'Ventas Eliminadas'
+        ordering = ['-fecha_eliminacion']
+        indexes = [
+            models.Index(
+                fields=['fecha_eliminacion'],
+                name='ventas_elim_fecha_elim_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Venta #{self.venta_id} eliminada ({self.fecha})"
+
+
+class DatosVentaCerrada(models.Model):
+    """Columnas de una venta fuera de la tabla caliente (archivo e histórico)"""
+    id = models.BigIntegerField(primary_key=True)
+    fecha = models.DateField()
+    monto = models.DecimalField(max_digits=10, decimal_places=2)
+    descripcion = models.TextField(blank=True, null=True)
+    comision_calculada = models.DecimalField(max_digits=10, decimal_places=2)
+    porcentaje_aplicado = models.DecimalField(max_digits=5, decimal_places=2)
+    fecha_registro = models.DateTimeField()
+    fecha_modificacion = models.DateTimeField()
+    
+    class Meta:
+        abstract = True
+        ordering = ['-fecha', '-fecha_registro']
+    
+    def __str__(self):
+        return f"Venta #{self.id} - {self.vendedor} - ${self.monto}"
+
+
+class VentaArchivada(DatosVentaCerrada):
+    """
+    Ventas de periodos cerrados movidas fuera de `ventas` (ver archivo.py)
+    Conservan su id; el resumen diario y las comisiones calculadas de esos
+    periodos no cambian al archivarlas
+    """
+    vendedor = models.ForeignKey(
+        Vendedor,
+        on_delete=models.CASCADE,
+        related_name='ventas_archivadas'
+    )
+    
+    class Meta(DatosVentaCerrada.Meta):
+        db_table = 'ventas_archivadas'
+        verbose_name = 'Venta Archivada'
+        verbose_name_plural = 'Ventas Archivadas'
+        indexes = [
+            models.Index(
+                fields=['-fecha', '-fecha_registro'],
+                name='ventas_arch_fecha_idx'
+            ),
+            models.Index(
+                fields=['vendedor', 'fecha'],
+                name='ventas_arch_vendedor_fecha_idx'
+            ),
+        ]
+
+
+class VentaHistorica(DatosVentaCerrada):
+    """
+    Vista de solo lectura con las ventas de `ventas` y `ventas_archivadas`
+    Se usa para las consultas por rango que alcanzan periodos archivados
+    """
+    vendedor = models.ForeignKey(
+        Vendedor,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+    
+    class Meta(DatosVentaCerrada.Meta):
+        managed = False
+        db_table = 'ventas_historico'
+        verbose_name = 'Venta Histórica'
+        verbose_name_plural = 'Ventas Históricas'
+
+
+class ResumenDiarioVenta(models.Model):
+    """
+    Totales diarios de ventas por vendedor
+    Se mantiene incrementalmente al crear, modificar o eliminar ventas
+    """
+    vendedor = models.ForeignKey(
+        Vendedor,
+        on_delete=models.CASCADE,
+        related_name='resumenes_diarios'
+    )
+    fecha = models.DateField()
+    total_ventas = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    total_comision = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    numero_ventas = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'resumen_diario_ventas'
+        verbose_name = 'Resumen Diario de Ventas'
+        verbose_name_plural = 'Resúmenes Diarios de Ventas'
+        ordering = ['-fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['vendedor', 'fecha'],
+                name='resumen_diario_vendedor_fecha_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['fecha'], name='resumen_diario_fecha_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.vendedor} - {self.fecha} - ${self.total_ventas}"
+
+
+class TareaComision(models.Model):
+    """Cálculo de comisiones de un período ejecutado en segundo plano"""
+    PENDIENTE = 'pendiente'
+    EN_PROCESO = 'en_proceso'
+    COMPLETADA = 'completada'
+    ERROR = 'error'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (COMPLETADA, 'Completada'),
+        (ERROR, 'Error'),
+    ]
+    
+    fecha_inicio = models.DateField()
+    fecha_fin = models.DateField()
+    detalle = models.BooleanField(
+        default=True,
+        help_text="Si el resultado incluye el detalle de ventas de cada vendedor"
+    )
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    progreso = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Porcentaje de avance (0 a 100)"
+    )
+    resultado = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio_ejecucion = models.DateTimeField(blank=True, null=True)
+    fecha_fin_ejecucion = models.DateTimeField(blank=True, null=True)
+    # Lo renueva quien ejecuta la tarea al reclamarla y periódicamente mientras dura
+    fecha_latido = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="Última señal de vida de la ejecución en curso"
+    )
+    intentos = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Veces que se reclamó la tarea para ejecutarla"
+    )
+    
+    class Meta:
+        db_table = 'tareas_comision'
+        verbose_name = 'Tarea de Comisión'
+        verbose_name_plural = 'Tareas de Comisión'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion'], name='tareas_estado_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Tarea #{self.id} ({self.fecha_inicio} a {self.fecha_fin}) - {self.estado}"
+
+
+class ImportacionVentas(models.Model):
+    """Progreso de una importación de ventas desde un archivo CSV"""
+    archivo = models.CharField(max_length=500, unique=True)
+    firma = models.CharField(
+        max_length=64,
+        help_text="Huella del archivo para detectar si cambió entre ejecuciones"
+    )
+    posicion = models.BigIntegerField(
+        default=0,
+        help_text="Byte del archivo hasta el que se ha importado"
+    )
+    filas = models.PositiveIntegerField(default=0)
+    creadas = models.PositiveIntegerField(default=0)
+    rechazadas = models.PositiveIntegerField(default=0)
+    completada = models.BooleanField(default=False)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'importaciones_ventas'
+        verbose_name = 'Importación de Ventas'
+        verbose_name_plural = 'Importaciones de Ventas'
+        ordering = ['-fecha_creacion']
+    
+    def __str__(self):
+        return f"{self.archivo} ({self.creadas} ventas)"
+
+
+class MarcaVersion(models.Model):
+    """
+    Marca de versión compartida entre procesos (ver versiones.py)
+    Se replica con los datos: indica hasta dónde llega la réplica
+    """
+    clave = models.CharField(max_length=100, primary_key=True)
+    valor = models.BigIntegerField()
+    
+    class Meta:
+        db_table = 'marcas_version'
+        verbose_name = 'Marca de Versión'
+        verbose_name_plural = 'Marcas de Versión'
+    
+    def __str__(self):
+        return f"{self.clave} = {self.valor}"
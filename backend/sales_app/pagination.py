@@ -0,0 +1,162 @@
+"""
+Paginación por cursor (keyset)
+En lugar de OFFSET filtra por la última fila entregada, por lo que una página
+profunda cuesta lo mismo que la primera. Se activa con ?paginacion=cursor
+(o al enviar ?cursor=...) sin afectar la paginación por número de página
+"""
+
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _parametros(request):
+    """Parámetros de consulta de una petición de DRF o de Django"""
+    if hasattr(request, 'query_params'):
+        return request.query_params
+    return request.GET
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor sobre un orden descendente y total
+    `ordering` debe terminar en un campo único (normalmente id)
+    """
+    ordering = ('-id',)
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 100)
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    mode_query_param = 'paginacion'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Cursor inválido'
+
+    @classmethod
+    def solicitada(cls, request):
+        """Indica si la petición pide paginación por cursor"""
+        params = _parametros(request)
+        return params.get(cls.mode_query_param) == 'cursor' or cls.cursor_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.recortar(list(self.preparar(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """Igual que paginate_queryset, con el ORM asíncrono"""
+        return self.recortar([fila async for fila in self.preparar(queryset, request)])
+
+    def preparar(self, queryset, request):
+        """Ordena, filtra por el cursor y limita a una página (más una fila)"""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.campos = [campo.lstrip('-') for campo in self.ordering]
+        self.modelo = queryset.model
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.filtro_despues_de(cursor))
+        return queryset[:self.page_size + 1]
+
+    def recortar(self, resultados):
+        self.has_next = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        self.ultimo = resultados[-1] if resultados else None
+        return resultados
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(_parametros(request)[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def filtro_despues_de(self, valores):
+        """
+        Construye (a < x) OR (a = x AND b < y) OR ... para el orden dado
+        El primer término se repite como rango para que el índice se use
+        """
+        filtro = Q()
+        iguales = {}
+        for campo, valor in zip(self.ordering, valores):
+            nombre = campo.lstrip('-')
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            filtro |= Q(**iguales, **{f'{nombre}__{operador}': valor})
+            iguales[nombre] = valor
+
+        primero = self.ordering[0]
+        operador = 'lte' if primero.startswith('-') else 'gte'
+        return Q(**{f'{primero.lstrip("-")}__{operador}': valores[0]}) & filtro
+
+    def decode_cursor(self, request):
+        token = _parametros(request).get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            valores = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            if not isinstance(valores, list) or len(valores) != len(self.campos):
+                raise ValueError(token)
+            # Cada valor con el tipo de su campo: uno que no lo sea haría
+            # fallar la consulta con un 500
+            valores = [
+                self.convertir(campo, valor) for campo, valor in zip(self.campos, valores)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return valores
+
+    def convertir(self, campo, valor):
+        if valor is None:
+            raise ValueError(campo)
+        return self.modelo._meta.get_field(campo).to_python(valor)
+
+    def encode_cursor(self, instancia):
+        valores = [self.valor(instancia, campo) for campo in self.campos]
+        token = base64.urlsafe_b64encode(json.dumps(valores).encode('ascii'))
+        return token.decode('ascii')
+
+    def valor(self, instancia, campo):
+        if isinstance(instancia, dict):
+            valor = instancia[campo]
+        else:
+            valor = getattr(instancia, campo)
+        if hasattr(valor, 'isoformat'):
+            return valor.isoformat()
+        return valor
+
+    def get_next_link(self):
+        if not self.has_next or self.ultimo is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.ultimo))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class VentaKeysetPagination(KeysetPagination):
+    """Cursor sobre el orden por defecto de ventas, con id como desempate"""
+    ordering = ('-fecha', '-fecha_registro', '-id')
+
+
+class ComisionKeysetPagination(KeysetPagination):
+    """Cursor sobre el orden por defecto de comisiones calculadas"""
+    ordering = ('-fecha_calculo', '-id')
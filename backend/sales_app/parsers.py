@@ -0,0 +1,25 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Parser para cuerpos NDJSON (un objeto JSON por línea)"""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        filas = []
+        for numero, linea in enumerate(stream, start=1):
+            linea = linea.decode(encoding).strip()
+            if not linea:
+                continue
+            try:
+                filas.append(json.loads(linea))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON inválido en la línea {numero}: {exc}')
+        return filas
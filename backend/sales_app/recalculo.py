@@ -0,0 +1,112 @@
+"""
+Recálculo masivo de comisiones cuando cambian las reglas
+Las comisiones se recalculan en SQL con un CASE sobre los tramos de la tabla
+de reglas, con UPDATE por ventanas de fechas, sin cargar ventas en memoria.
+El cálculo usa centavos enteros para redondear igual que
+TablaReglas.calcular (mitad hacia arriba)
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import (
+    BigIntegerField, Case, DecimalField, ExpressionWrapper, F, Max, Min, Sum,
+    Value, When
+)
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from . import comisiones, resumen_diario
+from .cache_respuestas import invalidar_al_confirmar
+
+DIAS_POR_LOTE = 7
+
+
+def expresiones(tabla):
+    """
+    Devuelve (porcentaje, comision) como expresiones SQL sobre `monto`
+    para la tabla de reglas indicada
+    """
+    tramos = list(zip(tabla.minimos, tabla.porcentajes))[::-1]
+
+    porcentaje = Case(
+        *[When(monto__gte=minimo, then=Value(p)) for minimo, p in tramos],
+        default=Value(comisiones.CERO),
+        output_field=DecimalField(max_digits=5, decimal_places=2)
+    )
+    puntos_basicos = Case(
+        *[When(monto__gte=minimo, then=Value(int(p * 100))) for minimo, p in tramos],
+        default=Value(0),
+        output_field=BigIntegerField()
+    )
+
+    centavos = Cast(Round(F('monto') * 100), BigIntegerField())
+    comision_centavos = ExpressionWrapper(
+        (centavos * puntos_basicos + 5000) / 10000,
+        output_field=BigIntegerField()
+    )
+    comision = ExpressionWrapper(
+        comision_centavos * Value(comisiones.CENTAVOS),
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+    return porcentaje, comision
+
+
+def simular(ventas, tabla=None):
+    """
+    Calcula, sin escribir, la diferencia de comisiones por vendedor
+    Una sola consulta agrupada sobre las ventas indicadas
+    """
+    tabla = tabla or comisiones.cargar_tabla()
+    _, comision = expresiones(tabla)
+
+    filas = (
+        ventas.values('vendedor', 'vendedor__nombre', 'vendedor__apellido')
+        .annotate(total_actual=Sum('comision_calculada'), total_nuevo=Sum(comision))
+        .order_by('vendedor__apellido', 'vendedor__nombre', 'vendedor')
+    )
+
+    reporte = []
+    for fila in filas:
+        actual = (fila['total_actual'] or comisiones.CERO).quantize(comisiones.CENTAVOS)
+        nuevo = (fila['total_nuevo'] or comisiones.CERO).quantize(comisiones.CENTAVOS)
+        reporte.append({
+            'vendedor_id': fila['vendedor'],
+            'vendedor_nombre': fila['vendedor__nombre'],
+            'vendedor_apellido': fila['vendedor__apellido'],
+            'total_actual': actual,
+            'total_nuevo': nuevo,
+            'diferencia': nuevo - actual,
+        })
+    return reporte
+
+
+def recalcular(ventas, tabla=None, dias_por_lote=DIAS_POR_LOTE):
+    """
+    Recalcula porcentaje_aplicado y comision_calculada de las ventas indicadas
+    con un UPDATE por ventana de `dias_por_lote` días, cada uno en su propia
+    transacción. Luego reconstruye el resumen diario del rango afectado.
+    Devuelve el número de ventas actualizadas
+    """
+    tabla = tabla or comisiones.cargar_tabla()
+    porcentaje, comision = expresiones(tabla)
+
+    rango = ventas.aggregate(desde=Min('fecha'), hasta=Max('fecha'))
+    if rango['desde'] is None:
+        return 0
+
+    actualizadas = 0
+    inicio = rango['desde']
+    while inicio <= rango['hasta']:
+        fin = inicio + timedelta(days=dias_por_lote)
+        with transaction.atomic():
+            actualizadas += ventas.filter(fecha__gte=inicio, fecha__lt=fin).update(
+                porcentaje_aplicado=porcentaje,
+                comision_calculada=comision,
+                fecha_modificacion=timezone.now()
+            )
+        inicio = fin
+
+    resumen_diario.reconstruir(fecha_inicio=rango['desde'], fecha_fin=rango['hasta'])
+    invalidar_al_confirmar()
+    return actualizadas
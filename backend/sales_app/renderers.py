@@ -0,0 +1,52 @@
+"""
+Renderer JSON rápido
+Usa orjson cuando está instalado y produce los mismos bytes que el
+JSONRenderer de DRF: los tipos que orjson no codifica igual (decimales,
+fechas, textos traducibles) pasan por el codificador de DRF, y un decimal
+que este escribiría en notación exponencial hace delegar toda la respuesta.
+Sin orjson, con sangría o con una configuración de JSON no compacta también
+delega en JSONRenderer
+"""
+
+import math
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_codificador = JSONEncoder()
+
+
+def _por_defecto(valor):
+    valor = _codificador.default(valor)
+    if isinstance(valor, float):
+        # Decimal como float, igual que DRF; orjson escribe 1e16 donde
+        # json escribe 1e+16, y NaN como null
+        if not math.isfinite(valor) or 'e' in repr(valor):
+            raise TypeError(f'Decimal sin representación idéntica: {valor!r}')
+    return valor
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """JSONRenderer con orjson como codificador"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            contenido = orjson.dumps(
+                data, default=_por_defecto, option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que JSONRenderer: escapar los separadores de línea de JavaScript
+        return contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,101 @@
+"""
+Lecturas en la réplica de base de datos
+Si DATABASE_REPLICA_URL está configurada, las acciones de solo lectura de
+los viewsets (ver LecturaEnReplicaMixin) y las vistas asíncronas consultan
+el alias `replica`, de modo que los informes pesados no compiten con las
+escrituras de ventas en la principal. Todo lo demás usa `default`.
+Dentro de una lectura, en cuanto se escribe algo las consultas siguientes
+de esa misma petición vuelven a la principal (lectura tras escritura).
+Las respuestas que se guardan en la caché versionada se calculan en la
+réplica solo si ya tiene la versión de los datos con la que se guardarán;
+si va por detrás se calculan en la principal (ver cache_respuestas.py).
+
+Para probarlo en local con dos archivos SQLite:
+    cp db.sqlite3 replica.sqlite3
+    DATABASE_REPLICA_URL=sqlite:///replica.sqlite3 python manage.py runserver
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+ALIAS = 'replica'
+
+# Alias al que van las lecturas de la petición en curso (None: el de siempre)
+_alias_lectura = ContextVar('ventaspro_alias_lectura', default=None)
+
+
+def disponible():
+    return ALIAS in connections.settings
+
+
+@contextmanager
+def lecturas_en_replica():
+    """Envía a la réplica, si existe, las lecturas del bloque"""
+    token = _alias_lectura.set(ALIAS if disponible() else None)
+    try:
+        yield
+    finally:
+        _alias_lectura.reset(token)
+
+
+@contextmanager
+def lecturas_en_principal():
+    """Envía a la principal las lecturas del bloque aunque la petición use la réplica"""
+    token = _alias_lectura.set(None)
+    try:
+        yield
+    finally:
+        _alias_lectura.reset(token)
+
+
+def alias_lectura():
+    """Alias al que van ahora las lecturas (None: el de siempre, la principal)"""
+    return _alias_lectura.get()
+
+
+def lectura_en_replica(vista):
+    """Decorador para vistas asíncronas de solo lectura"""
+    @wraps(vista)
+    async def envoltura(request, *args, **kwargs):
+        with lecturas_en_replica():
+            return await vista(request, *args, **kwargs)
+
+    return envoltura
+
+
+class ReplicaRouter:
+    """Router de DATABASE_ROUTERS: lecturas marcadas a la réplica, escrituras a la principal"""
+
+    def db_for_read(self, model, **hints):
+        return _alias_lectura.get()
+
+    def db_for_write(self, model, **hints):
+        if _alias_lectura.get() is not None:
+            _alias_lectura.set(DEFAULT_DB_ALIAS)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias tienen los mismos datos
+        return True
+
+
+class LecturaEnReplicaMixin:
+    """
+    Ejecuta en la réplica las acciones indicadas en acciones_replica cuando
+    la petición usa un método seguro (GET, HEAD, OPTIONS)
+    Las acciones con respuesta_cacheada también, salvo que la réplica no
+    tenga aún la versión de los datos leída antes de la consulta: entonces
+    esa respuesta se calcula en la principal
+    """
+    acciones_replica = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        accion = self.action_map.get(request.method.lower())
+        if request.method in SAFE_METHODS and accion in self.acciones_replica:
+            with lecturas_en_replica():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,198 @@
+"""
+Mantenimiento del resumen diario de ventas por vendedor
+Las altas, cambios y bajas de ventas se traducen en deltas sobre la fila
+(vendedor, fecha) correspondiente, dentro de la transacción de la escritura
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, Count
+
+from .cache_respuestas import invalidar_al_confirmar
+from .models import VentaHistorica, ResumenDiarioVenta
+
+CERO = Decimal('0.00')
+TAMANO_LOTE = 1000
+# A partir de cuántas claves se crean las filas nuevas con un solo bulk_create
+MINIMO_CREACION_MASIVA = 20
+
+
+class Deltas:
+    """Acumula cambios por (vendedor_id, fecha) para aplicarlos de una vez"""
+
+    def __init__(self):
+        self.valores = defaultdict(lambda: [CERO, CERO, 0])
+
+    def sumar(self, vendedor_id, fecha, monto, comision, numero=1):
+        delta = self.valores[(vendedor_id, fecha)]
+        delta[0] += monto
+        delta[1] += comision
+        delta[2] += numero
+
+    def restar(self, vendedor_id, fecha, monto, comision, numero=1):
+        self.sumar(vendedor_id, fecha, -monto, -comision, -numero)
+
+    def aplicar(self):
+        """Aplica los deltas acumulados sobre la tabla de resumen"""
+        pendientes = {
+            clave: delta for clave, delta in self.valores.items() if any(delta)
+        }
+        with transaction.atomic():
+            if len(pendientes) >= MINIMO_CREACION_MASIVA:
+                for clave in _crear_nuevas(pendientes):
+                    del pendientes[clave]
+            for (vendedor_id, fecha), (monto, comision, numero) in pendientes.items():
+                _aplicar_delta(vendedor_id, fecha, monto, comision, numero)
+        self.valores.clear()
+
+
+def _crear_nuevas(pendientes):
+    """
+    Crea de una vez las filas que aún no existen (cargas masivas)
+    Devuelve las claves creadas; si otra transacción crea alguna a la vez,
+    no crea ninguna y todas siguen el camino fila a fila
+    """
+    vendedores = {vendedor_id for vendedor_id, _ in pendientes}
+    fechas = [fecha for _, fecha in pendientes]
+    existentes = set(
+        ResumenDiarioVenta.objects.filter(
+            vendedor_id__in=vendedores,
+            fecha__gte=min(fechas),
+            fecha__lte=max(fechas)
+        ).values_list('vendedor_id', 'fecha')
+    )
+
+    nuevas = [
+        ResumenDiarioVenta(
+            vendedor_id=vendedor_id,
+            fecha=fecha,
+            total_ventas=monto,
+            total_comision=comision,
+            numero_ventas=numero
+        )
+        for (vendedor_id, fecha), (monto, comision, numero) in pendientes.items()
+        if numero > 0 and (vendedor_id, fecha) not in existentes
+    ]
+    try:
+        with transaction.atomic():
+            ResumenDiarioVenta.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE)
+    except IntegrityError:
+        return []
+    return [(fila.vendedor_id, fila.fecha) for fila in nuevas]
+
+
+def _aplicar_delta(vendedor_id, fecha, monto, comision, numero):
+    filas = ResumenDiarioVenta.objects.filter(vendedor_id=vendedor_id, fecha=fecha)
+    cambios = {
+        'total_ventas': F('total_ventas') + monto,
+        'total_comision': F('total_comision') + comision,
+        'numero_ventas': F('numero_ventas') + numero,
+    }
+
+    if not filas.update(**cambios):
+        if numero <= 0:
+            # No hay fila que descontar (p. ej. el vendedor se está eliminando)
+            return
+        try:
+            with transaction.atomic():
+                ResumenDiarioVenta.objects.create(
+                    vendedor_id=vendedor_id,
+                    fecha=fecha,
+                    total_ventas=monto,
+                    total_comision=comision,
+                    numero_ventas=numero
+                )
+        except IntegrityError:
+            # Otra transacción creó la fila entre el update y el insert
+            filas.update(**cambios)
+
+    if numero < 0:
+        filas.filter(numero_ventas__lte=0).delete()
+
+
+def registrar_guardado(venta, creada):
+    """Ajusta el resumen tras guardar una venta"""
+    deltas = Deltas()
+    originales = getattr(venta, '_originales', None)
+
+    if not creada:
+        if not originales or None in originales.values():
+            recalcular(venta.vendedor_id, venta.fecha)
+            return
+        deltas.restar(
+            originales['vendedor_id'], originales['fecha'],
+            originales['monto'], originales['comision_calculada']
+        )
+
+    deltas.sumar(venta.vendedor_id, venta.fecha, venta.monto, venta.comision_calculada)
+    deltas.aplicar()
+
+
+def registrar_eliminacion(venta):
+    """Ajusta el resumen tras eliminar una venta"""
+    originales = getattr(venta, '_originales', None) or {}
+    deltas = Deltas()
+    deltas.restar(
+        originales.get('vendedor_id', venta.vendedor_id),
+        originales.get('fecha', venta.fecha),
+        originales.get('monto', venta.monto),
+        originales.get('comision_calculada', venta.comision_calculada)
+    )
+    deltas.aplicar()
+
+
+def recalcular(vendedor_id, fecha):
+    """Recalcula una fila del resumen directamente desde las ventas"""
+    reconstruir(fecha_inicio=fecha, fecha_fin=fecha, vendedor_id=vendedor_id)
+
+
+def reconstruir(fecha_inicio=None, fecha_fin=None, vendedor_id=None):
+    """
+    Reconstruye el resumen desde cero para el rango indicado
+    Lee también las ventas archivadas. Devuelve el número de filas generadas
+    """
+    ventas = VentaHistorica.objects.all()
+    resumenes = ResumenDiarioVenta.objects.all()
+    if fecha_inicio:
+        ventas = ventas.filter(fecha__gte=fecha_inicio)
+        resumenes = resumenes.filter(fecha__gte=fecha_inicio)
+    if fecha_fin:
+        ventas = ventas.filter(fecha__lte=fecha_fin)
+        resumenes = resumenes.filter(fecha__lte=fecha_fin)
+    if vendedor_id:
+        ventas = ventas.filter(vendedor_id=vendedor_id)
+        resumenes = resumenes.filter(vendedor_id=vendedor_id)
+
+    totales = (
+        ventas.values('vendedor_id', 'fecha')
+        .annotate(
+            suma_ventas=Sum('monto'),
+            suma_comision=Sum('comision_calculada'),
+            cantidad=Count('id')
+        )
+        .order_by()
+    )
+
+    generadas = 0
+    with transaction.atomic():
+        resumenes.delete()
+        lote = []
+        for fila in totales.iterator(chunk_size=TAMANO_LOTE):
+            lote.append(ResumenDiarioVenta(
+                vendedor_id=fila['vendedor_id'],
+                fecha=fila['fecha'],
+                total_ventas=fila['suma_ventas'] or CERO,
+                total_comision=fila['suma_comision'] or CERO,
+                numero_ventas=fila['cantidad']
+            ))
+            if len(lote) >= TAMANO_LOTE:
+                ResumenDiarioVenta.objects.bulk_create(lote)
+                generadas += len(lote)
+                lote = []
+        ResumenDiarioVenta.objects.bulk_create(lote)
+        generadas += len(lote)
+        invalidar_al_confirmar()
+
+    return generadas
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Vendedor, ReglaComision, Venta, ComisionCalculada
+from django.db.models import Sum
+from decimal import Decimal
+from .models import Vendedor, ReglaComision, Venta, ComisionCalculada, TareaComision
 
 
 class VendedorSerializer(serializers.ModelSerializer):
@@ -16,12 +18,27 @@ class VendedorSerializer(serializers.ModelSerializer):
         read_only_fields = ['fecha_ingreso']
     
     def get_total_ventas(self, obj):
-        """Obtiene el total de ventas del vendedor"""
-        return obj.ventas.count()
+        """
+        Obtiene el total de ventas del vendedor
+        Usa la anotación del queryset si existe (ver VendedorViewSet)
+        """
+        if hasattr(obj, 'total_ventas_anotado'):
+            return obj.total_ventas_anotado
+        return obj.resumenes_diarios.aggregate(
+            total=Sum('numero_ventas')
+        )['total'] or 0
     
     def get_total_comisiones(self, obj):
-        """Obtiene el total de comisiones del vendedor"""
-        total = sum(venta.comision_calculada for venta in obj.ventas.all())
+        """
+        Obtiene el total de comisiones del vendedor
+        Usa la anotación del queryset si existe (ver VendedorViewSet)
+        """
+        if hasattr(obj, 'total_comisiones_anotado'):
+            total = obj.total_comisiones_anotado
+        else:
+            total = obj.resumenes_diarios.aggregate(
+                total=Sum('total_comision')
+            )['total'] or Decimal('0.00')
         return float(total)
 
 
@@ -92,6 +109,34 @@ class VentaSerializer(serializers.ModelSerializer):
         return value
 
 
+class VentaCargaSerializer(serializers.Serializer):
+    """
+    Serializer ligero para la carga masiva de ventas
+    Valida el vendedor contra el conjunto de ids recibido en el contexto
+    para no consultar la base de datos por cada fila
+    """
+    vendedor = serializers.IntegerField()
+    fecha = serializers.DateField()
+    monto = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        min_value=Decimal('0.01')
+    )
+    descripcion = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        allow_null=True
+    )
+    
+    def validate_vendedor(self, value):
+        """Valida que el vendedor exista"""
+        if value not in self.context['vendedores_ids']:
+            raise serializers.ValidationError(
+                f"El vendedor {value} no existe"
+            )
+        return value
+
+
 class ComisionCalculadaSerializer(serializers.ModelSerializer):
     """Serializer para el modelo ComisionCalculada"""
     vendedor_nombre = serializers.CharField(
@@ -139,3 +184,134 @@ class ResumenComisionSerializer(serializers.Serializer):
     promedio_venta = serializers.DecimalField(max_digits=10, decimal_places=2)
     promedio_comision = serializers.DecimalField(max_digits=10, decimal_places=2)
     ventas_detalle = VentaSerializer(many=True, read_only=True)
+
+
+class ReglaSimuladaSerializer(serializers.Serializer):
+    """Tramo de una tabla de reglas propuesta (no se guarda)"""
+    monto_minimo = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        min_value=Decimal('0.00')
+    )
+    porcentaje = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=Decimal('0.00'),
+        max_value=Decimal('100.00')
+    )
+
+
+class SimulacionComisionSerializer(serializers.Serializer):
+    """Parámetros de una simulación de comisiones con reglas propuestas"""
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    reglas = ReglaSimuladaSerializer(many=True, allow_empty=False)
+    
+    def validate_reglas(self, value):
+        """Valida que no haya dos tramos con el mismo monto mínimo"""
+        minimos = [regla['monto_minimo'] for regla in value]
+        if len(set(minimos)) != len(minimos):
+            raise serializers.ValidationError(
+                "Hay tramos repetidos con el mismo monto mínimo"
+            )
+        return value
+    
+    def validate(self, data):
+        if data['fecha_inicio'] > data['fecha_fin']:
+            raise serializers.ValidationError(
+                "La fecha de inicio debe ser anterior a la fecha fin"
+            )
+        return data
+
+
+class FiltroVentasSerializer(serializers.Serializer):
+    """Filtro de una operación masiva sobre ventas"""
+    vendedor = serializers.IntegerField(required=False)
+    fecha_inicio = serializers.DateField(required=False)
+    fecha_fin = serializers.DateField(required=False)
+    
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError(
+                "Indique al menos vendedor, fecha_inicio o fecha_fin"
+            )
+        return data
+
+
+class FiltroVendedoresSerializer(serializers.Serializer):
+    """Filtro de una operación masiva sobre vendedores"""
+    activo = serializers.BooleanField()
+
+
+class SeleccionMasivaSerializer(serializers.Serializer):
+    """
+    Registros a los que se aplica una operación masiva: una lista de ids o
+    un filtro (definido por cada subclase), no ambos
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=10000
+    )
+    
+    def validate(self, data):
+        if ('ids' in data) == ('filtro' in data):
+            raise serializers.ValidationError("Indique ids o filtro, no ambos")
+        return data
+
+
+class SeleccionVentasSerializer(SeleccionMasivaSerializer):
+    filtro = FiltroVentasSerializer(required=False)
+
+
+class ActualizacionVentasSerializer(SeleccionVentasSerializer):
+    """Selección de ventas y cambios a aplicar a todas"""
+    CAMPOS = ('vendedor', 'fecha', 'monto', 'descripcion')
+    
+    cambios = serializers.DictField()
+    
+    def validate_cambios(self, value):
+        """Valida los cambios con las reglas de VentaSerializer"""
+        return _validar_cambios(VentaSerializer, value, self.CAMPOS)
+
+
+class SeleccionVendedoresSerializer(SeleccionMasivaSerializer):
+    filtro = FiltroVendedoresSerializer(required=False)
+
+
+class ActualizacionVendedoresSerializer(SeleccionVendedoresSerializer):
+    """Selección de vendedores y cambios a aplicar a todos"""
+    CAMPOS = ('nombre', 'apellido', 'telefono', 'activo')
+    
+    cambios = serializers.DictField()
+    
+    def validate_cambios(self, value):
+        """Valida los cambios con las reglas de VendedorSerializer"""
+        return _validar_cambios(VendedorSerializer, value, self.CAMPOS)
+
+
+def _validar_cambios(serializer_class, cambios, campos):
+    if not cambios:
+        raise serializers.ValidationError("Indique al menos un campo a modificar")
+    no_permitidos = sorted(set(cambios) - set(campos))
+    if no_permitidos:
+        raise serializers.ValidationError(
+            f"Campos que no se pueden modificar en bloque: {', '.join(no_permitidos)}"
+        )
+    serializer = serializer_class(data=cambios, partial=True)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+class TareaComisionSerializer(serializers.ModelSerializer):
+    """Serializer para el estado de una tarea de cálculo de comisiones"""
+    
+    class Meta:
+        model = TareaComision
+        fields = [
+            'id', 'fecha_inicio', 'fecha_fin', 'detalle', 'estado', 'progreso',
+            'resultado', 'error', 'fecha_creacion',
+            'fecha_inicio_ejecucion', 'fecha_fin_ejecucion'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,138 @@
+"""
+Series temporales de ventas
+Agrupa el resumen diario por día, semana o mes en una sola consulta y
+rellena en el servidor los periodos sin ventas, de modo que el cliente
+recibe la serie lista para graficar
+"""
+
+from datetime import timedelta
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .comisiones import CERO
+
+AGRUPACIONES = ('dia', 'semana', 'mes')
+
+# Máximo de periodos por serie, para que un rango largo por día no genere
+# respuestas gigantes
+MAXIMO_PERIODOS = 5000
+
+
+def truncar(fecha, agrupacion):
+    """Inicio del periodo (lunes para semanas, día 1 para meses)"""
+    if agrupacion == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if agrupacion == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def siguiente(periodo, agrupacion):
+    if agrupacion == 'semana':
+        return periodo + timedelta(days=7)
+    if agrupacion == 'mes':
+        if periodo.month == 12:
+            return periodo.replace(year=periodo.year + 1, month=1)
+        return periodo.replace(month=periodo.month + 1)
+    return periodo + timedelta(days=1)
+
+
+def periodos(fecha_inicio, fecha_fin, agrupacion):
+    """Lista de inicios de periodo que cubren el rango"""
+    resultado = []
+    periodo = truncar(fecha_inicio, agrupacion)
+    while periodo <= fecha_fin:
+        resultado.append(periodo)
+        periodo = siguiente(periodo, agrupacion)
+    return resultado
+
+
+def _rango(fecha_inicio, fecha_fin, agrupacion):
+    rango = periodos(fecha_inicio, fecha_fin, agrupacion)
+    if len(rango) > MAXIMO_PERIODOS:
+        raise ValueError(
+            f'El rango genera {len(rango)} periodos (máximo {MAXIMO_PERIODOS}); '
+            'use una agrupación mayor o un rango menor'
+        )
+    return rango
+
+
+def _expresion_periodo(agrupacion):
+    if agrupacion == 'semana':
+        return TruncWeek('fecha')
+    if agrupacion == 'mes':
+        return TruncMonth('fecha')
+    return F('fecha')
+
+
+def _punto(periodo, fila=None):
+    if fila is None:
+        total_ventas = total_comision = CERO
+        numero_ventas = 0
+    else:
+        total_ventas = fila['total_ventas'] or CERO
+        total_comision = fila['total_comision'] or CERO
+        numero_ventas = fila['numero_ventas'] or 0
+    return {
+        'periodo': periodo.isoformat(),
+        'total_ventas': float(total_ventas),
+        'total_comision': float(total_comision),
+        'numero_ventas': numero_ventas,
+    }
+
+
+def calcular_serie(resumenes, agrupacion, fecha_inicio=None, fecha_fin=None, por_vendedor=False):
+    """
+    Agrupa el queryset de ResumenDiarioVenta recibido (ya filtrado)
+    Si no se indica el rango se usa el de los datos. Lanza ValueError si el
+    rango genera más de MAXIMO_PERIODOS periodos
+    """
+    rango = None
+    if fecha_inicio is not None and fecha_fin is not None:
+        rango = _rango(fecha_inicio, fecha_fin, agrupacion)
+
+    campos = ['periodo']
+    if por_vendedor:
+        campos += ['vendedor', 'vendedor__nombre', 'vendedor__apellido']
+
+    filas = list(
+        resumenes.annotate(periodo=_expresion_periodo(agrupacion))
+        .values(*campos)
+        .annotate(
+            total_ventas=Sum('total_ventas'),
+            total_comision=Sum('total_comision'),
+            numero_ventas=Sum('numero_ventas')
+        )
+        .order_by(*campos)
+    )
+
+    if rango is None:
+        if not filas:
+            return []
+        fechas = [fila['periodo'] for fila in filas]
+        rango = _rango(fecha_inicio or min(fechas), fecha_fin or max(fechas), agrupacion)
+
+    if not por_vendedor:
+        por_periodo = {fila['periodo']: fila for fila in filas}
+        return [_punto(periodo, por_periodo.get(periodo)) for periodo in rango]
+
+    vendedores = {}
+    for fila in filas:
+        vendedor = vendedores.setdefault(fila['vendedor'], {
+            'vendedor_id': fila['vendedor'],
+            'vendedor_nombre': fila['vendedor__nombre'],
+            'vendedor_apellido': fila['vendedor__apellido'],
+            'filas': {},
+        })
+        vendedor['filas'][fila['periodo']] = fila
+
+    resultado = []
+    for vendedor in sorted(
+        vendedores.values(),
+        key=lambda v: (v['vendedor_apellido'], v['vendedor_nombre'], v['vendedor_id'])
+    ):
+        filas_vendedor = vendedor.pop('filas')
+        vendedor['serie'] = [_punto(periodo, filas_vendedor.get(periodo)) for periodo in rango]
+        resultado.append(vendedor)
+    return resultado
@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import comisiones, resumen_diario
+from .cache_respuestas import invalidar_al_confirmar
+from .models import Vendedor, ReglaComision, Venta, ComisionCalculada, VentaEliminada
+
+
+@receiver(post_save, sender=ReglaComision)
+@receiver(post_delete, sender=ReglaComision)
+def invalidar_reglas(sender, **kwargs):
+    """Invalida la tabla de reglas en memoria cuando cambia una regla"""
+    transaction.on_commit(comisiones.invalidar)
+
+
+@receiver(post_save, sender=Venta)
+def actualizar_resumen_guardado(sender, instance, created, raw=False, **kwargs):
+    """Mantiene el resumen diario al crear o modificar una venta"""
+    if raw:
+        return
+    resumen_diario.registrar_guardado(instance, created)
+
+
+@receiver(post_delete, sender=Venta)
+def actualizar_resumen_eliminacion(sender, instance, **kwargs):
+    """Mantiene el resumen diario al eliminar una venta"""
+    resumen_diario.registrar_eliminacion(instance)
+
+
+@receiver(post_save, sender=Venta)
+def registrar_venta_movida(sender, instance, created, raw=False, **kwargs):
+    """
+    Si la venta cambió de vendedor o de fecha, registra su salida del par
+    anterior para que su comisión calculada se recalcule
+    """
+    originales = getattr(instance, '_originales', None)
+    if raw or created or not originales:
+        return
+    if (originales['vendedor_id'], originales['fecha']) != (instance.vendedor_id, instance.fecha):
+        VentaEliminada.objects.create(
+            venta_id=instance.pk,
+            vendedor_id=originales['vendedor_id'],
+            fecha=originales['fecha']
+        )
+
+
+@receiver(post_delete, sender=Venta)
+def registrar_venta_eliminada(sender, instance, **kwargs):
+    """Registra la baja para el cálculo incremental de comisiones"""
+    originales = getattr(instance, '_originales', None) or {}
+    VentaEliminada.objects.create(
+        venta_id=instance.pk,
+        vendedor_id=originales.get('vendedor_id') or instance.vendedor_id,
+        fecha=originales.get('fecha') or instance.fecha
+    )
+
+
+@receiver(post_save, sender=Vendedor)
+@receiver(post_delete, sender=Vendedor)
+@receiver(post_save, sender=ReglaComision)
+@receiver(post_delete, sender=ReglaComision)
+@receiver(post_save, sender=Venta)
+@receiver(post_delete, sender=Venta)
+@receiver(post_save, sender=ComisionCalculada)
+@receiver(post_delete, sender=ComisionCalculada)
+def invalidar_respuestas(sender, **kwargs):
+    """Publica una nueva versión de los datos para la caché de respuestas"""
+    invalidar_al_confirmar()
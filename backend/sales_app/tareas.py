@@ -0,0 +1,230 @@
+"""
+Ejecución en segundo plano del cálculo de comisiones
+Las tareas se guardan en la tabla tareas_comision. Con
+COMISIONES_TAREAS_MODO = 'hilo' se ejecutan en un pool de hilos del propio
+proceso; con 'worker' las procesa `manage.py procesar_tareas_comision`.
+En ambos casos una tarea se reclama con un UPDATE condicional que incrementa
+`intentos`, y ese número identifica la ejecución: cada escritura posterior
+(latido, avance, resultado) se filtra por él, así que una ejecución que ya
+perdió la tarea no puede pisar el trabajo de la siguiente.
+Mientras se ejecuta, un hilo renueva fecha_latido cada cuarto de
+COMISIONES_TAREAS_TIMEOUT, aunque una consulta larga no informe avances. Si
+el hilo o el proceso muere, la tarea deja de dar señales y, pasado ese
+plazo, vuelve a pendiente para reintentarse (hasta MAXIMO_INTENTOS veces) o
+queda en error
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import comisiones
+from .models import TareaComision
+
+logger = logging.getLogger(__name__)
+
+MAXIMO_INTENTOS = 3
+
+_executor = None
+
+
+def _obtener_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.COMISIONES_TAREAS_HILOS,
+            thread_name_prefix='tareas-comision'
+        )
+    return _executor
+
+
+def encolar(fecha_inicio, fecha_fin, detalle=True):
+    """Crea la tarea y, en modo hilo, la lanza al confirmar la transacción"""
+    tarea = TareaComision.objects.create(
+        fecha_inicio=fecha_inicio,
+        fecha_fin=fecha_fin,
+        detalle=detalle
+    )
+    if settings.COMISIONES_TAREAS_MODO == 'hilo':
+        transaction.on_commit(lambda: _obtener_executor().submit(_ejecutar_en_hilo, tarea.id))
+    return tarea
+
+
+def _ejecutar_en_hilo(tarea_id):
+    try:
+        ejecutar(tarea_id)
+    finally:
+        # Cada hilo abre su propia conexión; se cierra al terminar
+        connection.close()
+
+
+def _limite_latido():
+    """Las ejecuciones sin señales desde antes de este momento se dan por muertas"""
+    return timezone.now() - timedelta(seconds=settings.COMISIONES_TAREAS_TIMEOUT)
+
+
+def recuperar_vencidas():
+    """
+    Devuelve a pendiente las tareas en proceso sin señales dentro del plazo,
+    o las marca con error si ya agotaron sus intentos. Devuelve cuántas
+    quedaron pendientes
+    """
+    vencidas = TareaComision.objects.filter(
+        estado=TareaComision.EN_PROCESO,
+        fecha_latido__lt=_limite_latido()
+    )
+    vencidas.filter(intentos__gte=MAXIMO_INTENTOS).update(
+        estado=TareaComision.ERROR,
+        error='La ejecución se interrumpió demasiadas veces',
+        fecha_fin_ejecucion=timezone.now()
+    )
+    return vencidas.filter(intentos__lt=MAXIMO_INTENTOS).update(
+        estado=TareaComision.PENDIENTE,
+        progreso=0
+    )
+
+
+def revisar(tarea):
+    """
+    Al consultar una tarea detecta si su ejecución murió. En modo hilo la
+    relanza en este proceso, ya que no hay un worker que la recoja
+    """
+    if tarea.estado not in (TareaComision.PENDIENTE, TareaComision.EN_PROCESO):
+        return tarea
+    limite = _limite_latido()
+    if tarea.estado == TareaComision.EN_PROCESO and tarea.fecha_latido and tarea.fecha_latido < limite:
+        recuperar_vencidas()
+        tarea.refresh_from_db()
+    if (
+        settings.COMISIONES_TAREAS_MODO == 'hilo'
+        and tarea.estado == TareaComision.PENDIENTE
+        and tarea.fecha_creacion < limite
+    ):
+        _obtener_executor().submit(_ejecutar_en_hilo, tarea.id)
+    return tarea
+
+
+def reclamar(tarea_id):
+    """
+    Marca la tarea como en proceso si sigue pendiente
+    Devuelve el número de intento que identifica esta ejecución, o None si
+    otro la reclamó antes
+    """
+    intentos = TareaComision.objects.filter(
+        id=tarea_id,
+        estado=TareaComision.PENDIENTE
+    ).values_list('intentos', flat=True).first()
+    if intentos is None:
+        return None
+
+    ahora = timezone.now()
+    reclamada = TareaComision.objects.filter(
+        id=tarea_id,
+        estado=TareaComision.PENDIENTE,
+        intentos=intentos
+    ).update(
+        estado=TareaComision.EN_PROCESO,
+        fecha_inicio_ejecucion=ahora,
+        fecha_latido=ahora,
+        intentos=intentos + 1
+    )
+    return intentos + 1 if reclamada else None
+
+
+def siguiente_pendiente():
+    """Reclama la tarea pendiente más antigua: (id, intento) o None"""
+    recuperar_vencidas()
+    pendientes = TareaComision.objects.filter(
+        estado=TareaComision.PENDIENTE
+    ).order_by('fecha_creacion').values_list('id', flat=True)
+    for tarea_id in pendientes[:10]:
+        intento = reclamar(tarea_id)
+        if intento is not None:
+            return tarea_id, intento
+    return None
+
+
+class TareaPerdida(Exception):
+    """La tarea se volvió a encolar o la reclamó otra ejecución"""
+
+
+class _Latido(threading.Thread):
+    """Renueva fecha_latido de la ejecución cada `intervalo` segundos"""
+
+    def __init__(self, ejecucion, intervalo):
+        super().__init__(name='latido-tarea-comision', daemon=True)
+        self.ejecucion = ejecucion
+        self.intervalo = intervalo
+        self.detener = threading.Event()
+
+    def run(self):
+        try:
+            while not self.detener.wait(self.intervalo):
+                if not self.ejecucion.update(fecha_latido=timezone.now()):
+                    return
+        finally:
+            connection.close()
+
+
+def ejecutar(tarea_id, intento=None):
+    """
+    Ejecuta una tarea y guarda su resultado o el error
+    `intento` es el devuelto por reclamar(); sin él la tarea se reclama aquí
+    """
+    if intento is None:
+        intento = reclamar(tarea_id)
+        if intento is None:
+            return
+
+    # Solo esta ejecución: deja de coincidir si la tarea se vuelve a encolar
+    ejecucion = TareaComision.objects.filter(
+        id=tarea_id,
+        intentos=intento,
+        estado=TareaComision.EN_PROCESO
+    )
+    ultimo = [0]
+
+    def progreso(porcentaje):
+        # Se escribe como mucho cada 5 puntos para no saturar la base de datos
+        if porcentaje - ultimo[0] >= 5 or porcentaje == 100:
+            ultimo[0] = porcentaje
+            if not ejecucion.update(progreso=porcentaje, fecha_latido=timezone.now()):
+                raise TareaPerdida
+
+    tarea = TareaComision.objects.get(id=tarea_id)
+    latido = _Latido(ejecucion, settings.COMISIONES_TAREAS_TIMEOUT / 4)
+    latido.start()
+    try:
+        datos = comisiones.calcular_periodo(
+            tarea.fecha_inicio, tarea.fecha_fin, progreso, detalle=tarea.detalle
+        )
+        # Mismo formato que la respuesta síncrona (Decimal como número)
+        resultado = json.loads(json.dumps(datos, cls=JSONEncoder))
+        guardada = ejecucion.update(
+            estado=TareaComision.COMPLETADA,
+            progreso=100,
+            resultado=resultado,
+            fecha_fin_ejecucion=timezone.now()
+        )
+    except TareaPerdida:
+        guardada = 0
+    except Exception as exc:
+        logger.exception('Error en la tarea de comisión %s', tarea_id)
+        guardada = ejecucion.update(
+            estado=TareaComision.ERROR,
+            error=str(exc),
+            fecha_fin_ejecucion=timezone.now()
+        )
+    finally:
+        latido.detener.set()
+        latido.join()
+
+    if not guardada:
+        logger.warning('La tarea de comisión %s (intento %s) se reasignó; se descarta su resultado', tarea_id, intento)
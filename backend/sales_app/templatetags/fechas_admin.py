@@ -0,0 +1,84 @@
+"""
+Jerarquía de fechas del admin recorriendo el índice de la fecha
+La etiqueta date_hierarchy de Django obtiene los años, meses o días con un
+SELECT DISTINCT de la fecha truncada, que lee todas las filas del rango.
+jerarquia_fechas muestra lo mismo, pero cada opción sale de una búsqueda en
+el índice (la primera fecha desde el inicio del periodo siguiente), así que
+el coste depende del número de opciones y no del de filas
+"""
+
+import datetime
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+from django.contrib.admin.utils import get_fields_from_path
+from django.db import models
+
+register = template.Library()
+
+
+def _inicio(fecha, nivel):
+    if nivel == 'year':
+        return datetime.date(fecha.year, 1, 1)
+    if nivel == 'month':
+        return datetime.date(fecha.year, fecha.month, 1)
+    return fecha
+
+
+def _siguiente(inicio, nivel):
+    if nivel == 'year':
+        return datetime.date(inicio.year + 1, 1, 1)
+    if nivel == 'month':
+        return datetime.date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+    return inicio + datetime.timedelta(days=1)
+
+
+class _FechasIndexadas:
+    """Lo que date_hierarchy usa del queryset, resuelto con búsquedas en el índice"""
+
+    def __init__(self, queryset, campo):
+        self.campo = campo
+        self.fechas = queryset.order_by(campo).values_list(campo, flat=True)
+
+    def aggregate(self, first, last):
+        return {'first': self.fechas.first(), 'last': self.fechas.last()}
+
+    def dates(self, campo, nivel):
+        resultado = []
+        fecha = self.fechas.first()
+        while fecha is not None:
+            inicio = _inicio(fecha, nivel)
+            resultado.append(inicio)
+            fecha = self.fechas.filter(**{f'{self.campo}__gte': _siguiente(inicio, nivel)}).first()
+        return resultado
+
+
+class _ListadoIndexado:
+    """ChangeList con el queryset sustituido por _FechasIndexadas"""
+
+    def __init__(self, cl):
+        self._cl = cl
+        self.queryset = _FechasIndexadas(cl.queryset, cl.date_hierarchy)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cl, nombre)
+
+
+def jerarquia_fechas(cl):
+    """date_hierarchy con búsquedas en el índice para campos DateField"""
+    campo = get_fields_from_path(cl.model, cl.date_hierarchy)[-1]
+    if isinstance(campo, models.DateTimeField):
+        return date_hierarchy(cl)
+    return date_hierarchy(_ListadoIndexado(cl))
+
+
+@register.tag(name='jerarquia_fechas')
+def jerarquia_fechas_tag(parser, token):
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=jerarquia_fechas,
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
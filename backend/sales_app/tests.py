@@ -0,0 +1,1264 @@
+import base64
+import csv
+import json
+import os
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.connection import ConnectionDoesNotExist
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from . import (
+    archivo, busqueda, cache_respuestas, comisiones, edicion_masiva, exportacion, listados, metricas,
+    recalculo, renderers, replica, resumen_diario, tareas, versiones
+)
+from .models import (
+    ComisionCalculada, ImportacionVentas, ReglaComision, ResumenDiarioVenta, TareaComision, Vendedor,
+    Venta, VentaArchivada, VentaEliminada
+)
+from .serializers import VentaSerializer
+
+
+def crear_vendedores(cantidad, fecha, prefijo):
+    """Crea vendedores con dos ventas cada uno en la fecha indicada"""
+    for indice in range(cantidad):
+        vendedor = Vendedor.objects.create(
+            nombre=f'Nombre{indice}',
+            apellido=f'{prefijo}{indice}',
+            email=f'{prefijo.lower()}{indice}@ventaspro.com'
+        )
+        for monto in ('150.00', '1250.50'):
+            Venta.objects.create(vendedor=vendedor, fecha=fecha, monto=Decimal(monto))
+
+
+class ReglasComisionTests(TestCase):
+    """Tabla de reglas en memoria invalidada entre procesos"""
+
+    def test_cambio_en_otro_proceso_recarga_la_tabla(self):
+        regla = ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('3'))
+        self.assertEqual(comisiones.obtener_tabla().calcular(Decimal('100'))[1], Decimal('3.00'))
+
+        # Otro worker, con su propia caché en memoria, cambia la regla
+        with mock.patch.object(versiones, 'cache', LocMemCache('otro-proceso', {})):
+            ReglaComision.objects.filter(pk=regla.pk).update(porcentaje=Decimal('5'))
+            versiones.publicar(comisiones.CLAVE_VERSION)
+
+        self.assertEqual(comisiones.obtener_tabla().calcular(Decimal('100'))[1], Decimal('5.00'))
+
+
+class CalculoComisionesTests(TestCase):
+    """Cálculo de comisiones por período"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('3'))
+        ReglaComision.objects.create(nombre='Media', monto_minimo=Decimal('1000'), porcentaje=Decimal('7.5'))
+
+    def setUp(self):
+        cache.clear()
+
+    def calcular(self, fecha_inicio, fecha_fin):
+        return self.client.post(
+            '/api/comisiones/calcular/',
+            {'fecha_inicio': fecha_inicio, 'fecha_fin': fecha_fin},
+            content_type='application/json'
+        )
+
+    def test_consultas_constantes_con_mas_vendedores(self):
+        """El número de consultas no depende de cuántos vendedores haya"""
+        crear_vendedores(5, date(2024, 1, 15), 'Enero')
+        crear_vendedores(50, date(2024, 2, 15), 'Febrero')
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.calcular('2024-01-01', '2024-01-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+
+        cache.clear()
+        with self.assertNumQueries(len(consultas)):
+            response = self.calcular('2024-02-01', '2024-02-29')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 50)
+
+    def test_venta_confirmada_tarde_se_recalcula(self):
+        """Una venta guardada antes del cálculo pero confirmada después no se pierde"""
+        crear_vendedores(1, date(2024, 3, 15), 'Marzo')
+        vendedor = Vendedor.objects.get()
+        comisiones.calcular_periodo(date(2024, 3, 1), date(2024, 3, 31), detalle=False)
+
+        # fecha_modificacion anterior al cálculo, como la de una transacción
+        # que seguía abierta mientras se calculaba
+        venta = Venta.objects.create(vendedor=vendedor, fecha=date(2024, 3, 20), monto=Decimal('100.00'))
+        Venta.objects.filter(pk=venta.pk).update(fecha_modificacion=timezone.now() - timedelta(seconds=30))
+
+        periodo = comisiones.calcular_periodo(date(2024, 3, 1), date(2024, 3, 31), detalle=False)
+        self.assertEqual(periodo[0]['numero_ventas'], 3)
+        self.assertEqual(periodo[0]['total_ventas'], Decimal('1500.50'))
+
+    def test_bajas_antiguas_se_podan_tras_el_calculo(self):
+        """Solo quedan las bajas que algún cálculo guardado todavía no ha visto"""
+        crear_vendedores(2, date(2024, 4, 15), 'Abril')
+        primero, segundo = Vendedor.objects.order_by('id')
+        comisiones.calcular_periodo(date(2024, 4, 1), date(2024, 4, 30), detalle=False)
+
+        # La baja de primero es posterior a su cálculo; la de segundo, anterior
+        antigua = timezone.now() - timedelta(hours=1)
+        Venta.objects.filter(vendedor=primero).first().delete()
+        Venta.objects.filter(vendedor=segundo).first().delete()
+        VentaEliminada.objects.update(fecha_eliminacion=antigua)
+        ComisionCalculada.objects.filter(vendedor=primero).update(fecha_calculo=antigua - timedelta(hours=1))
+        ComisionCalculada.objects.filter(vendedor=segundo).update(fecha_calculo=antigua + timedelta(minutes=1))
+
+        # Un período sin ventas: solo poda
+        comisiones.calcular_periodo(date(2024, 5, 1), date(2024, 5, 31), detalle=False)
+        self.assertEqual(list(VentaEliminada.objects.values_list('vendedor_id', flat=True)), [primero.id])
+
+        periodo = comisiones.calcular_periodo(date(2024, 4, 1), date(2024, 4, 30), detalle=False)
+        self.assertEqual([fila['numero_ventas'] for fila in periodo], [1, 1])
+        self.assertFalse(VentaEliminada.objects.exists())
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Usa EXPLAIN QUERY PLAN de SQLite')
+class PlanesConsultaTests(TestCase):
+    """Los endpoints principales no recorren completas las tablas grandes"""
+
+    TABLAS_VIGILADAS = ['ventas', 'ventas_archivadas', 'reglas_comision', 'comisiones_calculadas']
+
+    RANGO = {'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-01-31'}
+
+    # (nombre, método, url, datos)
+    ENDPOINTS = [
+        ('ventas-list', 'get', '/api/ventas/', RANGO),
+        ('ventas-list (vendedor)', 'get', '/api/ventas/', {**RANGO, 'vendedor': 1}),
+        ('ventas-estadisticas', 'get', '/api/ventas/estadisticas/', RANGO),
+        ('comisiones-calcular', 'post', '/api/comisiones/calcular/', RANGO),
+        ('comisiones-resumen', 'get', '/api/comisiones/resumen/', RANGO),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        vendedor = Vendedor.objects.create(id=1, nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('3'))
+        ReglaComision.objects.create(nombre='Premium', monto_minimo=Decimal('1000'), porcentaje=Decimal('7.5'))
+        for dia in range(1, 4):
+            Venta.objects.create(vendedor=vendedor, fecha=date(2025, 1, dia), monto=Decimal('750'))
+        ComisionCalculada.objects.create(
+            vendedor=vendedor,
+            fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 1, 31)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def scans_completos(self, consultas):
+        """(sql, detalle) de los SELECT con SCAN sin índice de una tabla vigilada"""
+        problemas = []
+        for consulta in consultas.captured_queries:
+            sql = consulta['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                except OperationalError:
+                    # Consulta que ya falló al ejecutarse (sqlite_stat1 antes de ANALYZE)
+                    continue
+                for fila in cursor.fetchall():
+                    partes = fila[-1].split()
+                    if (
+                        len(partes) >= 2 and partes[0] == 'SCAN'
+                        and partes[1] in self.TABLAS_VIGILADAS and 'INDEX' not in fila[-1]
+                    ):
+                        problemas.append((sql, fila[-1]))
+        return problemas
+
+    def test_endpoints_usan_indices(self):
+        for nombre, metodo, url, datos in self.ENDPOINTS:
+            with self.subTest(endpoint=nombre):
+                cache.clear()
+                with CaptureQueriesContext(connection) as consultas:
+                    if metodo == 'post':
+                        response = self.client.post(url, datos, content_type='application/json')
+                    else:
+                        response = self.client.get(url, datos)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.scans_completos(consultas), [])
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_admin_ventas_usa_indices(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@ventaspro.com', 'clave'))
+        filtros = [
+            {},
+            {'fecha__gte': '2025-01-01', 'fecha__lt': '2025-02-01'},
+            {'vendedor__id__exact': 1},
+        ]
+        for filtro in filtros:
+            with self.subTest(filtro=filtro):
+                with CaptureQueriesContext(connection) as consultas:
+                    response = self.client.get('/admin/sales_app/venta/', filtro)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.scans_completos(consultas), [])
+
+    def test_reglas_activas_usan_indice(self):
+        with CaptureQueriesContext(connection) as consultas:
+            comisiones.cargar_tabla()
+        self.assertEqual(self.scans_completos(consultas), [])
+
+
+class TareasComisionTests(TestCase):
+    """Recuperación de tareas cuya ejecución se interrumpió"""
+
+    def crear_tarea(self, intentos, segundos_sin_latido):
+        return TareaComision.objects.create(
+            fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 1, 31),
+            estado=TareaComision.EN_PROCESO,
+            intentos=intentos,
+            fecha_latido=timezone.now() - timedelta(seconds=segundos_sin_latido)
+        )
+
+    def test_tarea_sin_latido_se_reclama_de_nuevo(self):
+        vencida = self.crear_tarea(intentos=1, segundos_sin_latido=3600)
+        self.crear_tarea(intentos=1, segundos_sin_latido=10)
+
+        self.assertEqual(tareas.siguiente_pendiente(), (vencida.id, 2))
+        vencida.refresh_from_db()
+        self.assertEqual(vencida.estado, TareaComision.EN_PROCESO)
+        self.assertEqual(vencida.intentos, 2)
+        self.assertIsNone(tareas.siguiente_pendiente())
+
+    def test_tarea_sin_intentos_queda_en_error(self):
+        tarea = self.crear_tarea(intentos=tareas.MAXIMO_INTENTOS, segundos_sin_latido=3600)
+
+        response = self.client.get(f'/api/comisiones/tareas/{tarea.id}/')
+        self.assertEqual(response.json()['estado'], TareaComision.ERROR)
+        self.assertIsNone(tareas.siguiente_pendiente())
+
+    def test_ejecucion_reencolada_no_pisa_a_la_siguiente(self):
+        tarea = TareaComision.objects.create(fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 1, 31))
+        primera = tareas.reclamar(tarea.id)
+
+        # La primera ejecución sigue viva pero sin latido dentro del plazo
+        TareaComision.objects.filter(pk=tarea.pk).update(
+            fecha_latido=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(tareas.siguiente_pendiente(), (tarea.id, primera + 1))
+
+        # La ejecución antigua termina tarde: no guarda nada
+        tareas.ejecutar(tarea.id, primera)
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, TareaComision.EN_PROCESO)
+        self.assertIsNone(tarea.resultado)
+
+        tareas.ejecutar(tarea.id, primera + 1)
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, TareaComision.COMPLETADA)
+        self.assertEqual(tarea.resultado, [])
+        self.assertIsNone(tareas.reclamar(tarea.id))
+
+    def test_latido_se_renueva_sin_avances(self):
+        ejecucion = mock.Mock()
+        # Tres renovaciones; en la tercera la tarea ya no es de esta ejecución
+        ejecucion.update.side_effect = [1, 1, 0]
+        latido = tareas._Latido(ejecucion, 0.001)
+        latido.start()
+        latido.join(timeout=5)
+        self.assertFalse(latido.is_alive())
+        self.assertEqual(ejecucion.update.call_count, 3)
+
+
+class RecalculoComisionesTests(TestCase):
+    """Recálculo de comisiones cuando cambian las reglas"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_recalculo_incluye_ventas_archivadas(self):
+        regla = ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('3'))
+        vendedor = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        Venta.objects.create(vendedor=vendedor, fecha=date(2024, 1, 10), monto=Decimal('1000'))
+        Venta.objects.create(vendedor=vendedor, fecha=date(2024, 2, 10), monto=Decimal('1000'))
+        with self.captureOnCommitCallbacks(execute=True):
+            archivo.archivar_mes(date(2024, 1, 1))
+        comisiones.calcular_periodo(date(2024, 1, 1), date(2024, 2, 29), detalle=False)
+
+        regla.porcentaje = Decimal('5')
+        regla.save()
+        call_command('recalcular_comisiones', '--desde=2024-01-01', '--hasta=2024-02-29', stdout=StringIO())
+
+        self.assertEqual(VentaArchivada.objects.get().comision_calculada, Decimal('50.00'))
+        self.assertEqual(Venta.objects.get().comision_calculada, Decimal('50.00'))
+        periodo = comisiones.calcular_periodo(date(2024, 1, 1), date(2024, 2, 29), detalle=False)
+        self.assertEqual(periodo[0]['total_comision'], Decimal('100.00'))
+
+    # Bordes de tramo y montos cuya comisión cae justo en medio centavo
+    MONTOS = (
+        '9.99', '10.00', '10.01', '10.20', '999.99', '1000.00', '1000.01', '1234.58',
+        '4999.99', '5000.00', '5000.01', '99999999.99'
+    )
+    REGLAS = (('10.00', '2.50'), ('1000.00', '7.25'), ('5000.00', '10.00'))
+
+    def crear_ventas(self):
+        ana = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        luis = Vendedor.objects.create(nombre='Luis', apellido='Gil', email='luis@ventaspro.com')
+        for indice, monto in enumerate(self.MONTOS):
+            Venta.objects.create(
+                vendedor=(ana, luis)[indice % 2], fecha=date(2025, 1, 1) + timedelta(days=indice),
+                monto=Decimal(monto)
+            )
+        return ana, luis
+
+    def tabla(self):
+        return comisiones.TablaReglas((Decimal(minimo), Decimal(p)) for minimo, p in self.REGLAS)
+
+    def test_case_en_sql_coincide_con_tabla_reglas(self):
+        self.crear_ventas()
+        tabla = self.tabla()
+
+        actualizadas = recalculo.recalcular(Venta.objects.all(), tabla, dias_por_lote=5)
+        self.assertEqual(actualizadas, len(self.MONTOS))
+        for monto, porcentaje, comision in Venta.objects.values_list(
+            'monto', 'porcentaje_aplicado', 'comision_calculada'
+        ):
+            with self.subTest(monto=monto):
+                self.assertEqual((porcentaje, comision), tabla.calcular(monto))
+
+    def test_simulacion_coincide_con_tabla_reglas(self):
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('1'))
+        ana, luis = self.crear_ventas()
+        tabla = self.tabla()
+
+        response = self.client.post('/api/comisiones/simular/', {
+            'fecha_inicio': '2025-01-01',
+            'fecha_fin': '2025-12-31',
+            'reglas': [{'monto_minimo': minimo, 'porcentaje': p} for minimo, p in self.REGLAS],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        esperado = {}
+        for vendedor_id, monto in Venta.objects.values_list('vendedor_id', 'monto'):
+            esperado[vendedor_id] = esperado.get(vendedor_id, Decimal('0')) + tabla.calcular(monto)[1]
+        self.assertEqual(
+            [(fila['vendedor_id'], Decimal(str(fila['total_nuevo']))) for fila in response.json()['vendedores']],
+            [(luis.id, esperado[luis.id]), (ana.id, esperado[ana.id])]
+        )
+        # No escribe nada
+        self.assertEqual(
+            set(Venta.objects.values_list('porcentaje_aplicado', flat=True)), {Decimal('1.00')}
+        )
+
+
+class ListadoRapidoTests(TestCase):
+    """El listado rápido de ventas produce lo mismo que VentaSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('100'), porcentaje=Decimal('3.25'))
+        cls.vendedor = Vendedor.objects.create(nombre='José', apellido='Ñúñez Çelik', email='jose@ventaspro.com')
+        descripciones = (
+            None, '', 'ñandú "entre comillas" \\ barra', 'separador\u2028de línea 😀'
+        )
+        for dia, descripcion in enumerate(descripciones, start=1):
+            Venta.objects.create(
+                vendedor=cls.vendedor,
+                fecha=date(2025, 1, dia),
+                monto=Decimal('1234.5'),
+                descripcion=descripcion
+            )
+        # Por debajo del primer tramo: comisión y porcentaje en cero
+        Venta.objects.create(vendedor=cls.vendedor, fecha=date(2025, 1, 9), monto=Decimal('0.01'))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_listado_identico_a_serializer(self):
+        ventas = Venta.objects.select_related('vendedor')
+        esperado = JSONRenderer().render({
+            'count': ventas.count(),
+            'next': None,
+            'previous': None,
+            'results': VentaSerializer(ventas, many=True).data,
+        })
+
+        response = self.client.get('/api/ventas/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, esperado)
+
+    def test_valores_nulos_identicos_a_serializer(self):
+        venta = Venta.objects.select_related('vendedor').first()
+        venta.porcentaje_aplicado = None
+        venta.comision_calculada = None
+        fila = {
+            **{campo: getattr(venta, campo) for campo in (
+                'id', 'fecha', 'monto', 'descripcion',
+                'comision_calculada', 'porcentaje_aplicado', 'fecha_registro'
+            )},
+            'vendedor': venta.vendedor_id,
+            'vendedor_nombre': venta.vendedor.nombre,
+            'vendedor_apellido': venta.vendedor.apellido,
+            'vendedor_completo': f'{venta.vendedor.nombre} {venta.vendedor.apellido}',
+        }
+
+        self.assertEqual(
+            JSONRenderer().render(listados.formatear_ventas([fila])),
+            JSONRenderer().render([VentaSerializer(venta).data])
+        )
+
+
+    @skipUnless(renderers.orjson, 'Sin orjson el renderer delega en JSONRenderer')
+    def test_renderer_rapido_identico_con_valores_sin_serializar(self):
+        datos = {
+            'decimales': [
+                Decimal('1234.50'), Decimal('0.01'), Decimal('-3'), Decimal('1E+20'), Decimal('0.00001')
+            ],
+            'fechas': [date(2025, 1, 2), timezone.now(), datetime(2025, 1, 2, 3, 4, 5, 123456)],
+            'texto': gettext_lazy('Ventas'),
+            'id': uuid.UUID(int=1),
+        }
+        # Sin exponentes lo codifica orjson; con ellos delega en JSONRenderer
+        for valores in ({**datos, 'decimales': datos['decimales'][:3]}, datos):
+            with self.subTest(decimales=valores['decimales']):
+                self.assertEqual(
+                    renderers.JSONRapidoRenderer().render(valores),
+                    JSONRenderer().render(valores)
+                )
+
+class ListadoArchivoTests(TestCase):
+    """Listados sin fecha de inicio cuando hay ventas archivadas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        vendedor = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        cls.archivada = Venta.objects.create(vendedor=vendedor, fecha=date(2024, 1, 10), monto=Decimal('10'))
+        archivo.archivar_mes(date(2024, 1, 1))
+        # Registrada después de archivar con una fecha del mes archivado
+        cls.atrasada = Venta.objects.create(vendedor=vendedor, fecha=date(2024, 1, 20), monto=Decimal('20'))
+        cls.recientes = Venta.objects.bulk_create([
+            Venta(vendedor=vendedor, fecha=date(2024, 2, 1) + timedelta(days=dia), monto=Decimal('30'))
+            for dia in range(100)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def esperado(self):
+        return [self.recientes[dia].id for dia in reversed(range(100))] + [self.atrasada.id, self.archivada.id]
+
+    def test_primera_pagina_solo_lee_la_tabla_caliente(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/ventas/')
+        datos = response.json()
+        self.assertEqual(datos['count'], 102)
+        self.assertEqual([venta['id'] for venta in datos['results']], self.esperado()[:100])
+        lecturas = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if 'ventas_historico' in consulta['sql'] and 'COUNT(' not in consulta['sql']
+        ]
+        self.assertEqual(lecturas, [])
+
+        response = self.client.get('/api/ventas/', {'page': 2})
+        self.assertEqual([venta['id'] for venta in response.json()['results']], self.esperado()[100:])
+
+    def test_paginas_por_cursor_y_asincronas(self):
+        for url in ('/api/ventas/', '/api/async/ventas/'):
+            with self.subTest(url=url):
+                ids = []
+                siguiente = f'{url}?paginacion=cursor'
+                while siguiente is not None:
+                    datos = self.client.get(siguiente).json()
+                    ids += [venta['id'] for venta in datos['results']]
+                    siguiente = datos['next']
+                self.assertEqual(ids, self.esperado())
+
+                datos = self.client.get(url, {'page': 2}).json()
+                self.assertEqual([venta['id'] for venta in datos['results']], self.esperado()[100:])
+
+    def test_cursor_malformado_responde_404(self):
+        cursores = {
+            'no es base64': '%%%',
+            'no es una lista': base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+            'faltan valores': base64.urlsafe_b64encode(b'["2024-01-01", 5]').decode(),
+            'tipos incorrectos': 'WyJ4IiwieSIsInoiXQ==',
+            'valor nulo': base64.urlsafe_b64encode(b'[null, "2024-01-01T00:00:00+00:00", 5]').decode(),
+        }
+        comision = base64.urlsafe_b64encode(b'["x", "y"]').decode()
+        pruebas = [
+            (url, caso, cursor)
+            for url in ('/api/ventas/', '/api/async/ventas/')
+            for caso, cursor in cursores.items()
+        ] + [
+            (url, 'tipos incorrectos', comision)
+            for url in ('/api/comisiones/resumen/', '/api/async/comisiones/resumen/')
+        ]
+        for url, caso, cursor in pruebas:
+            with self.subTest(url=url, caso=caso):
+                response = self.client.get(url, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json()['detail'], 'Cursor inválido')
+
+    def test_archivo_de_otro_proceso_se_ve_en_el_listado(self):
+        vendedor = Vendedor.objects.get()
+        venta = Venta.objects.create(vendedor=vendedor, fecha=date(2024, 1, 25), monto=Decimal('40'))
+        self.assertEqual(self.client.get('/api/ventas/', {'page': 2}).json()['count'], 103)
+
+        # Archivado desde otro proceso: aquí no se ejecuta ningún on_commit
+        archivo.archivar_mes(date(2024, 1, 1))
+
+        datos = self.client.get('/api/ventas/', {'page': 2}).json()
+        self.assertEqual(datos['count'], 103)
+        self.assertEqual(
+            [fila['id'] for fila in datos['results']],
+            [venta.id, self.atrasada.id, self.archivada.id]
+        )
+
+    def test_exportacion_incluye_el_archivo(self):
+        response = self.client.get('/api/ventas/exportar/', {'formato': 'ndjson'})
+        filas = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(fila)['id'] for fila in filas], self.esperado())
+
+
+class CacheRespuestasReplicaTests(TestCase):
+    """Las respuestas que se guardan en caché se calculan en la réplica si ya tiene la versión"""
+    URLS = ('/api/ventas/estadisticas/', '/api/async/ventas/estadisticas/')
+
+    @classmethod
+    def setUpTestData(cls):
+        vendedor = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        Venta.objects.create(vendedor=vendedor, fecha=date(2025, 1, 10), monto=Decimal('100'))
+
+    def setUp(self):
+        cache.clear()
+
+    def pedir(self, url, al_dia):
+        # El alias `replica` no existe: cualquier lectura en él falla
+        with mock.patch.object(replica, 'disponible', return_value=True), \
+                mock.patch.object(versiones, 'al_dia', return_value=al_dia) as comprobar, \
+                mock.patch.object(versiones, 'aal_dia', return_value=al_dia) as acomprobar:
+            response = self.client.get(url)
+        llamada, = comprobar.call_args_list + acomprobar.call_args_list
+        self.assertEqual(
+            llamada.args,
+            ('replica', cache_respuestas.CLAVE_VERSION, cache_respuestas.version_datos())
+        )
+        return response
+
+    def test_replica_atrasada_se_calcula_en_la_principal(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.pedir(url, al_dia=False)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['numero_ventas'], 1)
+
+    def test_replica_al_dia_se_calcula_en_ella(self):
+        for url in self.URLS:
+            with self.subTest(url=url), self.assertRaises(ConnectionDoesNotExist):
+                self.pedir(url, al_dia=True)
+
+    def test_marca_en_la_base_de_datos(self):
+        """La réplica se compara con la marca de la tabla, también con caché compartida"""
+        with override_settings(CACHE_COMPARTIDA=True):
+            version = versiones.publicar(cache_respuestas.CLAVE_VERSION)
+            self.assertTrue(versiones.al_dia('default', cache_respuestas.CLAVE_VERSION, version))
+
+            # Con la entrada expulsada se repuebla desde la tabla
+            cache.clear()
+            self.assertEqual(cache_respuestas.version_datos(), version)
+
+            versiones.publicar(cache_respuestas.CLAVE_VERSION)
+        self.assertFalse(versiones.al_dia('default', cache_respuestas.CLAVE_VERSION, version))
+
+
+class ResumenDiarioTests(TestCase):
+    """El resumen diario mantenido por deltas coincide con el reconstruido desde las ventas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('3'))
+        ReglaComision.objects.create(nombre='Media', monto_minimo=Decimal('1000'), porcentaje=Decimal('7.5'))
+        cls.ana = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        cls.luis = Vendedor.objects.create(nombre='Luis', apellido='Gil', email='luis@ventaspro.com')
+
+    def resumen(self):
+        return {
+            (fila.vendedor_id, fila.fecha): (fila.total_ventas, fila.total_comision, fila.numero_ventas)
+            for fila in ResumenDiarioVenta.objects.all()
+        }
+
+    def assertResumen(self, esperado):
+        self.assertEqual(self.resumen(), esperado)
+        resumen_diario.reconstruir()
+        self.assertEqual(self.resumen(), esperado)
+
+    def test_alta_cambio_de_monto_y_baja(self):
+        dia = date(2025, 6, 1)
+        venta = Venta.objects.create(vendedor=self.ana, fecha=dia, monto=Decimal('500'))
+        Venta.objects.create(vendedor=self.ana, fecha=dia, monto=Decimal('100'))
+        self.assertResumen({(self.ana.id, dia): (Decimal('600.00'), Decimal('18.00'), 2)})
+
+        # Sube de tramo: cambian el monto y la comisión
+        response = self.client.patch(
+            f'/api/ventas/{venta.id}/', {'monto': '1000.00'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertResumen({(self.ana.id, dia): (Decimal('1100.00'), Decimal('78.00'), 2)})
+
+        self.client.delete(f'/api/ventas/{venta.id}/')
+        self.assertResumen({(self.ana.id, dia): (Decimal('100.00'), Decimal('3.00'), 1)})
+
+        Venta.objects.get().delete()
+        self.assertResumen({})
+
+    def test_cambio_de_vendedor_y_de_fecha(self):
+        primero, segundo = date(2025, 6, 1), date(2025, 6, 2)
+        venta = Venta.objects.create(vendedor=self.ana, fecha=primero, monto=Decimal('200'))
+        Venta.objects.create(vendedor=self.ana, fecha=primero, monto=Decimal('100'))
+
+        venta.vendedor = self.luis
+        venta.save()
+        self.assertResumen({
+            (self.ana.id, primero): (Decimal('100.00'), Decimal('3.00'), 1),
+            (self.luis.id, primero): (Decimal('200.00'), Decimal('6.00'), 1),
+        })
+
+        response = self.client.patch(
+            f'/api/ventas/{venta.id}/',
+            {'vendedor': self.ana.id, 'fecha': '2025-06-02'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertResumen({
+            (self.ana.id, primero): (Decimal('100.00'), Decimal('3.00'), 1),
+            (self.ana.id, segundo): (Decimal('200.00'), Decimal('6.00'), 1),
+        })
+
+    def test_carga_con_muchas_claves_crea_las_filas_de_una_vez(self):
+        Venta.objects.create(vendedor=self.ana, fecha=date(2025, 7, 1), monto=Decimal('10'))
+        filas = [
+            {'vendedor': vendedor.id, 'fecha': (date(2025, 7, 1) + timedelta(days=dia)).isoformat(), 'monto': '10'}
+            for dia in range(15)
+            for vendedor in (self.ana, self.luis)
+        ]
+        response = self.client.post('/api/ventas/bulk/', filas, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+        esperado = {
+            (vendedor.id, date(2025, 7, 1) + timedelta(days=dia)): (Decimal('10.00'), Decimal('0.30'), 1)
+            for dia in range(15)
+            for vendedor in (self.ana, self.luis)
+        }
+        esperado[(self.ana.id, date(2025, 7, 1))] = (Decimal('20.00'), Decimal('0.60'), 2)
+        self.assertResumen(esperado)
+
+
+class ImportacionVentasTests(TestCase):
+    """Importación reanudable de ventas desde CSV"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('3'))
+        cls.ana = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        self.ruta = os.path.join(self.directorio, 'ventas.csv')
+
+    def escribir_csv(self, lineas):
+        with open(self.ruta, 'w', encoding='utf-8-sig', newline='') as archivo:
+            archivo.write('\r\n'.join(lineas) + '\r\n')
+
+    def importar(self, *argumentos):
+        salida = StringIO()
+        call_command('importar_ventas', self.ruta, *argumentos, stdout=salida, stderr=StringIO())
+        return salida.getvalue()
+
+    def test_importa_y_registra_rechazadas(self):
+        self.escribir_csv([
+            'Vendedor_Email,fecha,monto,descripcion',
+            'ANA@ventaspro.com,2025-08-01,100.00,"Con, coma"',
+            'nadie@ventaspro.com,2025-08-01,50.00,',
+            'ana@ventaspro.com,2025-08-02,-5,',
+            'ana@ventaspro.com,2025-08-02,200,',
+        ])
+        rechazadas = os.path.join(self.directorio, 'rechazadas.csv')
+        self.importar('--lote=2', f'--rechazadas={rechazadas}')
+
+        self.assertEqual(
+            list(Venta.objects.order_by('fecha').values_list(
+                'fecha', 'monto', 'descripcion', 'comision_calculada'
+            )),
+            [
+                (date(2025, 8, 1), Decimal('100.00'), 'Con, coma', Decimal('3.00')),
+                (date(2025, 8, 2), Decimal('200.00'), None, Decimal('6.00')),
+            ]
+        )
+        self.assertEqual(
+            dict(ResumenDiarioVenta.objects.values_list('fecha', 'numero_ventas')),
+            {date(2025, 8, 1): 1, date(2025, 8, 2): 1}
+        )
+        with open(rechazadas, encoding='utf-8') as archivo:
+            filas = list(csv.reader(archivo))
+        self.assertEqual(filas[0][0], 'fila')
+        self.assertEqual([(fila[0], fila[1]) for fila in filas[1:]], [
+            ('2', 'nadie@ventaspro.com'), ('3', 'ana@ventaspro.com')
+        ])
+
+        importacion = ImportacionVentas.objects.get()
+        self.assertEqual((importacion.filas, importacion.creadas, importacion.rechazadas), (4, 2, 2))
+        self.assertTrue(importacion.completada)
+        self.assertIn('ya se importó', self.importar())
+        self.assertEqual(Venta.objects.count(), 2)
+
+    def test_reanuda_tras_una_interrupcion(self):
+        self.escribir_csv(['vendedor_email,fecha,monto'] + [
+            f'ana@ventaspro.com,2025-08-0{dia},{dia}0' for dia in range(1, 6)
+        ])
+        aplicar = resumen_diario.Deltas.aplicar
+        llamadas = []
+
+        def interrumpir_segundo_lote(deltas):
+            llamadas.append(deltas)
+            if len(llamadas) == 2:
+                raise KeyboardInterrupt
+            return aplicar(deltas)
+
+        with mock.patch.object(resumen_diario.Deltas, 'aplicar', autospec=True, side_effect=interrumpir_segundo_lote):
+            with self.assertRaises(KeyboardInterrupt):
+                self.importar('--lote=2')
+        self.assertEqual(Venta.objects.count(), 2)
+        self.assertFalse(ImportacionVentas.objects.get().completada)
+
+        self.assertIn('Reanudando', self.importar('--lote=2'))
+        self.assertEqual(
+            sorted(Venta.objects.values_list('monto', flat=True)),
+            [Decimal(f'{dia}0.00') for dia in range(1, 6)]
+        )
+        importacion = ImportacionVentas.objects.get()
+        self.assertEqual((importacion.filas, importacion.creadas), (5, 5))
+
+    def test_archivo_cambiado_exige_reiniciar(self):
+        self.escribir_csv(['vendedor_email,fecha,monto', 'ana@ventaspro.com,2025-08-01,10'])
+        self.importar()
+        self.escribir_csv(['vendedor_email,fecha,monto', 'ana@ventaspro.com,2025-08-01,20'])
+        with self.assertRaisesMessage(CommandError, 'El archivo cambió'):
+            self.importar()
+
+        self.importar('--reiniciar')
+        self.assertEqual(
+            sorted(Venta.objects.values_list('monto', flat=True)), [Decimal('10.00'), Decimal('20.00')]
+        )
+
+    def test_cabecera_incompleta(self):
+        self.escribir_csv(['vendedor_email,monto', 'ana@ventaspro.com,10'])
+        with self.assertRaisesMessage(CommandError, 'Faltan columnas en la cabecera: fecha'):
+            self.importar()
+
+
+class SerieVentasTests(TestCase):
+    """Serie temporal de ventas agrupada por día, semana o mes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('10'))
+        cls.ana = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        cls.luis = Vendedor.objects.create(nombre='Luis', apellido='Gil', email='luis@ventaspro.com')
+        # 2025-01-01 es miércoles y 2025-01-06 lunes
+        for vendedor, dia, monto in (
+            (cls.ana, date(2025, 1, 1), '100'),
+            (cls.ana, date(2025, 1, 3), '50'),
+            (cls.luis, date(2025, 1, 3), '20'),
+            (cls.ana, date(2025, 1, 6), '10'),
+            (cls.luis, date(2025, 2, 10), '40'),
+        ):
+            Venta.objects.create(vendedor=vendedor, fecha=dia, monto=Decimal(monto))
+
+    def setUp(self):
+        cache.clear()
+
+    def serie(self, **parametros):
+        response = self.client.get('/api/ventas/serie/', parametros)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def puntos(self, serie):
+        return [(punto['periodo'], punto['total_ventas'], punto['numero_ventas']) for punto in serie]
+
+    def test_por_dia_rellena_los_dias_sin_ventas(self):
+        datos = self.serie(fecha_inicio='2025-01-01', fecha_fin='2025-01-06')
+        self.assertEqual(datos['agrupacion'], 'dia')
+        self.assertEqual(self.puntos(datos['serie']), [
+            ('2025-01-01', 100.0, 1),
+            ('2025-01-02', 0.0, 0),
+            ('2025-01-03', 70.0, 2),
+            ('2025-01-04', 0.0, 0),
+            ('2025-01-05', 0.0, 0),
+            ('2025-01-06', 10.0, 1),
+        ])
+        self.assertEqual(datos['serie'][2]['total_comision'], 7.0)
+
+    def test_por_semana_y_por_mes(self):
+        semanas = self.serie(agrupacion='semana')['serie']
+        self.assertEqual(self.puntos(semanas)[:3], [
+            ('2024-12-30', 170.0, 3),
+            ('2025-01-06', 10.0, 1),
+            ('2025-01-13', 0.0, 0),
+        ])
+        self.assertEqual(semanas[-1]['periodo'], '2025-02-10')
+        self.assertEqual(len(semanas), 7)
+
+        meses = self.serie(agrupacion='mes', fecha_fin='2025-03-31')['serie']
+        self.assertEqual(self.puntos(meses), [
+            ('2025-01-01', 180.0, 4),
+            ('2025-02-01', 40.0, 1),
+            ('2025-03-01', 0.0, 0),
+        ])
+
+    def test_por_vendedor_con_filtros(self):
+        datos = self.serie(
+            agrupacion='mes', por_vendedor='true', fecha_inicio='2025-01-01', fecha_fin='2025-02-28'
+        )
+        self.assertNotIn('serie', datos)
+        self.assertEqual(
+            [(vendedor['vendedor_apellido'], self.puntos(vendedor['serie'])) for vendedor in datos['vendedores']],
+            [
+                ('Gil', [('2025-01-01', 20.0, 1), ('2025-02-01', 40.0, 1)]),
+                ('Ruiz', [('2025-01-01', 160.0, 3), ('2025-02-01', 0.0, 0)]),
+            ]
+        )
+
+        datos = self.serie(agrupacion='mes', por_vendedor='1', vendedor=self.ana.id)
+        self.assertEqual([vendedor['vendedor_id'] for vendedor in datos['vendedores']], [self.ana.id])
+
+    def test_parametros_invalidos(self):
+        for parametros in (
+            {'agrupacion': 'hora'},
+            {'fecha_inicio': '01/01/2025'},
+            {'fecha_inicio': '2000-01-01', 'fecha_fin': '2025-01-01'},
+        ):
+            with self.subTest(parametros=parametros):
+                response = self.client.get('/api/ventas/serie/', parametros)
+                self.assertEqual(response.status_code, 400)
+
+
+class DetalleComisionesTests(TestCase):
+    """Totales sin detalle en calcular y detalle paginado por vendedor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('3'))
+        cls.ana = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        cls.luis = Vendedor.objects.create(nombre='Luis', apellido='Gil', email='luis@ventaspro.com')
+        cls.archivada = Venta.objects.create(vendedor=cls.ana, fecha=date(2025, 1, 31), monto=Decimal('5'))
+        archivo.archivar_mes(date(2025, 1, 1))
+        for dia in range(104):
+            Venta.objects.create(
+                vendedor=cls.ana, fecha=date(2025, 2, 1) + timedelta(days=dia % 28), monto=Decimal('10')
+            )
+        Venta.objects.create(vendedor=cls.luis, fecha=date(2025, 2, 3), monto=Decimal('70'))
+
+    def setUp(self):
+        cache.clear()
+
+    def calcular(self, **parametros):
+        response = self.client.post(
+            '/api/comisiones/calcular/',
+            {'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-02-28', **parametros},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return {fila['vendedor_id']: fila for fila in response.json()}
+
+    def detalle(self, **parametros):
+        response = self.client.get('/api/comisiones/detalle/', {
+            'vendedor': self.ana.id, 'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-02-28', **parametros
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_calcular_sin_detalle_solo_devuelve_totales(self):
+        sin_detalle = self.calcular(detalle=False)
+        con_detalle = self.calcular()
+
+        self.assertNotIn('ventas_detalle', sin_detalle[self.ana.id])
+        self.assertEqual(sin_detalle[self.ana.id]['numero_ventas'], 105)
+        self.assertEqual(len(con_detalle[self.ana.id]['ventas_detalle']), 105)
+        for vendedor_id, fila in con_detalle.items():
+            fila.pop('ventas_detalle')
+            self.assertEqual(fila, sin_detalle[vendedor_id])
+
+    def test_detalle_por_paginas_igual_al_de_calcular(self):
+        esperado = self.calcular()[self.ana.id]['ventas_detalle']
+
+        primera = self.detalle()
+        segunda = self.detalle(page=2)
+        self.assertEqual(primera['count'], 105)
+        self.assertEqual(len(primera['results']), 100)
+        self.assertEqual(primera['results'] + segunda['results'], esperado)
+        self.assertEqual(segunda['results'][-1]['id'], self.archivada.id)
+
+        ids = []
+        datos = self.detalle(paginacion='cursor', page_size=40)
+        while True:
+            ids += [venta['id'] for venta in datos['results']]
+            if datos['next'] is None:
+                break
+            datos = self.client.get(datos['next']).json()
+        self.assertEqual(ids, [venta['id'] for venta in esperado])
+
+    def test_detalle_requiere_vendedor_y_periodo(self):
+        for parametros in ({'vendedor': ''}, {'vendedor': 'ana'}, {'fecha_inicio': ''}):
+            with self.subTest(parametros=parametros):
+                response = self.client.get('/api/comisiones/detalle/', {
+                    'vendedor': self.ana.id, 'fecha_inicio': '2025-01-01', 'fecha_fin': '2025-02-28',
+                    **parametros
+                })
+                self.assertEqual(response.status_code, 400)
+
+
+class BusquedaVentasTests(TestCase):
+    """Índice de texto de las ventas mantenido por triggers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        cls.luis = Vendedor.objects.create(nombre='Luis', apellido='Gil', email='luis@ventaspro.com')
+        cls.reparacion = Venta.objects.create(
+            vendedor=cls.ana, fecha=date(2025, 3, 1), monto=Decimal('80'),
+            descripcion='Reparación de impresora láser'
+        )
+        cls.impresoras, = Venta.objects.bulk_create([
+            Venta(vendedor=cls.luis, fecha=date(2025, 3, 2), monto=Decimal('900'), descripcion='Dos impresoras')
+        ])
+        cls.sin_descripcion = Venta.objects.create(vendedor=cls.luis, fecha=date(2025, 3, 3), monto=Decimal('5'))
+
+    def buscar(self, texto):
+        response = self.client.get('/api/ventas/buscar/', {'q': texto})
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        self.assertEqual(datos['count'], len(datos['results']))
+        return {venta['id'] for venta in datos['results']}
+
+    def test_prefijos_sin_acentos_y_todas_las_palabras(self):
+        self.assertEqual(self.buscar('impres'), {self.reparacion.id, self.impresoras.id})
+        self.assertEqual(self.buscar('IMPRES ruiz'), {self.reparacion.id})
+        self.assertEqual(self.buscar('reparacion laser'), {self.reparacion.id})
+        self.assertEqual(self.buscar('gil'), {self.impresoras.id, self.sin_descripcion.id})
+        self.assertEqual(self.buscar('impresora escáner'), set())
+        self.assertEqual(
+            set(busqueda.filtrar(Venta.objects.all(), 'impres').values_list('id', flat=True)),
+            {self.reparacion.id, self.impresoras.id}
+        )
+
+        response = self.client.get('/api/ventas/buscar/', {'q': ' ,; '})
+        self.assertEqual(response.status_code, 400)
+
+    def test_triggers_siguen_las_escrituras_masivas(self):
+        Venta.objects.filter(pk=self.sin_descripcion.pk).update(descripcion='Tóner negro')
+        self.assertEqual(self.buscar('toner'), {self.sin_descripcion.id})
+
+        Venta.objects.filter(pk=self.impresoras.pk).update(vendedor=self.ana)
+        self.assertEqual(self.buscar('gil'), {self.sin_descripcion.id})
+        self.assertEqual(self.buscar('ruiz'), {self.reparacion.id, self.impresoras.id})
+
+        Vendedor.objects.filter(pk=self.ana.pk).update(apellido='Moreno')
+        self.assertEqual(self.buscar('ruiz'), set())
+        self.assertEqual(self.buscar('moreno impres'), {self.reparacion.id, self.impresoras.id})
+
+        Venta.objects.filter(pk=self.reparacion.pk).delete()
+        self.assertEqual(self.buscar('impres'), {self.impresoras.id})
+
+    def test_ventas_archivadas_no_aparecen(self):
+        Venta.objects.create(
+            vendedor=self.ana, fecha=date(2024, 12, 5), monto=Decimal('60'), descripcion='Impresora vieja'
+        )
+        self.assertEqual(len(self.buscar('impres')), 3)
+
+        archivo.archivar_mes(date(2024, 12, 1))
+        self.assertEqual(self.buscar('impres'), {self.reparacion.id, self.impresoras.id})
+        self.assertEqual(self.buscar('vieja'), set())
+
+
+class ExportacionVentasTests(TestCase):
+    """Exportación de ventas en streaming"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('3'))
+        cls.ana = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        cls.luis = Vendedor.objects.create(nombre='Luis', apellido='Gil', email='luis@ventaspro.com')
+        cls.venta = Venta.objects.create(
+            vendedor=cls.ana, fecha=date(2025, 5, 2), monto=Decimal('200.00'),
+            descripcion='Coma, "comillas"\ny salto'
+        )
+        Venta.objects.create(vendedor=cls.ana, fecha=date(2025, 5, 1), monto=Decimal('50.00'))
+        Venta.objects.create(vendedor=cls.luis, fecha=date(2025, 5, 3), monto=Decimal('75.00'))
+
+    def exportar(self, **parametros):
+        response = self.client.get('/api/ventas/exportar/', parametros)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_con_los_valores_del_serializer(self):
+        filas = [json.loads(linea) for linea in self.exportar(formato='ndjson').splitlines()]
+        self.assertEqual(len(filas), 3)
+
+        datos = VentaSerializer(self.venta).data
+        fila = next(fila for fila in filas if fila['id'] == self.venta.id)
+        self.assertEqual(fila, {
+            'id': self.venta.id,
+            'vendedor': self.ana.id,
+            'vendedor_nombre': 'Ana',
+            'vendedor_apellido': 'Ruiz',
+            'fecha': '2025-05-02',
+            'monto': '200.00',
+            'descripcion': 'Coma, "comillas"\ny salto',
+            'comision_calculada': '6.00',
+            'porcentaje_aplicado': '3.00',
+            'fecha_registro': datos['fecha_registro'],
+        })
+
+    def test_csv_con_cabecera_y_filtros(self):
+        contenido = self.exportar(formato='csv', vendedor=self.ana.id, fecha_inicio='2025-05-02')
+        cabecera, *filas = csv.reader(StringIO(contenido))
+        self.assertEqual(cabecera, [nombre for nombre, _ in exportacion.COLUMNAS])
+        self.assertEqual(len(filas), 1)
+        self.assertEqual(filas[0][:8], [
+            str(self.venta.id), str(self.ana.id), 'Ana', 'Ruiz', '2025-05-02', '200.00',
+            'Coma, "comillas"\ny salto', '6.00'
+        ])
+
+    def test_formato_invalido(self):
+        response = self.client.get('/api/ventas/exportar/', {'formato': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CargaMasivaTests(TestCase):
+    """Carga masiva de ventas en JSON o NDJSON"""
+
+    @classmethod
+    def setUpTestData(cls):
+        ReglaComision.objects.create(nombre='Básica', monto_minimo=Decimal('0'), porcentaje=Decimal('3'))
+        ReglaComision.objects.create(nombre='Media', monto_minimo=Decimal('1000'), porcentaje=Decimal('7.5'))
+        cls.vendedor = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+
+    def setUp(self):
+        cache.clear()
+
+    def cargar(self, cuerpo, content_type='application/json'):
+        return self.client.post('/api/ventas/bulk/', cuerpo, content_type=content_type)
+
+    def test_carga_json_con_comisiones_y_resumen(self):
+        filas = [
+            {'vendedor': self.vendedor.id, 'fecha': '2025-03-01', 'monto': '999.99'},
+            {'vendedor': self.vendedor.id, 'fecha': '2025-03-01', 'monto': '1000.00', 'descripcion': 'Tramo'},
+            {'vendedor': self.vendedor.id, 'fecha': '2025-03-02', 'monto': '10.00', 'descripcion': None},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.cargar(filas)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'creadas': 3})
+
+        self.assertEqual(
+            list(Venta.objects.order_by('id').values_list('monto', 'porcentaje_aplicado', 'comision_calculada')),
+            [
+                (Decimal('999.99'), Decimal('3.00'), Decimal('30.00')),
+                (Decimal('1000.00'), Decimal('7.50'), Decimal('75.00')),
+                (Decimal('10.00'), Decimal('3.00'), Decimal('0.30')),
+            ]
+        )
+        self.assertEqual(
+            dict(ResumenDiarioVenta.objects.values_list('fecha', 'total_ventas')),
+            {date(2025, 3, 1): Decimal('1999.99'), date(2025, 3, 2): Decimal('10.00')}
+        )
+
+    def test_carga_ndjson(self):
+        cuerpo = '\n'.join(
+            json.dumps({'vendedor': self.vendedor.id, 'fecha': f'2025-03-0{dia}', 'monto': '50'})
+            for dia in (1, 2)
+        ) + '\n\n'
+        response = self.cargar(cuerpo, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Venta.objects.count(), 2)
+
+        response = self.cargar('{"vendedor": 1}\n{roto', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('línea 2', response.json()['detail'])
+
+    def test_filas_invalidas_no_guardan_nada(self):
+        response = self.cargar([
+            {'vendedor': self.vendedor.id, 'fecha': '2025-03-01', 'monto': '50'},
+            {'vendedor': self.vendedor.id + 100, 'fecha': '2025-03-01', 'monto': '50'},
+            {'vendedor': self.vendedor.id, 'fecha': 'ayer', 'monto': '0'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        datos = response.json()
+        self.assertEqual(datos['creadas'], 0)
+        self.assertEqual([error['fila'] for error in datos['errores']], [1, 2])
+        self.assertEqual(set(datos['errores'][1]['errores']), {'fecha', 'monto'})
+        self.assertFalse(Venta.objects.exists())
+
+        response = self.cargar({'vendedor': self.vendedor.id})
+        self.assertEqual(response.status_code, 400)
+
+    def test_consultas_constantes_con_mas_filas(self):
+        def filas(cantidad):
+            return [
+                {'vendedor': self.vendedor.id, 'fecha': '2025-04-01', 'monto': '25'}
+                for _ in range(cantidad)
+            ]
+
+        # La primera carga crea la fila del resumen y carga la tabla de reglas
+        self.cargar(filas(1))
+        with CaptureQueriesContext(connection) as consultas:
+            self.cargar(filas(2))
+        with self.assertNumQueries(len(consultas)):
+            response = self.cargar(filas(50))
+        self.assertEqual(response.json(), {'creadas': 50})
+
+
+class EdicionMasivaTests(TestCase):
+    """Modificación y eliminación masiva de ventas por lotes de ids"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.vendedor = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        for dia in (1, 1, 2, 2, 3):
+            Venta.objects.create(vendedor=cls.vendedor, fecha=date(2025, 1, dia), monto=Decimal('100'))
+
+    def resumen(self):
+        return dict(ResumenDiarioVenta.objects.values_list('fecha', 'numero_ventas'))
+
+    @mock.patch.object(edicion_masiva, 'TAMANO_LOTE', 2)
+    def test_eliminacion_por_lotes(self):
+        response = self.client.post(
+            '/api/ventas/bulk-delete/',
+            {'filtro': {'fecha_inicio': '2025-01-02'}},
+            content_type='application/json'
+        )
+        self.assertEqual(response.json(), {'eliminadas': 3})
+        self.assertEqual(Venta.objects.count(), 2)
+        self.assertEqual(VentaEliminada.objects.count(), 3)
+        self.assertEqual(self.resumen(), {date(2025, 1, 1): 2})
+
+    @mock.patch.object(edicion_masiva, 'TAMANO_LOTE', 2)
+    def test_actualizacion_por_lotes(self):
+        actualizadas = edicion_masiva.actualizar_ventas(
+            Venta.objects.filter(fecha__gte=date(2025, 1, 2)),
+            {'fecha': date(2025, 1, 1)}
+        )
+        self.assertEqual(actualizadas, 3)
+        self.assertEqual(self.resumen(), {date(2025, 1, 1): 5})
+        self.assertEqual(VentaEliminada.objects.count(), 3)
+
+    def test_eliminar_vendedores_con_sus_ventas(self):
+        eliminados = edicion_masiva.eliminar_vendedores(Vendedor.objects.all())
+        self.assertEqual(eliminados, (1, 5))
+        self.assertFalse(Venta.objects.exists())
+        self.assertFalse(ResumenDiarioVenta.objects.exists())
+
+    def test_eliminar_vendedor_no_recorre_sus_ventas(self):
+        """Las consultas al eliminar un vendedor no dependen de cuántas ventas tenga"""
+        otro = Vendedor.objects.create(nombre='Luis', apellido='Gil', email='luis@ventaspro.com')
+        for dia in range(1, 21):
+            Venta.objects.create(vendedor=otro, fecha=date(2025, 1, dia), monto=Decimal('100'))
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.delete(f'/api/vendedores/{self.vendedor.id}/')
+        self.assertEqual(response.status_code, 204)
+
+        with self.assertNumQueries(len(consultas)):
+            response = self.client.delete(f'/api/vendedores/{otro.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Venta.objects.exists())
+        self.assertFalse(ResumenDiarioVenta.objects.exists())
+
+
+class CacheRespuestasVersionTests(TestCase):
+    """La versión de los datos es la misma para todos los procesos"""
+
+    def test_escritura_en_otro_proceso_invalida_la_respuesta(self):
+        vendedor = Vendedor.objects.create(nombre='Ana', apellido='Ruiz', email='ana@ventaspro.com')
+        Venta.objects.create(vendedor=vendedor, fecha=date(2025, 1, 10), monto=Decimal('100'))
+        primera = self.client.get('/api/ventas/estadisticas/')
+        self.assertEqual(primera.json()['numero_ventas'], 1)
+
+        # Otro worker, con su propia caché en memoria, registra una venta
+        otra_cache = LocMemCache('otro-proceso', {})
+        with mock.patch.object(versiones, 'cache', otra_cache), \
+                mock.patch.object(cache_respuestas, 'cache', otra_cache):
+            with self.captureOnCommitCallbacks(execute=True):
+                Venta.objects.create(vendedor=vendedor, fecha=date(2025, 1, 11), monto=Decimal('100'))
+
+        response = self.client.get('/api/ventas/estadisticas/', HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['numero_ventas'], 2)
+
+
+class MetricasTests(TestCase):
+    """Archivos de métricas de procesos terminados"""
+
+    # Mayor que cualquier pid posible en Linux (pid_max <= 2**22)
+    PID_TERMINADO = 2 ** 22 + 1
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        configuracion = override_settings(METRICAS_DIR=self.directorio)
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        # Sin los contadores que este proceso acumuló en otros tests
+        contadores = mock.patch.object(metricas, '_contadores', {})
+        contadores.start()
+        self.addCleanup(contadores.stop)
+
+    def escribir(self, nombre, total):
+        contador = metricas._nuevo_contador()
+        contador['total'] = total
+        with open(os.path.join(self.directorio, nombre), 'w', encoding='utf-8') as archivo:
+            json.dump({'venta-list|GET': contador}, archivo)
+
+    def test_procesos_terminados_se_fusionan(self):
+        terminados = [f'metricas-{self.PID_TERMINADO}-{indice}.json' for indice in range(3)]
+        for nombre in terminados:
+            self.escribir(nombre, 2)
+        # Un proceso vivo (este) con otro id de arranque
+        self.escribir(f'metricas-{os.getpid()}-otro.json', 5)
+
+        for _ in range(2):
+            total = metricas.combinar()
+            self.assertEqual(total['venta-list|GET']['total'], 11)
+
+        restantes = sorted(
+            nombre for nombre in os.listdir(self.directorio) if nombre.endswith('.json')
+        )
+        self.assertEqual(restantes, sorted([metricas.ACUMULADO, f'metricas-{os.getpid()}-otro.json']))
+
+    def test_fusion_interrumpida_no_suma_dos_veces(self):
+        nombre = f'metricas-{self.PID_TERMINADO}-a.json'
+        self.escribir(nombre, 2)
+        metricas.combinar()
+
+        # Como si el borrado no hubiera llegado a hacerse
+        self.escribir(nombre, 2)
+        self.assertEqual(metricas.combinar()['venta-list|GET']['total'], 2)
+        self.assertFalse(os.path.exists(os.path.join(self.directorio, nombre)))
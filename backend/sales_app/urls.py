@@ -2,8 +2,9 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     VendedorViewSet, ReglaComisionViewSet,
-    VentaViewSet, ComisionViewSet
+    VentaViewSet, ComisionViewSet, metricas_prometheus
 )
+from . import views_async
 
 # Crear el router para registrar los ViewSets
 router = DefaultRouter()
@@ -13,5 +14,11 @@ router.register(r'ventas', VentaViewSet, basename='venta')
 router.register(r'comisiones', ComisionViewSet, basename='comision')
 
 urlpatterns = [
+    path('metrics/', metricas_prometheus, name='metricas'),
+    # Versiones asíncronas de los endpoints de lectura (servidor ASGI)
+    path('async/ventas/', views_async.ventas_lista, name='venta-list-async'),
+    path('async/ventas/estadisticas/', views_async.ventas_estadisticas, name='venta-estadisticas-async'),
+    path('async/vendedores/activos/', views_async.vendedores_activos, name='vendedor-activos-async'),
+    path('async/comisiones/resumen/', views_async.comisiones_resumen, name='comision-resumen-async'),
     path('', include(router.urls)),
 ]
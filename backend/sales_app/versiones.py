@@ -0,0 +1,96 @@
+"""
+Marcas de versión compartidas por todos los procesos
+La tabla de reglas de comisión en memoria y la caché de respuestas se
+invalidan publicando una marca nueva, que deben ver todos los workers y los
+comandos de gestión. La marca se guarda siempre en la tabla marcas_version
+de la base de datos principal; con una caché compartida (REDIS_URL o
+CACHE_DIR, ver CACHE_COMPARTIDA en settings) se lee además de ella, y sin
+ella cada lectura es una búsqueda por clave primaria.
+Como la tabla se replica con el resto de los datos, la réplica que ya tiene
+una marca tiene también las escrituras confirmadas antes de publicarla (ver
+al_dia)
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+
+def _marcas(alias=DEFAULT_DB_ALIAS):
+    from .models import MarcaVersion
+
+    # Por defecto en la principal: la réplica puede ir por detrás
+    return MarcaVersion.objects.using(alias)
+
+
+def _leer_marca(clave):
+    version = _marcas().filter(clave=clave).values_list('valor', flat=True).first()
+    if version is None:
+        version = _marcas().get_or_create(clave=clave, defaults={'valor': time.time_ns()})[0].valor
+    return version
+
+
+async def _aleer_marca(clave):
+    version = await _marcas().filter(clave=clave).values_list('valor', flat=True).afirst()
+    if version is None:
+        marca, _ = await _marcas().aget_or_create(clave=clave, defaults={'valor': time.time_ns()})
+        version = marca.valor
+    return version
+
+
+def leer(clave):
+    """Marca vigente de la clave; la crea si todavía no existe"""
+    if not settings.CACHE_COMPARTIDA:
+        return _leer_marca(clave)
+
+    version = cache.get(clave)
+    if version is None:
+        # Entrada expulsada o caché recién arrancada: se parte de la tabla
+        cache.add(clave, _leer_marca(clave), timeout=None)
+        version = cache.get(clave)
+    if version is None:
+        # Caché no disponible (p. ej. DummyCache): cada lectura es nueva
+        version = time.time_ns()
+    return version
+
+
+async def aleer(clave):
+    """Igual que leer, con las API asíncronas de la caché y del ORM"""
+    if not settings.CACHE_COMPARTIDA:
+        return await _aleer_marca(clave)
+
+    version = await cache.aget(clave)
+    if version is None:
+        await cache.aadd(clave, await _aleer_marca(clave), timeout=None)
+        version = await cache.aget(clave)
+    if version is None:
+        version = time.time_ns()
+    return version
+
+
+def publicar(clave):
+    """Publica una marca nueva (nanosegundos actuales) para la clave"""
+    version = time.time_ns()
+    # Primero la tabla: quien repueble la caché desde ella no puede pisar
+    # la marca nueva con la anterior
+    _marcas().update_or_create(clave=clave, defaults={'valor': version})
+    if settings.CACHE_COMPARTIDA:
+        cache.set(clave, version, timeout=None)
+    return version
+
+
+def al_dia(alias, clave, version):
+    """
+    Indica si la base de datos `alias` ya tiene la marca `version` de la
+    clave y, con ella, todas las escrituras que la publicaron. Se compara por
+    igualdad: una réplica por delante también responde False, y el que
+    pregunta lee de la principal
+    """
+    return _marcas(alias).filter(clave=clave, valor=version).exists()
+
+
+async def aal_dia(alias, clave, version):
+    """Igual que al_dia, con las API asíncronas del ORM"""
+    return await _marcas(alias).filter(clave=clave, valor=version).aexists()
@@ -1,26 +1,77 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
-from django.db.models import Sum, Count, Avg, Q
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
+from django.db.models import Sum, Q, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from datetime import datetime
 from decimal import Decimal
 
-from .models import Vendedor, ReglaComision, Venta, ComisionCalculada
+from . import (
+    archivo, busqueda, comisiones, consultas, edicion_masiva, exportacion, listados,
+    metricas, recalculo, series, tareas
+)
+from .models import (
+    Vendedor, ReglaComision, Venta, ComisionCalculada, ResumenDiarioVenta,
+    TareaComision
+)
+from .cache_respuestas import respuesta_cacheada
+from .pagination import VentaKeysetPagination, ComisionKeysetPagination
+from .parsers import NDJSONParser
+from .renderers import JSONRapidoRenderer
+from .replica import LecturaEnReplicaMixin
+from .carga_masiva import validar_filas, insertar_ventas
 from .serializers import (
     VendedorSerializer, VendedorSimpleSerializer,
     ReglaComisionSerializer, VentaSerializer,
-    ComisionCalculadaSerializer, ResumenComisionSerializer
+    ComisionCalculadaSerializer, ResumenComisionSerializer,
+    SimulacionComisionSerializer, TareaComisionSerializer,
+    ActualizacionVentasSerializer, SeleccionVentasSerializer,
+    ActualizacionVendedoresSerializer, SeleccionVendedoresSerializer
 )
 
 
-class VendedorViewSet(viewsets.ModelViewSet):
+class VendedorViewSet(LecturaEnReplicaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar vendedores"""
+    acciones_replica = ('list', 'retrieve', 'activos', 'ventas', 'comisiones')
     queryset = Vendedor.objects.all()
     serializer_class = VendedorSerializer
     
-    def get_serializer_class(self):
-        """Usa serializer simple para listado, completo para detalle"""
+    def con_totales(self):
+        """Indica si la respuesta debe incluir los totales de ventas y comisiones"""
         if self.action == 'list':
+            return self.request.query_params.get('with_totals') in ('1', 'true')
+        return self.action in ('retrieve', 'update', 'partial_update')
+    
+    def get_queryset(self):
+        """
+        Anota los totales en la misma consulta cuando se van a serializar
+        Salen del resumen diario, que incluye las ventas archivadas
+        """
+        queryset = super().get_queryset()
+        
+        if self.con_totales():
+            queryset = queryset.annotate(
+                total_ventas_anotado=Coalesce(Sum('resumenes_diarios__numero_ventas'), 0),
+                total_comisiones_anotado=Coalesce(
+                    Sum('resumenes_diarios__total_comision'),
+                    Value(Decimal('0.00')),
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                )
+            ).order_by('apellido', 'nombre')
+        
+        return queryset
+    
+    def get_serializer_class(self):
+        """
+        Usa serializer simple para listado, completo para detalle
+        El listado usa el completo con ?with_totals=1
+        """
+        if self.action == 'list' and not self.con_totales():
             return VendedorSimpleSerializer
         return VendedorSerializer
     
@@ -28,12 +79,12 @@ class VendedorViewSet(viewsets.ModelViewSet):
     def ventas(self, request, pk=None):
         """Obtiene todas las ventas de un vendedor específico"""
         vendedor = self.get_object()
-        ventas = vendedor.ventas.all()
         
         # Filtros opcionales
         fecha_inicio = request.query_params.get('fecha_inicio')
         fecha_fin = request.query_params.get('fecha_fin')
         
+        ventas = archivo.ventas(fecha_inicio).filter(vendedor=vendedor).select_related('vendedor')
         if fecha_inicio:
             ventas = ventas.filter(fecha__gte=fecha_inicio)
         if fecha_fin:
@@ -52,14 +103,54 @@ class VendedorViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @respuesta_cacheada
     def activos(self, request):
         """Lista solo los vendedores activos"""
         vendedores = self.queryset.filter(activo=True)
         serializer = VendedorSimpleSerializer(vendedores, many=True)
         return Response(serializer.data)
+    
+    def seleccion_masiva(self, datos):
+        """Vendedores elegidos por ids o por filtro en una operación masiva"""
+        vendedores = Vendedor.objects.all()
+        if 'ids' in datos:
+            return vendedores.filter(id__in=datos['ids'])
+        return vendedores.filter(**datos['filtro'])
+    
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def actualizacion_masiva(self, request):
+        """
+        Modifica muchos vendedores con un solo UPDATE (por ejemplo, desactivarlos)
+        Parámetros: ids o filtro (activo) y cambios (nombre, apellido,
+        telefono, activo), iguales para todos
+        """
+        serializer = ActualizacionVendedoresSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        actualizados = edicion_masiva.actualizar_vendedores(
+            self.seleccion_masiva(serializer.validated_data),
+            serializer.validated_data['cambios']
+        )
+        return Response({'actualizados': actualizados})
+    
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def eliminacion_masiva(self, request):
+        """
+        Elimina muchos vendedores junto con sus ventas
+        Parámetros: ids o filtro (activo)
+        """
+        serializer = SeleccionVendedoresSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        eliminados, ventas_eliminadas = edicion_masiva.eliminar_vendedores(
+            self.seleccion_masiva(serializer.validated_data)
+        )
+        return Response({'eliminados': eliminados, 'ventas_eliminadas': ventas_eliminadas})
 
 
-class ReglaComisionViewSet(viewsets.ModelViewSet):
+class ReglaComisionViewSet(LecturaEnReplicaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar reglas de comisión"""
     queryset = ReglaComision.objects.all()
     serializer_class = ReglaComisionSerializer
@@ -97,68 +188,237 @@ class ReglaComisionViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class VentaViewSet(viewsets.ModelViewSet):
+class VentaViewSet(LecturaEnReplicaMixin, viewsets.ModelViewSet):
     """ViewSet para gestionar ventas"""
+    acciones_replica = ('list', 'retrieve', 'estadisticas', 'serie', 'buscar')
     queryset = Venta.objects.select_related('vendedor').all()
     serializer_class = VentaSerializer
+    renderer_classes = [JSONRapidoRenderer, BrowsableAPIRenderer]
+    
+    @property
+    def paginator(self):
+        """Usa paginación por cursor si la petición la solicita"""
+        if not hasattr(self, '_paginator') and VentaKeysetPagination.solicitada(self.request):
+            self._paginator = VentaKeysetPagination()
+        return super().paginator
     
     def get_queryset(self):
-        """Aplica filtros opcionales a las ventas"""
-        queryset = super().get_queryset()
-        
-        # Filtro por vendedor
-        vendedor_id = self.request.query_params.get('vendedor')
-        if vendedor_id:
-            queryset = queryset.filter(vendedor_id=vendedor_id)
-        
-        # Filtro por rango de fechas
-        fecha_inicio = self.request.query_params.get('fecha_inicio')
-        fecha_fin = self.request.query_params.get('fecha_fin')
+        """
+        Aplica filtros opcionales a las ventas
+        El listado y la exportación incluyen las ventas archivadas cuando el
+        rango de fechas alcanza el archivo
+        """
+        if self.action in ('list', 'exportar'):
+            queryset = archivo.ventas(
+                self.request.query_params.get('fecha_inicio')
+            ).select_related('vendedor')
+        else:
+            queryset = super().get_queryset()
+        return self.filtrar(queryset)
+    
+    def filtrar(self, queryset):
+        """
+        Aplica los filtros de la petición a un queryset con campos
+        vendedor y fecha (ventas o resumen diario)
+        """
+        return consultas.filtrar_ventas(queryset, self.request.query_params)
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Listado por la ruta rápida: filas desde values() en lugar de
+        instancias del modelo, con la misma salida que VentaSerializer
+        """
+        queryset = listados.valores_ventas(self.filter_queryset(self.get_queryset()))
         
-        if fecha_inicio:
-            queryset = queryset.filter(fecha__gte=fecha_inicio)
-        if fecha_fin:
-            queryset = queryset.filter(fecha__lte=fecha_fin)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(listados.formatear_ventas(page))
         
-        return queryset
+        return Response(listados.formatear_ventas(queryset))
     
     @action(detail=False, methods=['get'])
+    @respuesta_cacheada
     def estadisticas(self, request):
         """Obtiene estadísticas generales de ventas"""
-        ventas = self.get_queryset()
+        # Se agrega sobre el resumen diario: una fila por vendedor y día
+        resumenes = self.filtrar(ResumenDiarioVenta.objects.all())
         
-        stats = ventas.aggregate(
-            total_ventas=Sum('monto'),
-            total_comisiones=Sum('comision_calculada'),
-            numero_ventas=Count('id'),
-            promedio_venta=Avg('monto'),
-            promedio_comision=Avg('comision_calculada')
+        stats = consultas.formatear_estadisticas(
+            resumenes.aggregate(**consultas.agregados_estadisticas())
         )
         
-        # Convertir Decimal a float para JSON
-        for key, value in stats.items():
-            if value is not None:
-                stats[key] = float(value) if isinstance(value, Decimal) else value
-            else:
-                stats[key] = 0
-        
         return Response(stats)
+    
+    @action(detail=False, methods=['get'])
+    @respuesta_cacheada
+    def serie(self, request):
+        """
+        Serie temporal de ventas, comisiones y número de ventas
+        Parámetros: agrupacion (dia | semana | mes, por defecto dia),
+        por_vendedor (true para una serie por vendedor) y los mismos filtros
+        del listado. Los periodos sin ventas se devuelven en cero
+        """
+        agrupacion = request.query_params.get('agrupacion', 'dia')
+        if agrupacion not in series.AGRUPACIONES:
+            return Response(
+                {'error': 'Agrupación inválida. Use dia, semana o mes'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            fecha_inicio, fecha_fin = (
+                datetime.strptime(valor, '%Y-%m-%d').date() if valor else None
+                for valor in (
+                    request.query_params.get('fecha_inicio'),
+                    request.query_params.get('fecha_fin')
+                )
+            )
+        except ValueError:
+            return Response(
+                {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        por_vendedor = request.query_params.get('por_vendedor') in ('1', 'true')
+        resumenes = self.filtrar(ResumenDiarioVenta.objects.all())
+        
+        try:
+            datos = series.calcular_serie(
+                resumenes, agrupacion, fecha_inicio, fecha_fin, por_vendedor
+            )
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        clave = 'vendedores' if por_vendedor else 'serie'
+        return Response({'agrupacion': agrupacion, clave: datos})
+    
+    @action(detail=False, methods=['get'])
+    def buscar(self, request):
+        """
+        Busca ventas por descripción y nombre del vendedor en el índice de texto
+        Parámetros: q (cada palabra como prefijo, deben aparecer todas) y page.
+        Los resultados van ordenados por relevancia con el formato del listado
+        """
+        texto = request.query_params.get('q', '')
+        if not busqueda.terminos(texto):
+            return Response(
+                {'error': 'Se requiere el texto a buscar (q)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        paginator = PageNumberPagination()
+        ids = paginator.paginate_queryset(busqueda.ResultadosBusqueda(texto), request, view=self)
+        filas = listados.valores_ventas(Venta.objects.filter(id__in=ids))
+        return paginator.get_paginated_response(
+            listados.formatear_ventas(busqueda.ordenar(filas, ids))
+        )
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta las ventas filtradas en streaming
+        Parámetros: formato (csv | ndjson) y los mismos filtros del listado
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exportacion.GENERADORES:
+            return Response(
+                {'error': 'Formato inválido. Use csv o ndjson'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        ventas = self.get_queryset()
+        response = StreamingHttpResponse(
+            exportacion.GENERADORES[formato](ventas),
+            content_type=exportacion.FORMATOS[formato]
+        )
+        response['Content-Disposition'] = f'attachment; filename="ventas.{formato}"'
+        return response
+    
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        parser_classes=[JSONParser, NDJSONParser]
+    )
+    def carga_masiva(self, request):
+        """
+        Registra muchas ventas en una sola petición
+        Acepta un arreglo JSON o NDJSON (application/x-ndjson). Si alguna
+        fila es inválida no se guarda ninguna y se reportan los errores
+        por fila
+        """
+        filas = request.data
+        if not isinstance(filas, list):
+            return Response(
+                {'error': 'Se requiere un arreglo de ventas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        datos_validos, errores = validar_filas(filas)
+        if errores:
+            return Response(
+                {'creadas': 0, 'errores': errores},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        creadas = insertar_ventas(datos_validos)
+        return Response({'creadas': creadas}, status=status.HTTP_201_CREATED)
+    
+    def seleccion_masiva(self, datos):
+        """Ventas elegidas por ids o por filtro en una operación masiva"""
+        ventas = Venta.objects.all()
+        if 'ids' in datos:
+            return ventas.filter(id__in=datos['ids'])
+        return consultas.filtrar_ventas(ventas, datos['filtro'])
+    
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def actualizacion_masiva(self, request):
+        """
+        Modifica muchas ventas con un solo UPDATE
+        Parámetros: ids o filtro (vendedor, fecha_inicio, fecha_fin) y cambios
+        (vendedor, fecha, monto, descripcion), iguales para todas. Si cambia
+        el monto se recalcula la comisión. Las ventas archivadas no se modifican
+        """
+        serializer = ActualizacionVentasSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        ventas = self.seleccion_masiva(serializer.validated_data)
+        actualizadas = edicion_masiva.actualizar_ventas(
+            ventas, serializer.validated_data['cambios']
+        )
+        return Response({'actualizadas': actualizadas})
+    
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def eliminacion_masiva(self, request):
+        """
+        Elimina muchas ventas con un solo DELETE
+        Parámetros: ids o filtro (vendedor, fecha_inicio, fecha_fin)
+        """
+        serializer = SeleccionVentasSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        eliminadas = edicion_masiva.eliminar_ventas(
+            self.seleccion_masiva(serializer.validated_data)
+        )
+        return Response({'eliminadas': eliminadas})
 
 
-class ComisionViewSet(viewsets.ViewSet):
+class ComisionViewSet(LecturaEnReplicaMixin, viewsets.ViewSet):
     """ViewSet personalizado para cálculo de comisiones"""
+    acciones_replica = ('resumen', 'detalle')
     
-    @action(detail=False, methods=['post'])
-    def calcular(self, request):
+    def leer_periodo(self, parametros):
         """
-        Calcula comisiones para un período específico
-        Parámetros: fecha_inicio, fecha_fin
+        Lee fecha_inicio y fecha_fin (YYYY-MM-DD), ambas obligatorias
+        Devuelve (fecha_inicio, fecha_fin, None) o (None, None, respuesta de error)
         """
-        fecha_inicio = request.data.get('fecha_inicio')
-        fecha_fin = request.data.get('fecha_fin')
+        fecha_inicio = parametros.get('fecha_inicio')
+        fecha_fin = parametros.get('fecha_fin')
         
         if not fecha_inicio or not fecha_fin:
-            return Response(
+            return None, None, Response(
                 {'error': 'Se requieren fecha_inicio y fecha_fin'},
                 status=status.HTTP_400_BAD_REQUEST
             )
@@ -167,88 +427,143 @@ class ComisionViewSet(viewsets.ViewSet):
             fecha_inicio = datetime.strptime(fecha_inicio, '%Y-%m-%d').date()
             fecha_fin = datetime.strptime(fecha_fin, '%Y-%m-%d').date()
         except ValueError:
-            return Response(
+            return None, None, Response(
                 {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         if fecha_inicio > fecha_fin:
-            return Response(
+            return None, None, Response(
                 {'error': 'La fecha de inicio debe ser anterior a la fecha fin'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Obtener ventas del período
-        ventas = Venta.objects.filter(
-            fecha__gte=fecha_inicio,
-            fecha__lte=fecha_fin
-        ).select_related('vendedor')
-        
-        # Agrupar por vendedor
-        vendedores_data = []
-        vendedores = Vendedor.objects.filter(
-            ventas__fecha__gte=fecha_inicio,
-            ventas__fecha__lte=fecha_fin
-        ).distinct()
-        
-        for vendedor in vendedores:
-            ventas_vendedor = ventas.filter(vendedor=vendedor)
-            
-            total_ventas = ventas_vendedor.aggregate(
-                total=Sum('monto')
-            )['total'] or Decimal('0.00')
-            
-            total_comision = ventas_vendedor.aggregate(
-                total=Sum('comision_calculada')
-            )['total'] or Decimal('0.00')
-            
-            numero_ventas = ventas_vendedor.count()
-            
-            promedio_venta = total_ventas / numero_ventas if numero_ventas > 0 else Decimal('0.00')
-            promedio_comision = total_comision / numero_ventas if numero_ventas > 0 else Decimal('0.00')
-            
-            vendedor_data = {
-                'vendedor_id': vendedor.id,
-                'vendedor_nombre': vendedor.nombre,
-                'vendedor_apellido': vendedor.apellido,
-                'total_ventas': total_ventas,
-                'total_comision': total_comision,
-                'numero_ventas': numero_ventas,
-                'promedio_venta': promedio_venta,
-                'promedio_comision': promedio_comision,
-                'ventas_detalle': VentaSerializer(ventas_vendedor, many=True).data
-            }
-            
-            vendedores_data.append(vendedor_data)
-            
-            # Guardar en la base de datos
-            ComisionCalculada.objects.create(
-                vendedor=vendedor,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin,
-                total_ventas=total_ventas,
-                total_comision=total_comision,
-                numero_ventas=numero_ventas
-            )
+        return fecha_inicio, fecha_fin, None
+    
+    @action(detail=False, methods=['post'])
+    def calcular(self, request):
+        """
+        Calcula comisiones para un período específico
+        Parámetros: fecha_inicio, fecha_fin
+        Con detalle=false devuelve solo los totales de cada vendedor, sin
+        ventas_detalle (consultar en comisiones/detalle/ bajo demanda)
+        Con asincrono=true devuelve 202 y el id de una tarea en segundo plano
+        (consultar en comisiones/tareas/<id>/)
+        """
+        fecha_inicio, fecha_fin, error = self.leer_periodo(request.data)
+        if error:
+            return error
+        
+        detalle = request.data.get('detalle', request.query_params.get('detalle'))
+        detalle = detalle not in (False, 'false', '0', 0)
+        
+        asincrono = request.data.get('asincrono', request.query_params.get('asincrono'))
+        if asincrono in (True, 'true', '1', 1):
+            tarea = tareas.encolar(fecha_inicio, fecha_fin, detalle)
+            serializer = TareaComisionSerializer(tarea)
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+        
+        vendedores_data = comisiones.calcular_periodo(fecha_inicio, fecha_fin, detalle=detalle)
         
         # Devolver los datos directamente sin serializer
         return Response(vendedores_data)
     
     @action(detail=False, methods=['get'])
+    def detalle(self, request):
+        """
+        Ventas de un vendedor en un período, paginadas
+        Parámetros: vendedor, fecha_inicio y fecha_fin; page, o
+        paginacion=cursor para paginación por cursor. Cada venta tiene el
+        mismo formato que ventas_detalle en calcular
+        """
+        fecha_inicio, fecha_fin, error = self.leer_periodo(request.query_params)
+        if error:
+            return error
+        
+        vendedor_id = request.query_params.get('vendedor', '')
+        if not vendedor_id.isdigit():
+            return Response(
+                {'error': 'Se requiere el id del vendedor'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        ventas = archivo.ventas(fecha_inicio).filter(
+            vendedor_id=vendedor_id,
+            fecha__gte=fecha_inicio,
+            fecha__lte=fecha_fin
+        ).order_by('-fecha', '-fecha_registro', '-id')
+        
+        if VentaKeysetPagination.solicitada(request):
+            paginator = VentaKeysetPagination()
+        else:
+            paginator = PageNumberPagination()
+        pagina = paginator.paginate_queryset(listados.valores_ventas(ventas), request, view=self)
+        return paginator.get_paginated_response(listados.formatear_ventas(pagina))
+    
+    @action(detail=False, methods=['post'])
+    def simular(self, request):
+        """
+        Simula las comisiones de un período con una tabla de reglas propuesta
+        Parámetros: fecha_inicio, fecha_fin y reglas (lista de monto_minimo y
+        porcentaje). No escribe nada: devuelve por vendedor y en total la
+        comisión guardada, la simulada y la diferencia
+        """
+        serializer = SimulacionComisionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        datos = serializer.validated_data
+        
+        tabla = comisiones.TablaReglas(
+            (regla['monto_minimo'], regla['porcentaje']) for regla in datos['reglas']
+        )
+        ventas = archivo.ventas(datos['fecha_inicio']).filter(
+            fecha__gte=datos['fecha_inicio'],
+            fecha__lte=datos['fecha_fin']
+        )
+        vendedores = recalculo.simular(ventas, tabla)
+        
+        total_actual = sum((fila['total_actual'] for fila in vendedores), comisiones.CERO)
+        total_nuevo = sum((fila['total_nuevo'] for fila in vendedores), comisiones.CERO)
+        return Response({
+            'vendedores': vendedores,
+            'total_actual': total_actual,
+            'total_nuevo': total_nuevo,
+            'diferencia': total_nuevo - total_actual,
+        })
+    
+    @action(detail=False, methods=['get'], url_path=r'tareas/(?P<tarea_id>[0-9]+)')
+    def tarea(self, request, tarea_id=None):
+        """Obtiene el estado, el progreso y el resultado de una tarea"""
+        tarea = tareas.revisar(get_object_or_404(TareaComision, pk=tarea_id))
+        serializer = TareaComisionSerializer(tarea)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    @respuesta_cacheada
     def resumen(self, request):
         """
         Obtiene un resumen general de todas las comisiones
         Filtros opcionales: fecha_inicio, fecha_fin
         """
-        comisiones = ComisionCalculada.objects.all()
+        comisiones = consultas.filtrar_comisiones(
+            ComisionCalculada.objects.select_related('vendedor'),
+            request.query_params
+        )
         
-        fecha_inicio = request.query_params.get('fecha_inicio')
-        fecha_fin = request.query_params.get('fecha_fin')
-        
-        if fecha_inicio:
-            comisiones = comisiones.filter(fecha_inicio__gte=fecha_inicio)
-        if fecha_fin:
-            comisiones = comisiones.filter(fecha_fin__lte=fecha_fin)
+        # Paginación por cursor opcional (?paginacion=cursor)
+        if ComisionKeysetPagination.solicitada(request):
+            paginator = ComisionKeysetPagination()
+            pagina = paginator.paginate_queryset(comisiones, request, view=self)
+            serializer = ComisionCalculadaSerializer(pagina, many=True)
+            return paginator.get_paginated_response(serializer.data)
         
         serializer = ComisionCalculadaSerializer(comisiones, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+def metricas_prometheus(request):
+    """Expone las métricas por endpoint en formato de texto de Prometheus"""
+    return HttpResponse(
+        metricas.exportar(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
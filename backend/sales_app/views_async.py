@@ -0,0 +1,148 @@
+"""
+Vistas asíncronas de los endpoints de lectura más consultados
+Devuelven lo mismo que sus equivalentes del router (mismos filtros,
+paginación y caché) pero con el ORM asíncrono. Servidas con un servidor
+ASGI (ver asgi.py), un proceso puede atender muchos sondeos del dashboard
+a la vez en lugar de bloquear un worker por cada consulta lenta
+"""
+
+import math
+
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import archivo, consultas, listados
+from .cache_respuestas import respuesta_cacheada_async
+from .models import Vendedor, ComisionCalculada, ResumenDiarioVenta
+from .pagination import VentaKeysetPagination, ComisionKeysetPagination
+from .renderers import JSONRapidoRenderer
+from .replica import lectura_en_replica
+from .serializers import VendedorSimpleSerializer, ComisionCalculadaSerializer
+
+
+def _respuesta(datos, codigo=status.HTTP_200_OK, renderer_class=JSONRenderer):
+    """Renderiza igual que las vistas de DRF"""
+    return HttpResponse(
+        renderer_class().render(datos),
+        content_type='application/json',
+        status=codigo
+    )
+
+
+def _serializar(serializer_class):
+    return lambda filas: serializer_class(filas, many=True).data
+
+
+async def _paginar_por_cursor(paginator, queryset, request, formatear,
+                              renderer_class=JSONRenderer):
+    try:
+        pagina = await paginator.apaginate_queryset(queryset, request)
+    except NotFound as exc:
+        return _respuesta({'detail': exc.detail}, status.HTTP_404_NOT_FOUND)
+    datos = paginator.get_paginated_response(formatear(pagina)).data
+    return _respuesta(datos, renderer_class=renderer_class)
+
+
+async def _paginar_por_numero(queryset, request, formatear, renderer_class=JSONRenderer):
+    """Mismo formato y enlaces que PageNumberPagination"""
+    tamano = api_settings.PAGE_SIZE
+    total = await queryset.acount()
+    paginas = max(1, math.ceil(total / tamano))
+
+    numero = request.GET.get('page', 1)
+    if numero == 'last':
+        numero = paginas
+    try:
+        numero = int(numero)
+    except (TypeError, ValueError):
+        numero = 0
+    if not 1 <= numero <= paginas:
+        return _respuesta(
+            {'detail': PageNumberPagination.invalid_page_message},
+            status.HTTP_404_NOT_FOUND
+        )
+
+    inicio = (numero - 1) * tamano
+    pagina = [fila async for fila in queryset[inicio:inicio + tamano]]
+
+    url = request.build_absolute_uri()
+    siguiente = replace_query_param(url, 'page', numero + 1) if numero < paginas else None
+    if numero == 1:
+        anterior = None
+    elif numero == 2:
+        anterior = remove_query_param(url, 'page')
+    else:
+        anterior = replace_query_param(url, 'page', numero - 1)
+
+    return _respuesta({
+        'count': total,
+        'next': siguiente,
+        'previous': anterior,
+        'results': formatear(pagina),
+    }, renderer_class=renderer_class)
+
+
+@require_GET
+@lectura_en_replica
+async def ventas_lista(request):
+    """Equivalente asíncrono de GET /api/ventas/"""
+    ventas = await archivo.aventas(request.GET.get('fecha_inicio'))
+    ventas = listados.valores_ventas(consultas.filtrar_ventas(ventas, request.GET))
+
+    if VentaKeysetPagination.solicitada(request):
+        return await _paginar_por_cursor(
+            VentaKeysetPagination(), ventas, request, listados.formatear_ventas,
+            JSONRapidoRenderer
+        )
+    return await _paginar_por_numero(
+        ventas, request, listados.formatear_ventas, JSONRapidoRenderer
+    )
+
+
+@require_GET
+@lectura_en_replica
+@respuesta_cacheada_async
+async def ventas_estadisticas(request):
+    """Equivalente asíncrono de GET /api/ventas/estadisticas/"""
+    resumenes = consultas.filtrar_ventas(ResumenDiarioVenta.objects.all(), request.GET)
+    stats = await resumenes.aaggregate(**consultas.agregados_estadisticas())
+    return _respuesta(consultas.formatear_estadisticas(stats))
+
+
+@require_GET
+@lectura_en_replica
+@respuesta_cacheada_async
+async def vendedores_activos(request):
+    """Equivalente asíncrono de GET /api/vendedores/activos/"""
+    vendedores = [vendedor async for vendedor in Vendedor.objects.filter(activo=True)]
+    serializer = VendedorSimpleSerializer(vendedores, many=True)
+    return _respuesta(serializer.data)
+
+
+@require_GET
+@lectura_en_replica
+@respuesta_cacheada_async
+async def comisiones_resumen(request):
+    """Equivalente asíncrono de GET /api/comisiones/resumen/"""
+    comisiones = consultas.filtrar_comisiones(
+        ComisionCalculada.objects.select_related('vendedor'),
+        request.GET
+    )
+
+    if ComisionKeysetPagination.solicitada(request):
+        return await _paginar_por_cursor(
+            ComisionKeysetPagination(), comisiones, request,
+            _serializar(ComisionCalculadaSerializer)
+        )
+
+    serializer = ComisionCalculadaSerializer(
+        [comision async for comision in comisiones],
+        many=True
+    )
+    return _respuesta(serializer.data)
@@ -1,5 +1,9 @@
 """
 ASGI config for VentasPro project.
+
+Las vistas de /api/async/ usan el ORM asíncrono y rinden bajo un servidor
+ASGI, por ejemplo:
+    gunicorn ventaspro_project.asgi:application -k uvicorn.workers.UvicornWorker
 """
 
 import os
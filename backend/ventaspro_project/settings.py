@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'sales_app.metricas.MetricasMiddleware',  # Latencia y consultas por endpoint
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Para servir archivos estáticos
     'corsheaders.middleware.CorsMiddleware',  # CORS debe ir antes de CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -90,6 +91,73 @@ else:
         }
     }
 
+# Réplica de solo lectura opcional para las acciones de consulta de la API
+# (ver sales_app/replica.py); sin ella todo usa `default`
+if config('DATABASE_REPLICA_URL', default=None):
+    DATABASES['replica'] = dj_database_url.parse(
+        config('DATABASE_REPLICA_URL'),
+        conn_max_age=600,
+        conn_health_checks=True,
+    )
+    # En los tests la réplica es la misma base de datos que `default`
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['sales_app.replica.ReplicaRouter']
+
+# Cache
+# Guarda las respuestas cacheadas y, si es compartida, las marcas de versión
+# de reglas de comisión y de datos:
+# - REDIS_URL: Redis, compartida entre workers y entre servidores (producción)
+# - CACHE_DIR: archivos en un directorio local; solo sirve con un único
+#   servidor, los workers de otras máquinas no ven las mismas versiones
+# - sin ninguna: memoria de cada proceso. Las marcas de versión se leen
+#   entonces de la base de datos (tabla marcas_version, donde se guardan
+#   siempre) para que todos los workers y comandos las vean, a costa de una
+#   consulta por clave primaria en cada lectura de la tabla de reglas o de
+#   una respuesta cacheada
+if config('REDIS_URL', default=None):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('REDIS_URL'),
+        }
+    }
+    CACHE_COMPARTIDA = True
+elif config('CACHE_DIR', default=None):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config('CACHE_DIR'),
+        }
+    }
+    CACHE_COMPARTIDA = True
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    CACHE_COMPARTIDA = False
+
+# Segundos que se guarda cada respuesta de lectura cacheada (estadísticas,
+# resúmenes); las escrituras las invalidan antes por cambio de versión
+RESPUESTAS_CACHE_TIMEOUT = config('RESPUESTAS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Cálculo de comisiones en segundo plano
+# 'hilo': pool de hilos dentro de cada proceso web
+# 'worker': las tareas las procesa `manage.py procesar_tareas_comision`
+COMISIONES_TAREAS_MODO = config('COMISIONES_TAREAS_MODO', default='hilo')
+COMISIONES_TAREAS_HILOS = config('COMISIONES_TAREAS_HILOS', default=2, cast=int)
+# Segundos sin señales tras los que una tarea en proceso se da por interrumpida
+COMISIONES_TAREAS_TIMEOUT = config('COMISIONES_TAREAS_TIMEOUT', default=600, cast=int)
+# Margen, en segundos, que se resta a la marca de agua del cálculo de comisiones
+# Debe superar la duración de la transacción de escritura de ventas más larga
+COMISIONES_MARGEN_MARCA = config('COMISIONES_MARGEN_MARCA', default=300, cast=int)
+
+# Métricas por endpoint (/api/metrics/)
+# Cada worker vuelca sus contadores en este directorio y el endpoint los suma
+METRICAS_DIR = config('METRICAS_DIR', default=str(BASE_DIR / '.metricas'))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -8,6 +8,9 @@ const CommissionCalculation = () => {
   const [error, setError] = useState(null);
   const [resultados, setResultados] = useState(null);
   const [expandedVendedor, setExpandedVendedor] = useState(null);
+  // Período del último cálculo y ventas de cada vendedor cargadas bajo demanda
+  const [periodo, setPeriodo] = useState(null);
+  const [detalles, setDetalles] = useState({});
   
   // Estado del formulario
   const [formData, setFormData] = useState({
@@ -43,12 +46,17 @@ const CommissionCalculation = () => {
     setError(null);
     
     try {
+      // Solo totales: el detalle de cada vendedor se pide al expandirlo
       const response = await comisionesAPI.calcular({
         fecha_inicio: formData.fecha_inicio,
-        fecha_fin: formData.fecha_fin
+        fecha_fin: formData.fecha_fin,
+        detalle: false
       });
       
       setResultados(response.data);
+      setPeriodo({ fecha_inicio: formData.fecha_inicio, fecha_fin: formData.fecha_fin });
+      setDetalles({});
+      setExpandedVendedor(null);
     } catch (err) {
       console.error('Error al calcular comisiones:', err);
       setError(handleAPIError(err));
@@ -58,8 +66,43 @@ const CommissionCalculation = () => {
     }
   };
 
+  // Cargar una página de ventas de un vendedor en el período calculado
+  const cargarDetalle = async (vendedorId, pagina = 1) => {
+    setDetalles(prev => ({
+      ...prev,
+      [vendedorId]: { ventas: [], siguiente: null, ...prev[vendedorId], cargando: true }
+    }));
+    
+    try {
+      const response = await comisionesAPI.getDetalle({
+        vendedor: vendedorId,
+        ...periodo,
+        page: pagina
+      });
+      
+      setDetalles(prev => ({
+        ...prev,
+        [vendedorId]: {
+          ventas: [...prev[vendedorId].ventas, ...response.data.results],
+          siguiente: response.data.next ? pagina + 1 : null,
+          cargando: false
+        }
+      }));
+    } catch (err) {
+      console.error('Error al cargar el detalle de ventas:', err);
+      setError(handleAPIError(err));
+      setDetalles(prev => ({
+        ...prev,
+        [vendedorId]: { ...prev[vendedorId], cargando: false }
+      }));
+    }
+  };
+
   // Toggle para expandir/colapsar detalles de vendedor
   const toggleVendedorDetails = (vendedorId) => {
+    if (expandedVendedor !== vendedorId && !detalles[vendedorId]) {
+      cargarDetalle(vendedorId);
+    }
     setExpandedVendedor(prev => prev === vendedorId ? null : vendedorId);
   };
 
@@ -356,7 +399,7 @@ const CommissionCalculation = () => {
                           </tr>
                         </thead>
                         <tbody>
-                          {resultado.ventas_detalle.map(venta => (
+                          {(detalles[resultado.vendedor_id]?.ventas || []).map(venta => (
                             <tr key={venta.id}>
                               <td>#{venta.id}</td>
                               <td>{formatDate(venta.fecha)}</td>
@@ -376,6 +419,23 @@ const CommissionCalculation = () => {
                         </tbody>
                       </table>
                     </div>
+
+                    {detalles[resultado.vendedor_id]?.cargando && (
+                      <p style={{ color: 'var(--text-secondary)', marginTop: '1rem' }}>
+                        ⏳ Cargando ventas...
+                      </p>
+                    )}
+
+                    {detalles[resultado.vendedor_id]?.siguiente && !detalles[resultado.vendedor_id].cargando && (
+                      <button
+                        type="button"
+                        className="btn btn-secondary"
+                        style={{ marginTop: '1rem' }}
+                        onClick={() => cargarDetalle(resultado.vendedor_id, detalles[resultado.vendedor_id].siguiente)}
+                      >
+                        Cargar más ventas
+                      </button>
+                    )}
                   </div>
                 )}
               </div>
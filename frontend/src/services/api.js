@@ -56,6 +56,12 @@ export const vendedoresAPI = {
   
   // Obtener comisiones de un vendedor
   getComisiones: (id) => api.get(`/vendedores/${id}/comisiones/`),
+  
+  // Modificar muchos vendedores a la vez ({ ids | filtro, cambios })
+  actualizacionMasiva: (data) => api.post('/vendedores/bulk-update/', data),
+  
+  // Eliminar muchos vendedores y sus ventas ({ ids | filtro })
+  eliminacionMasiva: (data) => api.post('/vendedores/bulk-delete/', data),
 };
 
 // ========== REGLAS DE COMISIÓN ==========
@@ -104,6 +110,21 @@ export const ventasAPI = {
   
   // Obtener estadísticas de ventas
   getEstadisticas: (params = {}) => api.get('/ventas/estadisticas/', { params }),
+  
+  // Obtener la serie temporal (agrupacion: dia | semana | mes, por_vendedor)
+  getSerie: (params = {}) => api.get('/ventas/serie/', { params }),
+  
+  // Buscar ventas por descripción o vendedor, ordenadas por relevancia (q, page)
+  buscar: (q, params = {}) => api.get('/ventas/buscar/', { params: { ...params, q } }),
+  
+  // Registrar muchas ventas en una sola petición
+  cargaMasiva: (ventas) => api.post('/ventas/bulk/', ventas),
+  
+  // Modificar muchas ventas a la vez ({ ids | filtro, cambios })
+  actualizacionMasiva: (data) => api.post('/ventas/bulk-update/', data),
+  
+  // Eliminar muchas ventas a la vez ({ ids | filtro })
+  eliminacionMasiva: (data) => api.post('/ventas/bulk-delete/', data),
 };
 
 // ========== COMISIONES ==========
@@ -111,6 +132,18 @@ export const comisionesAPI = {
   // Calcular comisiones para un período
   calcular: (data) => api.post('/comisiones/calcular/', data),
   
+  // Calcular comisiones en segundo plano (devuelve la tarea creada)
+  calcularAsincrono: (data) => api.post('/comisiones/calcular/', { ...data, asincrono: true }),
+  
+  // Consultar el estado y resultado de una tarea de cálculo
+  getTarea: (id) => api.get(`/comisiones/tareas/${id}/`),
+  
+  // Ventas de un vendedor en un período, paginadas (vendedor, fecha_inicio, fecha_fin, page)
+  getDetalle: (params) => api.get('/comisiones/detalle/', { params }),
+  
+  // Simular un período con una tabla de reglas propuesta (no guarda nada)
+  simular: (data) => api.post('/comisiones/simular/', data),
+  
   // Obtener resumen de comisiones
   getResumen: (params = {}) => api.get('/comisiones/resumen/', { params }),
 };